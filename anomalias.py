@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Detección de anomalías en streaming (review-bombing / colapsos)
+# Descripción: Mantiene por juego una media y varianza exponenciales (EWMA)
+#              de la polaridad NLP y de log(1 + jugadores activos). Cada
+#              corrida procesa solo las filas posteriores al estado guardado,
+#              así que el costo depende del número de juegos y no de la
+#              longitud de la historia. Los eventos van a alertas_anomalias.
+# Uso:
+#   python anomalias.py
+# =============================================================================
+
+import math
+
+import pandas as pd
+from sqlalchemy import inspect, text
+
+from conexion import crear_engine
+from esquema import asegurar_tablas
+
+ALPHA = 0.1            # peso del día nuevo en la EWMA (~ ventana de 19 días)
+DIAS_CALENTAMIENTO = 7  # no se alerta hasta tener esta historia
+UMBRAL_Z = 3.5
+VARIANZA_MINIMA = {
+    # Evita z enormes en series casi constantes
+    'polaridad': 0.02 ** 2,
+    'jugadores': 0.05 ** 2,
+}
+
+# Observaciones de cada métrica en el estado: los días de backfill.py traen
+# polaridad pero jugadores NULL, así que cada métrica calienta por su cuenta
+CONTEOS = {'polaridad': 'n', 'jugadores': 'n_jugadores'}
+
+# (métrica, signo del z, tipo de alerta)
+REGLAS = [
+    ('polaridad', -1, 'caida_sentimiento'),   # review-bombing
+    ('polaridad', +1, 'pico_sentimiento'),
+    ('jugadores', -1, 'colapso_jugadores'),
+    ('jugadores', +1, 'pico_jugadores'),
+]
+
+# ---------------------------------------------------------------------------
+# 1. ACTUALIZACIÓN O(1) POR FILA
+# ---------------------------------------------------------------------------
+
+def estado_inicial():
+    return {'ultima_fecha': None, 'n': 0, 'n_jugadores': 0,
+            'media_polaridad': 0.0, 'var_polaridad': 0.0,
+            'media_jugadores': 0.0, 'var_jugadores': 0.0}
+
+
+def _actualizar_ewma(media, varianza, x, n):
+    """EWMA de media y varianza (forma incremental de Finch)."""
+    if n == 0:
+        return x, 0.0
+    diferencia = x - media
+    incremento = ALPHA * diferencia
+    return media + incremento, (1 - ALPHA) * (varianza + diferencia * incremento)
+
+
+def procesar_dia(estado, fecha, polaridad, jugadores):
+    """
+    Evalúa una fila diaria contra el estado previo y lo actualiza.
+    Devuelve la lista de alertas (dicts sin fk_juego).
+    """
+    observaciones = {
+        'polaridad': float(polaridad) if polaridad is not None and not pd.isna(polaridad) else None,
+        'jugadores': math.log1p(max(float(jugadores), 0.0)) if jugadores is not None and not pd.isna(jugadores) else None,
+    }
+
+    alertas = []
+    for metrica, signo, tipo in REGLAS:
+        x = observaciones[metrica]
+        if x is None or estado[CONTEOS[metrica]] < DIAS_CALENTAMIENTO:
+            continue
+        media = estado[f'media_{metrica}']
+        desviacion = math.sqrt(max(estado[f'var_{metrica}'], VARIANZA_MINIMA[metrica]))
+        z = (x - media) / desviacion
+        if signo * z > UMBRAL_Z:
+            valor, esperado = (x, media) if metrica == 'polaridad' else (math.expm1(x), math.expm1(media))
+            alertas.append({
+                'fk_tiempo': fecha,
+                'metrica': metrica,
+                'tipo': tipo,
+                'valor': round(valor, 4),
+                'esperado': round(esperado, 4),
+                'puntaje_z': round(z, 2),
+                'severidad': 'alta' if abs(z) > 2 * UMBRAL_Z else 'media',
+            })
+
+    for metrica, x in observaciones.items():
+        if x is not None:
+            estado[f'media_{metrica}'], estado[f'var_{metrica}'] = _actualizar_ewma(
+                estado[f'media_{metrica}'], estado[f'var_{metrica}'], x, estado[CONTEOS[metrica]]
+            )
+    if observaciones['jugadores'] is not None:
+        estado['n_jugadores'] += 1
+    estado['n'] += 1
+    estado['ultima_fecha'] = fecha
+    return alertas
+
+# ---------------------------------------------------------------------------
+# 2. LECTURA INCREMENTAL / ESCRITURA
+# ---------------------------------------------------------------------------
+
+COLUMNAS_ESTADO = ['fk_juego', 'ultima_fecha', 'n', 'n_jugadores', 'media_polaridad', 'var_polaridad',
+                   'media_jugadores', 'var_jugadores']
+
+
+def asegurar_estado(engine):
+    """Tablas de la etapa; a un estado_anomalias previo le agrega n_jugadores."""
+    asegurar_tablas(engine, 'estado_anomalias', 'alertas_anomalias')
+    if 'n_jugadores' not in {c['name'] for c in inspect(engine).get_columns('estado_anomalias')}:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE estado_anomalias ADD COLUMN n_jugadores INTEGER"))
+            # Hasta ahora el scraper escribía jugadores todos los días
+            conn.execute(text("UPDATE estado_anomalias SET n_jugadores = n"))
+
+
+def leer_estados(engine):
+    df = pd.read_sql(f"SELECT {', '.join(COLUMNAS_ESTADO)} FROM estado_anomalias", engine)
+    return {int(r['fk_juego']): {k: r[k] for k in COLUMNAS_ESTADO[1:]} for r in df.to_dict('records')}
+
+
+def leer_filas_nuevas(engine):
+    """Solo filas posteriores al estado de cada juego (o toda la historia si es nuevo)."""
+    return pd.read_sql(
+        """
+        SELECT s.fk_juego, s.fk_tiempo, s.polaridad_roberta, s.jugadores_activos
+        FROM hechos_sentimiento s
+        LEFT JOIN estado_anomalias e ON e.fk_juego = s.fk_juego
+        WHERE e.ultima_fecha IS NULL OR s.fk_tiempo > e.ultima_fecha
+        ORDER BY s.fk_juego, s.fk_tiempo
+        """,
+        engine,
+    )
+
+
+def detectar_anomalias(engine):
+    """Etapa completa: avanza el estado de cada juego y guarda alertas."""
+    asegurar_estado(engine)
+    estados = leer_estados(engine)
+    filas = leer_filas_nuevas(engine)
+    if filas.empty:
+        print("   └─ ✅ [anomalias] Sin filas nuevas desde la última corrida")
+        return 0
+
+    alertas, tocados = [], set()
+    for r in filas.itertuples(index=False):
+        appid = int(r.fk_juego)
+        estado = estados.setdefault(appid, estado_inicial())
+        for alerta in procesar_dia(estado, r.fk_tiempo, r.polaridad_roberta, r.jugadores_activos):
+            alerta['fk_juego'] = appid
+            alertas.append(alerta)
+        tocados.add(appid)
+
+    df_estados = pd.DataFrame([{'fk_juego': a, **estados[a]} for a in sorted(tocados)])[COLUMNAS_ESTADO]
+    df_alertas = pd.DataFrame(alertas)
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM estado_anomalias WHERE fk_juego = :j"),
+                     [{"j": a} for a in sorted(tocados)])
+        df_estados.to_sql('estado_anomalias', conn, if_exists='append', index=False, method='multi', chunksize=5000)
+        if not df_alertas.empty:
+            # Idempotencia: una re-ejecución del mismo día reemplaza sus alertas
+            conn.execute(
+                text("DELETE FROM alertas_anomalias WHERE fk_juego = :j AND fk_tiempo = :d"),
+                [{"j": int(j), "d": d} for j, d in df_alertas[['fk_juego', 'fk_tiempo']].drop_duplicates().itertuples(index=False)]
+            )
+            df_alertas.to_sql('alertas_anomalias', conn, if_exists='append', index=False, method='multi', chunksize=5000)
+
+    print(f"   └─ 🚨 [anomalias] {len(filas)} filas nuevas de {len(tocados)} juegos → {len(df_alertas)} alertas")
+    return len(df_alertas)
+
+
+if __name__ == "__main__":
+    engine = crear_engine()
+    if engine is None:
+        print("❌ ERROR: Falta configurar DB_URI.")
+    else:
+        detectar_anomalias(engine)
@@ -0,0 +1,405 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | API JSON de solo lectura (ASGI)
+# Descripción: Expone los KPIs, series por juego, agregados por subgénero y
+#              desarrollador y los escenarios del simulador que calcula
+#              dashboard.py, sin pasar por el proceso de Streamlit.
+#              - Pool asíncrono (asyncpg) compartido por todas las peticiones
+#              - Caché LRU en proceso; la llave incluye la versión de datos,
+#                así que una carga nueva la invalida sola
+#              - ETag + Cache-Control (If-None-Match → 304 sin tocar la base)
+#              - Paginación por cursor: ?limite=N&despues=<cursor>
+# Uso:
+#   DB_URI=postgresql://localhost/steam DB_SSLMODE=disable python api_steam.py
+#   uvicorn api_steam:app --workers 2
+# =============================================================================
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import simulador
+from capa_datos import COLUMNAS_NLP, QUERY_VENTAS, compactar_ventas
+from conexion import crear_engine_async
+
+LIMITE_DEFECTO = 100
+MAX_LIMITE = 500
+CACHE_ENTRADAS = 512
+VERSION_TTL_S = 30      # cada cuánto se vuelve a consultar la versión de datos
+MAX_AGE_S = 60          # Cache-Control para clientes y proxies
+
+# ---------------------------------------------------------------------------
+# 1. CONSULTAS
+# ---------------------------------------------------------------------------
+
+# Cambia con cualquier escritura en hechos_* / dim_juego (contador de pg_stat)
+# o con un día nuevo; barata: no recorre ninguna tabla de hechos.
+QUERY_VERSION = """
+    SELECT
+        (SELECT MAX(fk_tiempo) FROM hechos_sentimiento) AS ultimo_dia,
+        (SELECT COALESCE(SUM(n_tup_ins + n_tup_upd + n_tup_del), 0)
+         FROM pg_stat_user_tables
+         WHERE relname = 'dim_juego' OR relname LIKE 'hechos%') AS escrituras
+"""
+
+RATIO_POSITIVIDAD = """
+    CASE WHEN h.votos_positivos + h.votos_negativos > 0
+         THEN CAST(h.votos_positivos AS DOUBLE PRECISION) / (h.votos_positivos + h.votos_negativos)
+         ELSE 0 END
+"""
+
+QUERY_JUEGOS = """
+    SELECT d.appid, d.nombre, d.subgenero, d.desarrollador, h.fk_tiempo AS fecha,
+           h.votos_positivos, h.votos_negativos, h.cantidad_descargas,
+           h.monto_ventas_usd, h.conteo_resenas
+    FROM dim_juego d
+    CROSS JOIN LATERAL (
+        SELECT * FROM hechos_resenas_steam h
+        WHERE h.fk_juego = d.appid
+        ORDER BY h.fk_tiempo DESC
+        LIMIT 1
+    ) h
+    WHERE d.appid > :despues
+    ORDER BY d.appid
+    LIMIT :limite
+"""
+
+QUERY_SERIE_VENTAS = """
+    SELECT fk_tiempo AS fecha, votos_positivos, votos_negativos, cantidad_descargas,
+           monto_ventas_usd, conteo_resenas
+    FROM hechos_resenas_steam
+    WHERE fk_juego = :appid AND fk_tiempo > :despues
+    ORDER BY fk_tiempo
+    LIMIT :limite
+"""
+
+QUERY_SERIE_SENTIMIENTO = f"""
+    SELECT fk_tiempo AS fecha, {", ".join(c for c in COLUMNAS_NLP if c not in ('fk_juego', 'fk_tiempo'))}
+    FROM hechos_sentimiento
+    WHERE fk_juego = :appid AND fk_tiempo > :despues
+    ORDER BY fk_tiempo
+    LIMIT :limite
+"""
+
+AGRUPACIONES = {'subgenero': 'd.subgenero', 'desarrollador': 'd.desarrollador'}
+
+# ---------------------------------------------------------------------------
+# 2. CACHÉ LRU CON VERSIÓN DE DATOS
+# ---------------------------------------------------------------------------
+
+class CacheRespuestas:
+    """
+    LRU de cuerpos JSON ya serializados. Peticiones simultáneas a la misma
+    llave esperan el mismo cálculo en vez de repetir la consulta.
+    """
+
+    def __init__(self, capacidad=CACHE_ENTRADAS):
+        self.capacidad = capacidad
+        self._entradas = OrderedDict()
+        self._en_curso = {}
+
+    async def obtener(self, clave, calcular):
+        if clave in self._entradas:
+            self._entradas.move_to_end(clave)
+            return self._entradas[clave]
+
+        tarea = self._en_curso.get(clave)
+        if tarea is None:
+            tarea = asyncio.ensure_future(calcular())
+            self._en_curso[clave] = tarea
+            try:
+                # shield: si este cliente se desconecta, los demás siguen esperando
+                cuerpo = await asyncio.shield(tarea)
+            finally:
+                self._en_curso.pop(clave, None)
+            self._entradas[clave] = cuerpo
+            if len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+            return cuerpo
+        return await asyncio.shield(tarea)
+
+    def limpiar(self):
+        self._entradas.clear()
+
+
+class EstadoApi:
+    """Engine, caché y versión de datos compartidos por todas las peticiones."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.cache = CacheRespuestas()
+        self._version = None
+        self._version_ts = 0.0
+        self._lock_version = asyncio.Lock()
+        self._simulador = None      # (version, tarea de entrenamiento)
+
+    async def version(self):
+        if time.monotonic() - self._version_ts < VERSION_TTL_S:
+            return self._version
+        async with self._lock_version:
+            if time.monotonic() - self._version_ts >= VERSION_TTL_S:
+                fila = (await self.consultar(QUERY_VERSION))[0]
+                nueva = f"{fila['ultimo_dia']}:{fila['escrituras']}"
+                if nueva != self._version:
+                    # Las llaves viejas ya no se pueden pedir: liberar memoria
+                    self.cache.limpiar()
+                self._version, self._version_ts = nueva, time.monotonic()
+        return self._version
+
+    async def consultar(self, sql, **params):
+        consulta = text(sql)
+        for nombre, valor in params.items():
+            if isinstance(valor, (list, tuple)):
+                consulta = consulta.bindparams(bindparam(nombre, expanding=True))
+        async with self.engine.connect() as conn:
+            resultado = await conn.execute(consulta, params)
+            return [dict(r._mapping) for r in resultado]
+
+    async def modelo_simulador(self, version):
+        """Random Forest entrenado una vez por versión de datos, fuera del event loop."""
+        if self._simulador is None or self._simulador[0] != version:
+            async def entrenar():
+                async with self.engine.connect() as conn:
+                    df = await conn.run_sync(lambda c: pd.read_sql(QUERY_VENTAS, c))
+                df = compactar_ventas(df)
+                if len(df) <= simulador.MIN_REGISTROS:
+                    raise LookupError("Se necesitan más registros para el simulador")
+                return await asyncio.to_thread(simulador.entrenar_simulador, df)
+            self._simulador = (version, asyncio.ensure_future(entrenar()))
+        tarea = self._simulador[1]
+        try:
+            return await asyncio.shield(tarea)
+        except Exception:
+            # No dejar un fallo (p. ej. base caída) cacheado hasta la siguiente versión
+            if self._simulador is not None and self._simulador[1] is tarea:
+                self._simulador = None
+            raise
+
+# ---------------------------------------------------------------------------
+# 3. RESPUESTAS, PARÁMETROS Y PAGINACIÓN
+# ---------------------------------------------------------------------------
+
+def _json_default(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f"No serializable: {type(valor).__name__}")
+
+
+async def responder(request, calcular):
+    """
+    Envuelve un handler: ETag por (versión, ruta, query), 304 si el cliente
+    ya la tiene, y si no cuerpo desde la LRU o calculado una sola vez.
+    """
+    estado = request.app.state.api
+    try:
+        version = await estado.version()
+        consulta = sorted(request.query_params.multi_items())
+        clave = (version, request.url.path, tuple(consulta))
+        etag = '"' + hashlib.sha1(repr(clave).encode('utf-8')).hexdigest() + '"'
+        encabezados = {"ETag": etag, "Cache-Control": f"public, max-age={MAX_AGE_S}"}
+
+        if etag in request.headers.get('if-none-match', ''):
+            return Response(status_code=304, headers=encabezados)
+
+        async def serializar():
+            datos = await calcular()
+            return json.dumps(datos, default=_json_default, ensure_ascii=False).encode('utf-8')
+
+        cuerpo = await estado.cache.obtener(clave, serializar)
+        return Response(cuerpo, media_type="application/json", headers=encabezados)
+    except (ValueError, LookupError) as e:
+        return JSONResponse({"error": str(e)}, status_code=400 if isinstance(e, ValueError) else 404)
+    except Exception as e:
+        print(f"❌ [api] {request.url.path}: {e}")
+        return JSONResponse({"error": "Base de datos no disponible"}, status_code=503)
+
+
+def leer_limite(request):
+    limite = int(request.query_params.get('limite', LIMITE_DEFECTO))
+    if not 1 <= limite <= MAX_LIMITE:
+        raise ValueError(f"limite debe estar entre 1 y {MAX_LIMITE}")
+    return limite
+
+
+def leer_filtros(request):
+    """Mismos filtros que el sidebar del dashboard: subgéneros y rango de ventas."""
+    subgeneros = request.query_params.getlist('subgenero')
+    ventas_min = request.query_params.get('ventas_min')
+    ventas_max = request.query_params.get('ventas_max')
+
+    condiciones, params = [], {}
+    if subgeneros:
+        condiciones.append("d.subgenero IN :subgeneros")
+        params['subgeneros'] = subgeneros
+    if ventas_min is not None:
+        condiciones.append("h.monto_ventas_usd >= :ventas_min")
+        params['ventas_min'] = float(ventas_min)
+    if ventas_max is not None:
+        condiciones.append("h.monto_ventas_usd <= :ventas_max")
+        params['ventas_max'] = float(ventas_max)
+    return ("WHERE " + " AND ".join(condiciones)) if condiciones else "", params
+
+
+def pagina(filas, limite, cursor):
+    """filas trae limite + 1 elementos como máximo; el extra indica que hay más."""
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+    return {
+        "datos": filas,
+        "limite": limite,
+        "siguiente": cursor(filas[-1]) if hay_mas else None,
+    }
+
+# ---------------------------------------------------------------------------
+# 4. ENDPOINTS
+# ---------------------------------------------------------------------------
+
+async def salud(request):
+    try:
+        version = await request.app.state.api.version()
+        return JSONResponse({"estado": "ok", "version_datos": version},
+                            headers={"Cache-Control": "no-store"})
+    except Exception as e:
+        return JSONResponse({"estado": "error", "detalle": str(e)}, status_code=503)
+
+
+async def kpis(request):
+    async def calcular():
+        where, params = leer_filtros(request)
+        fila = (await request.app.state.api.consultar(f"""
+            SELECT COALESCE(SUM(h.monto_ventas_usd), 0) AS ventas_totales,
+                   COALESCE(SUM(h.cantidad_descargas), 0) AS descargas_totales,
+                   COALESCE(AVG({RATIO_POSITIVIDAD}), 0) AS indice_satisfaccion,
+                   COUNT(*) AS registros
+            FROM hechos_resenas_steam h
+            JOIN dim_juego d ON h.fk_juego = d.appid
+            {where}
+        """, **params))[0]
+        return fila
+    return await responder(request, calcular)
+
+
+async def juegos(request):
+    async def calcular():
+        limite = leer_limite(request)
+        despues = int(request.query_params.get('despues', 0))
+        filas = await request.app.state.api.consultar(QUERY_JUEGOS, despues=despues, limite=limite + 1)
+        return pagina(filas, limite, lambda f: f['appid'])
+    return await responder(request, calcular)
+
+
+def _serie(sql):
+    async def endpoint(request):
+        async def calcular():
+            appid = int(request.path_params['appid'])
+            limite = leer_limite(request)
+            despues = date.fromisoformat(request.query_params.get('despues', '1970-01-01'))
+            filas = await request.app.state.api.consultar(sql, appid=appid, despues=despues, limite=limite + 1)
+            if not filas and 'despues' not in request.query_params:
+                raise LookupError(f"Sin datos para el juego {appid}")
+            return pagina(filas, limite, lambda f: f['fecha'].isoformat())
+        return await responder(request, calcular)
+    return endpoint
+
+
+async def agregados(request):
+    async def calcular():
+        columna = AGRUPACIONES.get(request.path_params['dimension'])
+        if columna is None:
+            raise LookupError(f"Dimensión desconocida. Disponibles: {', '.join(AGRUPACIONES)}")
+        limite = leer_limite(request)
+        desplazamiento = int(request.query_params.get('despues', 0))
+        where, params = leer_filtros(request)
+        filas = await request.app.state.api.consultar(f"""
+            SELECT {columna} AS grupo,
+                   SUM(h.monto_ventas_usd) AS ventas_totales,
+                   SUM(h.cantidad_descargas) AS descargas_totales,
+                   AVG({RATIO_POSITIVIDAD}) AS indice_satisfaccion,
+                   COUNT(*) AS registros
+            FROM hechos_resenas_steam h
+            JOIN dim_juego d ON h.fk_juego = d.appid
+            {where}
+            GROUP BY {columna}
+            ORDER BY ventas_totales DESC, grupo
+            LIMIT :limite OFFSET :desplazamiento
+        """, limite=limite + 1, desplazamiento=desplazamiento, **params)
+        # Los agregados son pocos: el cursor es el desplazamiento
+        return pagina(filas, limite, lambda f: desplazamiento + limite)
+    return await responder(request, calcular)
+
+
+async def escenarios(request):
+    async def calcular():
+        subgenero = request.query_params.get('subgenero')
+        if not subgenero:
+            raise ValueError("Falta el parámetro subgenero")
+        resenas = int(request.query_params.get('resenas', 5000))
+        positividad = float(request.query_params.get('positividad', 0.85))
+        if not 0 <= positividad <= 1:
+            raise ValueError("positividad debe estar entre 0 y 1")
+
+        estado = request.app.state.api
+        modelo, columnas = await estado.modelo_simulador(await estado.version())
+        resultado = await asyncio.to_thread(
+            simulador.calcular_escenarios, modelo, columnas, subgenero, resenas, positividad
+        )
+        return {"subgenero": subgenero, "resenas": resenas, "positividad": positividad, **resultado}
+    return await responder(request, calcular)
+
+# ---------------------------------------------------------------------------
+# 5. APLICACIÓN
+# ---------------------------------------------------------------------------
+
+@contextlib.asynccontextmanager
+async def ciclo_de_vida(app):
+    engine = crear_engine_async()
+    if engine is None:
+        raise RuntimeError("Falta configurar DB_URI")
+    app.state.api = EstadoApi(engine)
+    try:
+        yield
+    finally:
+        await engine.dispose()
+
+
+app = Starlette(
+    routes=[
+        Route('/salud', salud),
+        Route('/kpis', kpis),
+        Route('/juegos', juegos),
+        Route('/juegos/{appid:int}/ventas', _serie(QUERY_SERIE_VENTAS)),
+        Route('/juegos/{appid:int}/sentimiento', _serie(QUERY_SERIE_SENTIMIENTO)),
+        Route('/agregados/{dimension}', agregados),
+        Route('/simulador', escenarios),
+    ],
+    lifespan=ciclo_de_vida,
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API JSON de solo lectura de Steam-BI")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run("api_steam:app", host=args.host, port=args.puerto, workers=args.workers)
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Backfill histórico en paralelo
+# Descripción: Reconstruye la historia diaria de juegos recién agregados a
+#              partir de los timestamps de las reseñas de Steam, en lugar de
+#              esperar a que el job diario la acumule.
+#              - Conteos acumulados (hechos_resenas_steam): totales actuales
+#                menos lo publicado después de cada día (histograma de Steam,
+#                o las reseñas descargadas si el histograma no responde).
+#              - Sentimiento (hechos_sentimiento + desglose por idioma): las
+#                reseñas de cada día, puntuadas con el mismo enrutado por
+#                idioma que el scraper diario.
+#              Los datos que solo da la API del día (jugadores activos,
+#              oferta, parche) quedan en NULL: no se conocen para el pasado.
+#              Trabaja juego por juego: cada hilo descarga un juego (el cursor
+#              de Steam es secuencial), lo puntúa en un pool de procesos y lo
+#              carga de forma idempotente antes de tomar el siguiente, así que
+#              en memoria solo están las reseñas de los juegos en curso.
+#              Solo llena días sin filas (los del scraper diario no se tocan)
+#              salvo con --sobrescribir; --hasta por defecto es ayer.
+# Uso:
+#   python backfill.py --desde 2025-01-01 --hasta 2025-12-31 --appids 440,730
+#   python backfill.py --desde 2025-01-01 --sobrescribir   # reemplaza días ya cargados
+# =============================================================================
+
+import argparse
+import contextlib
+import datetime
+import io
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+from sqlalchemy import text
+
+import idiomas
+import migrar
+import replica
+import scraper_steam_diario as scraper
+import steam_etl
+from conexion import SesionSteam, crear_engine, crear_engine_backup
+from esquema import asegurar_estrella, asegurar_tablas
+
+tz_mexico = steam_etl.tz_mexico
+
+MAX_PAGINAS_POR_APP = 500
+RESENAS_POR_PAGINA = 100
+
+# Nombres de idioma de la API de Steam → ISO 639-1
+IDIOMAS_STEAM = {
+    'english': 'en', 'spanish': 'es', 'latam': 'es', 'brazilian': 'pt', 'portuguese': 'pt',
+    'french': 'fr', 'german': 'de', 'russian': 'ru', 'italian': 'it', 'polish': 'pl',
+    'turkish': 'tr', 'schinese': 'zh', 'tchinese': 'zh', 'japanese': 'ja', 'koreana': 'ko',
+    'thai': 'th', 'ukrainian': 'uk', 'arabic': 'ar',
+}
+
+# ---------------------------------------------------------------------------
+# 1. DESCARGA (hilos, concurrencia acotada)
+# ---------------------------------------------------------------------------
+
+def fecha_mexico(timestamp):
+    return datetime.datetime.fromtimestamp(int(timestamp), tz_mexico).date()
+
+
+def descargar_resenas(appid, session, desde, max_paginas=MAX_PAGINAS_POR_APP):
+    """
+    Recorre appreviews (filter=recent, de la más nueva a la más vieja)
+    hasta pasar 'desde'. Devuelve (query_summary, [(fecha, idioma, texto, voted_up)]).
+    """
+    resumen, resenas, cursor = None, [], '*'
+    for _ in range(max_paginas):
+        r = session.get(
+            f"https://store.steampowered.com/appreviews/{appid}",
+            params={'json': 1, 'filter': 'recent', 'language': 'all', 'purchase_type': 'all',
+                    'num_per_page': RESENAS_POR_PAGINA, 'cursor': cursor},
+            timeout=20,
+        )
+        r.raise_for_status()
+        data = r.json()
+        if resumen is None:
+            resumen = data.get('query_summary', {})
+
+        pagina = data.get('reviews', [])
+        for resena in pagina:
+            fecha = fecha_mexico(resena['timestamp_created'])
+            if fecha < desde:
+                return resumen, resenas
+            resenas.append((fecha, resena.get('language', ''), resena.get('review', ''), bool(resena.get('voted_up'))))
+
+        siguiente = data.get('cursor')
+        if not pagina or not siguiente or siguiente == cursor:
+            break
+        cursor = siguiente
+    else:
+        print(f"   │  └─ ⚠️  [{appid}] Tope de {max_paginas} páginas: sentimiento parcial antes de {resenas[-1][0] if resenas else desde}")
+    return resumen, resenas
+
+
+def descargar_histograma(appid, session):
+    """Votos (up, down) por bucket de fecha según el histograma de la tienda, o None."""
+    try:
+        r = session.get(
+            f"https://store.steampowered.com/appreviewhistogram/{appid}?l=english&review_score_preference=0",
+            timeout=15,
+        )
+        resultados = r.json().get('results', {})
+    except Exception:
+        return None
+
+    # Los buckets de Steam empiezan a medianoche UTC: se etiquetan con su fecha UTC
+    def fecha_bucket(ts):
+        return datetime.datetime.fromtimestamp(int(ts), datetime.timezone.utc).date()
+
+    recientes = resultados.get('recent') or []
+    inicio_diario = min((b['date'] for b in recientes), default=None)
+    buckets = {}
+    for b in resultados.get('rollups') or []:
+        if inicio_diario is None or b['date'] < inicio_diario:
+            buckets[fecha_bucket(b['date'])] = (b['recommendations_up'], b['recommendations_down'])
+    for b in recientes:
+        buckets[fecha_bucket(b['date'])] = (b['recommendations_up'], b['recommendations_down'])
+    return buckets or None
+
+
+def descargar_app(appid, session, desde, max_paginas):
+    try:
+        resumen, resenas = descargar_resenas(appid, session, desde, max_paginas)
+        histograma = descargar_histograma(appid, session)
+    except Exception as e:
+        print(f"   │  └─ ❌ [{appid}] Descarga falló: {e}")
+        return None
+    print(f"   │  └─ 📥 [{appid}] {len(resenas):,} reseñas desde {desde}"
+          f"{'' if histograma else ' (sin histograma: conteos desde reseñas)'}")
+    return {'resumen': resumen, 'resenas': resenas, 'histograma': histograma}
+
+# ---------------------------------------------------------------------------
+# 2. RECONSTRUCCIÓN POR DÍA
+# ---------------------------------------------------------------------------
+
+def conteos_acumulados(appid, descarga, fechas):
+    """Filas de hechos_resenas_steam: totales al cierre de cada fecha."""
+    resumen = descarga['resumen'] or {}
+    if 'total_positive' not in resumen:
+        return []
+
+    buckets = descarga['histograma']
+    if buckets is None:
+        buckets = defaultdict(lambda: [0, 0])
+        for fecha, _, _, voted_up in descarga['resenas']:
+            buckets[fecha][0 if voted_up else 1] += 1
+
+    # Recorre las fechas de la más nueva a la más vieja restando lo posterior
+    orden = sorted(buckets, reverse=True)
+    filas, posteriores_up, posteriores_down, i = [], 0, 0, 0
+    for fecha in sorted(fechas, reverse=True):
+        while i < len(orden) and orden[i] > fecha:
+            posteriores_up += buckets[orden[i]][0]
+            posteriores_down += buckets[orden[i]][1]
+            i += 1
+        positivos = max(resumen['total_positive'] - posteriores_up, 0)
+        negativos = max(resumen['total_negative'] - posteriores_down, 0)
+        if positivos + negativos == 0:
+            continue
+        filas.append(steam_etl.construir_hecho(appid, fecha, positivos, negativos, positivos + negativos))
+    return filas
+
+
+def puntuar_app(appid, resenas):
+    """
+    Corre en un proceso hijo: sentimiento por día para un juego.
+    Devuelve (filas hechos_sentimiento, filas desglose por idioma).
+    """
+    por_fecha = defaultdict(list)
+    for fecha, idioma_steam, texto, _ in resenas:
+        if len(texto) > 10:
+            por_fecha[fecha].append((idioma_steam, texto))
+
+    filas, desglose = [], []
+    # NULL, no 0: un cero falso entraría a los pronósticos, a la EWMA de
+    # anomalias.py y a la gráfica de jugadores
+    sin_datos_api = {'en_oferta': None, 'hubo_actualizacion': None, 'jugadores_activos': None}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for fecha, items in por_fecha.items():
+            textos = [t for _, t in items]
+            codigos = [IDIOMAS_STEAM.get(l) or idiomas.detectar_idioma(t) for l, t in items]
+            nlp = scraper.evaluar_textos(textos, codigos)
+            fila = scraper.construir_resumen(appid, sin_datos_api, nlp, fecha)
+            if fila is not None:
+                filas.append(fila)
+            desglose.extend(scraper.construir_desglose_idiomas(appid, nlp, fecha))
+    return filas, desglose
+
+# ---------------------------------------------------------------------------
+# 3. CARGA POR JUEGO (idempotente)
+# ---------------------------------------------------------------------------
+
+def asegurar_fechas(engine, fechas):
+    """Alta en dim_tiempo de todo el rango (una vez, antes de cargar juegos)."""
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO dim_tiempo (id_tiempo, mes, trimestre, anio)
+            VALUES (:d, :m, :t, :a) ON CONFLICT (id_tiempo) DO NOTHING
+        """), [{"d": f, "m": f.month, "t": (f.month - 1) // 3 + 1, "a": f.year} for f in fechas])
+
+
+def dias_cargados(conn, tabla, appid, desde, hasta):
+    """Días de [desde, hasta] que ya tienen filas del juego en 'tabla'."""
+    filas = conn.execute(
+        text(f"SELECT DISTINCT fk_tiempo FROM {tabla} WHERE fk_juego = :j AND fk_tiempo BETWEEN :desde AND :hasta"),
+        {"j": int(appid), "desde": desde, "hasta": hasta}
+    )
+    return {pd.Timestamp(r[0]).date() for r in filas}
+
+
+def cargar_app(engine, appid, desde, hasta, resenas_df, sentimiento_df, idiomas_df, sobrescribir=False):
+    """
+    Carga, en una transacción, los hechos reconstruidos de un juego en
+    [desde, hasta]. Por defecto solo llena días sin filas: los del scraper
+    diario (con jugadores, oferta y parche reales) no se tocan. Con
+    'sobrescribir' reemplaza todo el rango. Devuelve las filas insertadas.
+    """
+    insertadas = []
+    with engine.begin() as conn:
+        if not sobrescribir:
+            # El desglose por idioma sigue a hechos_sentimiento: no se completa un día ya cargado
+            con_sentimiento = dias_cargados(conn, 'hechos_sentimiento', appid, desde, hasta)
+        for tabla, df in (('hechos_resenas_steam', resenas_df),
+                          ('hechos_sentimiento', sentimiento_df),
+                          ('hechos_sentimiento_idioma', idiomas_df)):
+            if sobrescribir:
+                conn.execute(
+                    text(f"DELETE FROM {tabla} WHERE fk_juego = :j AND fk_tiempo BETWEEN :desde AND :hasta"),
+                    {"j": int(appid), "desde": desde, "hasta": hasta}
+                )
+            elif not df.empty:
+                ocupados = dias_cargados(conn, tabla, appid, desde, hasta)
+                if tabla == 'hechos_sentimiento_idioma':
+                    ocupados |= con_sentimiento
+                df = df[~pd.to_datetime(df['fk_tiempo']).dt.date.isin(ocupados)]
+            if not df.empty:
+                df.to_sql(tabla, conn, if_exists='append', index=False, method='multi')
+            insertadas.append(len(df))
+    return tuple(insertadas)
+
+
+def rango_fechas(desde, hasta):
+    return [desde + datetime.timedelta(days=i) for i in range((hasta - desde).days + 1)]
+
+
+def procesar_app(appid, engine, session, pool, fechas, max_paginas, sobrescribir=False):
+    """
+    Descarga, reconstruye, puntúa y carga un juego. Devuelve las filas por
+    tabla (conteo, sentimiento, desglose) cargadas, o reconstruidas si no
+    hay engine; None si la descarga falló.
+    """
+    desde, hasta = fechas[0], fechas[-1]
+    descarga = descargar_app(appid, session, desde, max_paginas)
+    if descarga is None:
+        return None
+
+    df_resenas = pd.DataFrame(conteos_acumulados(appid, descarga, fechas))
+    resenas_en_rango = [r for r in descarga['resenas'] if r[0] <= hasta]
+    del descarga
+    filas, desglose = pool.submit(puntuar_app, appid, resenas_en_rango).result()
+    df_sent, df_idiomas = pd.DataFrame(filas), pd.DataFrame(desglose)
+
+    if engine is None:
+        return len(df_resenas), len(df_sent), len(df_idiomas)
+    cargadas = cargar_app(engine, appid, desde, hasta, df_resenas, df_sent, df_idiomas, sobrescribir)
+    print(f"   │  └─ 💾 [{appid}] {cargadas[0]:,} días de conteo, {cargadas[1]:,} de sentimiento"
+          f"{'' if sobrescribir else ' (solo días sin datos)'}")
+    return cargadas
+
+
+def backfill(engine, appids, desde, hasta, concurrencia=8, procesos=None,
+             max_paginas=MAX_PAGINAS_POR_APP, sobrescribir=False):
+    """
+    Backfill completo. Si engine es None solo reporta lo reconstruido.
+    Sin 'sobrescribir' solo llena los días que no tienen filas.
+    Devuelve el total de filas (conteo, sentimiento, desglose por idioma).
+    """
+    fechas = rango_fechas(desde, hasta)
+    session = SesionSteam(hilos=concurrencia)
+
+    if engine is not None:
+        print(f"1. Preparando esquema y {len(fechas)} días en dim_tiempo...")
+        if migrar.es_postgres(engine):
+            asegurar_tablas(engine, 'hechos_sentimiento_idioma')
+            migrar.migrar(engine)
+            migrar.asegurar_particiones(engine, desde, hasta)
+        else:
+            asegurar_estrella(engine, appids)
+        asegurar_fechas(engine, fechas)
+    else:
+        print("⚠️  Sin DB_URI — no se carga nada (ejecución de prueba).")
+
+    print(f"2. Procesando {len(appids)} juegos ({concurrencia} en paralelo, {len(fechas)} días)...")
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool, \
+            ThreadPoolExecutor(max_workers=concurrencia) as hilos:
+        resultados = list(hilos.map(
+            lambda a: procesar_app(a, engine, session, pool, fechas, max_paginas, sobrescribir), appids
+        ))
+
+    cargados = [r for r in resultados if r is not None]
+    totales = tuple(sum(r[i] for r in cargados) for i in range(3))
+    print(f"   └─ {len(cargados)}/{len(appids)} juegos: {totales[0]:,} filas de conteo, "
+          f"{totales[1]:,} de sentimiento, {totales[2]:,} de desglose por idioma")
+    if engine is None:
+        return totales
+
+    # El rango recargado se vuelve a copiar aunque los conteos coincidan
+    backup = crear_engine_backup()
+    if backup is not None:
+        print("3. Replicando el rango a DB_URI_BACKUP...")
+        replica.sincronizar(engine, backup, forzar=(desde, hasta))
+    print(f"✅ Backfill completado: {desde} → {hasta}")
+    return totales
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill histórico Steam-BI")
+    parser.add_argument('--desde', required=True, type=datetime.date.fromisoformat)
+    # Hoy lo carga el scraper diario con los datos reales de la API
+    parser.add_argument('--hasta', type=datetime.date.fromisoformat,
+                        default=steam_etl.hoy - datetime.timedelta(days=1))
+    parser.add_argument('--appids', help="Lista separada por comas (por defecto, los juegos del ETL)")
+    parser.add_argument('--concurrencia', type=int, default=8, help="Juegos descargándose a la vez")
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos para el NLP")
+    parser.add_argument('--max-paginas', type=int, default=MAX_PAGINAS_POR_APP,
+                        help="Páginas de 100 reseñas por juego como máximo")
+    parser.add_argument('--sobrescribir', action='store_true',
+                        help="Reemplaza también los días ya cargados (por defecto solo llena huecos)")
+    args = parser.parse_args(argv)
+
+    if args.desde > args.hasta:
+        parser.error("--desde debe ser anterior o igual a --hasta")
+    appids = [int(a) for a in args.appids.split(',')] if args.appids else steam_etl.juegos_ids
+
+    print("=======================================================================")
+    print(f"⏪ BACKFILL STEAM-BI | {len(appids)} juegos | {args.desde} → {args.hasta}")
+    print("=======================================================================")
+    backfill(crear_engine(), appids, args.desde, args.hasta,
+             args.concurrencia, args.procesos, args.max_paginas, args.sobrescribir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Benchmark de arranque (costo de imports)
+# Descripción: Mide en procesos limpios cuánto tarda en importarse cada
+#              punto de entrada. Para dashboard.py se miden sus imports de
+#              nivel superior (el script en sí necesita Streamlit corriendo).
+# Uso:
+#   python bench_arranque.py                 # mediana de 5 corridas
+#   python bench_arranque.py --top 15        # + módulos más caros (-X importtime)
+# =============================================================================
+
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def imports_de_nivel_superior(ruta):
+    """Código con solo los imports de nivel superior de un script."""
+    with open(ruta, encoding='utf-8') as f:
+        arbol = ast.parse(f.read())
+    nodos = [n for n in arbol.body if isinstance(n, (ast.Import, ast.ImportFrom, ast.Try))]
+    return "\n".join(ast.unparse(n) for n in nodos)
+
+
+OBJETIVOS = {
+    'steam_etl': "import steam_etl",
+    'scraper_steam_diario': "import scraper_steam_diario",
+    'pipeline_steam': "import pipeline_steam",
+    'dashboard (imports)': imports_de_nivel_superior(os.path.join(DIRECTORIO, 'dashboard.py')),
+}
+
+
+def medir(codigo):
+    """Segundos de import en un intérprete nuevo (None si falla)."""
+    script = (
+        "import time\n"
+        "_t0 = time.perf_counter()\n"
+        f"{codigo}\n"
+        "print(time.perf_counter() - _t0)\n"
+    )
+    r = subprocess.run([sys.executable, "-c", script], cwd=DIRECTORIO,
+                       capture_output=True, text=True)
+    if r.returncode != 0:
+        return None, r.stderr.strip().splitlines()[-1] if r.stderr else "error"
+    return float(r.stdout.strip().splitlines()[-1]), None
+
+
+def modulos_mas_caros(codigo, top):
+    """Módulos con mayor tiempo acumulado según -X importtime."""
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo],
+                       cwd=DIRECTORIO, capture_output=True, text=True)
+    filas = []
+    for linea in r.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        # "import time: <propio> | <acumulado> | <módulo>"
+        _, acumulado, modulo = linea[len("import time:"):].split("|")
+        filas.append((int(acumulado), modulo.strip()))
+    filas.sort(reverse=True)
+    return filas[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de arranque Steam-BI")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--top', type=int, default=0, help="Muestra los N módulos más caros")
+    args = parser.parse_args(argv)
+
+    print(f"{'Punto de entrada':<24} {'mediana':>9} {'mín':>9} {'máx':>9}")
+    for nombre, codigo in OBJETIVOS.items():
+        tiempos, error = [], None
+        for _ in range(args.repeticiones):
+            t, error = medir(codigo)
+            if t is None:
+                break
+            tiempos.append(t)
+        if not tiempos:
+            print(f"{nombre:<24} ❌ {error}")
+            continue
+        print(f"{nombre:<24} {statistics.median(tiempos):>8.3f}s "
+              f"{min(tiempos):>8.3f}s {max(tiempos):>8.3f}s")
+
+        if args.top:
+            for acumulado, modulo in modulos_mas_caros(codigo, args.top):
+                print(f"   └─ {acumulado / 1e6:>7.3f}s  {modulo}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Benchmark de motores de sentimiento (reseñas/s)
+# Descripción: Puntúa el mismo corpus de reseñas en inglés con cada motor de
+#              sentimiento.py y reporta el tiempo de carga, reseñas por
+#              segundo, ms por reseña, la distribución positiva/negativa
+#              (umbral ±0.05, como el scraper) y la concordancia de clase con
+#              el primer motor. Sirve para elegir motor por tramo de juegos
+#              (p. ej. onnx para los más reseñados, lexico para la cola larga).
+#              Corpus: --archivo (una reseña por línea), --appid (scraping
+#              en vivo, como el pipeline) o un corpus sintético.
+# Uso:
+#   python bench_sentimiento.py                           # sintético, ambos motores
+#   python bench_sentimiento.py --appid 730 --motores lexico,onnx
+#   python bench_sentimiento.py --archivo resenas.txt --limite 5000 --json sentimiento.json
+# =============================================================================
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import sentimiento
+
+UMBRAL = 0.05
+
+_POSITIVAS = ["great", "amazing", "fun", "beautiful", "addictive", "polished", "worth every penny"]
+_NEGATIVAS = ["boring", "buggy", "broken", "overpriced", "laggy", "a waste of money", "unplayable"]
+_RELLENO = ["the combat", "the story", "multiplayer", "the soundtrack", "the new update", "the devs",
+            "matchmaking", "the graphics", "the campaign", "after 200 hours"]
+
+
+def corpus_sintetico(n, semilla=42):
+    """Reseñas de 1 a 12 frases: la mezcla de largos ejercita los lotes por longitud."""
+    rng = np.random.default_rng(semilla)
+    textos = []
+    for _ in range(n):
+        frases = []
+        for _ in range(int(rng.integers(1, 13))):
+            adjetivo = rng.choice(_POSITIVAS if rng.random() < 0.7 else _NEGATIVAS)
+            frases.append(f"{rng.choice(_RELLENO).capitalize()} is {adjetivo}.")
+        textos.append(" ".join(frases))
+    return textos
+
+
+def cargar_corpus(archivo=None, appid=None, limite=2000, semilla=42):
+    if archivo:
+        with open(archivo, encoding='utf-8') as f:
+            textos = [linea.strip() for linea in f if len(linea.strip()) > 10]
+    elif appid:
+        import idiomas
+        import scraper_steam_diario as scraper
+
+        textos = scraper.extraer_textos(appid)
+        textos = [t for t, i in zip(textos, idiomas.detectar_idiomas(textos)) if i == 'en']
+    else:
+        textos = corpus_sintetico(limite, semilla)
+    return textos[:limite]
+
+
+def clases(polaridades):
+    polaridades = np.asarray(polaridades, dtype='float64')
+    return np.where(polaridades > UMBRAL, 1, np.where(polaridades < -UMBRAL, -1, 0))
+
+
+def medir_motor(motor, textos):
+    inicio = time.perf_counter()
+    puntuador = sentimiento.obtener_puntuador(motor)
+    puntuador.puntuar_lote(textos[:8])          # calentamiento: modelo, léxico, sesión
+    carga_s = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    polaridades = puntuador.puntuar_lote(textos)
+    segundos = time.perf_counter() - inicio
+    return {
+        'motor': motor,
+        'efectivo': puntuador.nombre,
+        'resenas': len(textos),
+        'carga_s': round(carga_s, 2),
+        'segundos': round(segundos, 3),
+        'resenas_por_s': round(len(textos) / segundos, 1) if segundos else None,
+        'ms_por_resena': round(segundos / len(textos) * 1000, 3) if textos else None,
+    }, clases(polaridades)
+
+
+def comparar(textos, motores=sentimiento.MOTORES):
+    resultados, referencia = [], None
+    for motor in motores:
+        resultado, clase = medir_motor(motor, textos)
+        if referencia is None:
+            referencia = clase
+        resultado['positivas_pct'] = round(float(np.mean(clase == 1) * 100), 1)
+        resultado['negativas_pct'] = round(float(np.mean(clase == -1) * 100), 1)
+        resultado['concordancia_pct'] = round(float(np.mean(clase == referencia) * 100), 1)
+        resultados.append(resultado)
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reseñas/s de cada motor de sentimiento")
+    parser.add_argument('--motores', default=",".join(sentimiento.MOTORES), help="Lista separada por comas")
+    parser.add_argument('--archivo', help="Corpus: una reseña por línea")
+    parser.add_argument('--appid', type=int, help="Corpus: reseñas en inglés de este juego (scraping)")
+    parser.add_argument('--limite', type=int, default=2000, help="Reseñas a puntuar")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--json', help="Guarda el reporte en este archivo")
+    args = parser.parse_args()
+
+    textos = cargar_corpus(args.archivo, args.appid, args.limite, args.semilla)
+    print("=======================================================================")
+    print(f"🧠 BENCHMARK DE SENTIMIENTO · {len(textos):,} reseñas · "
+          f"{np.mean([len(t) for t in textos]):.0f} caracteres en promedio")
+    print("=======================================================================")
+    resultados = comparar(textos, args.motores.split(','))
+    print(pd.DataFrame(resultados).set_index('motor').T.to_string())
+    for r in resultados:
+        if r['efectivo'] != r['motor']:
+            print(f"⚠️  '{r['motor']}' no estaba disponible: se midió '{r['efectivo']}'")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'resenas': len(textos), 'resultados': resultados}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Reporte en {args.json}")
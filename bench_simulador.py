@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Benchmark de motores del simulador
+# Descripción: Entrena cada motor de simulador.py con los mismos hechos de
+#              ventas y lo evalúa en juegos que no vio (20% de los juegos
+#              apartados con todos sus días: un lanzamiento es un juego
+#              nuevo). Reporta tiempo de entrenamiento, de predicción (un
+#              escenario, como el dashboard, y un lote) y precisión:
+#              - pinball: pérdida cuantil promedio de los tres percentiles
+#              - cobertura: % de casos dentro de [p15, p85] (ideal: 70%)
+#              - MAE: error absoluto del escenario realista (p50)
+#              Sin --db-uri siembra un esquema sintético en un SQLite temporal
+#              (mismo generador que carga_dashboard.py).
+# Uso:
+#   python bench_simulador.py                          # 300 juegos x 180 días
+#   python bench_simulador.py --juegos 1000 --dias 365
+#   python bench_simulador.py --db-uri postgresql://... --json simulador.json
+# =============================================================================
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import simulador
+from capa_datos import QUERY_VENTAS, compactar_ventas
+from conexion import crear_engine
+
+FRACCION_PRUEBA = 0.2
+LOTE_PREDICCION = 1000
+REPETICIONES_PREDICCION = 20
+
+
+def cargar_hechos(db_uri=None, juegos=300, dias=180, semilla=42):
+    """Hechos de ventas como los lee el dashboard (QUERY_VENTAS compactado)."""
+    if db_uri:
+        return compactar_ventas(pd.read_sql(QUERY_VENTAS, crear_engine(db_uri)))
+    import carga_dashboard
+
+    with tempfile.TemporaryDirectory() as directorio:
+        engine = crear_engine(f"sqlite:///{os.path.join(directorio, 'bench.db')}")
+        carga_dashboard.sembrar(engine, juegos, dias, semilla)
+        df = compactar_ventas(pd.read_sql(QUERY_VENTAS, engine))
+        engine.dispose()
+    return df
+
+
+def pinball(y, prediccion, cuantil):
+    diferencia = y - prediccion
+    return float(np.mean(np.maximum(cuantil * diferencia, (cuantil - 1) * diferencia)))
+
+
+def medir_motor(motor, X_train, y_train, X_test, y_test, columnas):
+    inicio = time.perf_counter()
+    modelo = simulador.ajustar(X_train, y_train, motor)
+    entrenamiento_s = time.perf_counter() - inicio
+
+    # Un escenario: lo que paga el dashboard al presionar "Calcular"
+    genero = next((c[len('subgenero_'):] for c in columnas if c.startswith('subgenero_')), '')
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES_PREDICCION):
+        simulador.calcular_escenarios(modelo, columnas, genero, 5000, 0.85)
+    unitario_ms = (time.perf_counter() - inicio) / REPETICIONES_PREDICCION * 1000
+
+    lote = X_test[:LOTE_PREDICCION]
+    inicio = time.perf_counter()
+    modelo.escenarios(lote)
+    lote_ms = (time.perf_counter() - inicio) * 1000
+
+    escenarios = modelo.escenarios(X_test)
+    cuantiles = [p / 100 for p in simulador.PERCENTILES.values()]
+    return {
+        'motor': motor,
+        'entrenamiento_s': round(entrenamiento_s, 3),
+        'prediccion_unitaria_ms': round(unitario_ms, 2),
+        f'prediccion_lote_{len(lote)}_ms': round(lote_ms, 2),
+        'pinball': round(float(np.mean([pinball(y_test, escenarios[:, i], q) for i, q in enumerate(cuantiles)])), 2),
+        'cobertura_pct': round(float(np.mean((y_test >= escenarios[:, 0]) & (y_test <= escenarios[:, 2])) * 100), 1),
+        'mae_realista': round(float(np.mean(np.abs(y_test - escenarios[:, 1]))), 2),
+    }
+
+
+def comparar(df, motores=simulador.MOTORES, semilla=42):
+    X, y, columnas = simulador.preparar_datos(df)
+    # Partición por juego: con filas al azar el mismo juego (otro día) cae en
+    # ambos lados y se premia memorizar juegos
+    juegos = df['fk_juego'].to_numpy()
+    unicos = np.unique(juegos)
+    apartados = np.random.default_rng(semilla).choice(unicos, int(len(unicos) * FRACCION_PRUEBA), replace=False)
+    en_prueba = np.isin(juegos, apartados)
+    entrenamiento, prueba = np.flatnonzero(~en_prueba), np.flatnonzero(en_prueba)
+    return [
+        medir_motor(motor, X[entrenamiento], y[entrenamiento], X[prueba], y[prueba], columnas)
+        for motor in motores
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara los motores del simulador de escenarios")
+    parser.add_argument('--db-uri', help="Lee los hechos de esta base (por defecto, datos sintéticos)")
+    parser.add_argument('--juegos', type=int, default=300)
+    parser.add_argument('--dias', type=int, default=180)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--json', help="Guarda el reporte en este archivo")
+    args = parser.parse_args()
+
+    df = cargar_hechos(args.db_uri, args.juegos, args.dias, args.semilla)
+    print("=======================================================================")
+    print(f"🧮 BENCHMARK DEL SIMULADOR · {len(df):,} registros · "
+          f"{FRACCION_PRUEBA:.0%} de los juegos como prueba")
+    print("=======================================================================")
+    resultados = comparar(df, semilla=args.semilla)
+    print(pd.DataFrame(resultados).set_index('motor').T.to_string(float_format=lambda v: f"{v:,.2f}"))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'registros': len(df), 'resultados': resultados}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Reporte en {args.json}")
@@ -0,0 +1,279 @@
+# =============================================================================
+# STEAM-BI | Capa de datos compacta del dashboard
+# Descripción: Los DataFrames que lee dashboard.py se cargan una sola vez por
+#              proceso (st.cache_resource) y se comparten entre sesiones.
+#              Por eso aquí se reducen a las columnas necesarias, con tipos
+#              categóricos y numéricos reducidos, y se consideran de solo
+#              lectura: el dashboard filtra por posiciones y nunca los modifica.
+# =============================================================================
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Date, bindparam, text
+
+# Columnas de hechos_resenas_steam que el dashboard realmente usa
+COLUMNAS_VENTAS = [
+    'fk_juego', 'votos_positivos', 'votos_negativos', 'cantidad_descargas',
+    'monto_ventas_usd', 'conteo_resenas'
+]
+
+# LEFT JOIN: un hecho cuyo juego aún no llega a dim_juego (catalogo_juegos.py
+# lo da de alta) se muestra con los mismos valores provisionales
+QUERY_VENTAS = f"""
+    SELECT
+        {", ".join("h." + c for c in COLUMNAS_VENTAS)},
+        COALESCE(d.nombre, 'App ' || CAST(h.fk_juego AS VARCHAR(12))) AS nombre,
+        COALESCE(d.subgenero, 'Sin clasificar') AS subgenero,
+        COALESCE(d.desarrollador, 'Desconocido') AS desarrollador,
+        t.id_tiempo as fecha
+    FROM hechos_resenas_steam h
+    LEFT JOIN dim_juego d ON h.fk_juego = d.appid
+    LEFT JOIN dim_tiempo t ON h.fk_tiempo = t.id_tiempo
+"""
+
+# Columnas de hechos_sentimiento que usa la pestaña NLP
+COLUMNAS_NLP = [
+    'fk_juego', 'fk_tiempo', 'total_resenas_analizadas', 'resenas_positivas_nlp',
+    'resenas_negativas_nlp', 'polaridad_roberta', 'sentimiento_predominante',
+    'en_oferta', 'hubo_actualizacion', 'jugadores_activos', 'tema_principal'
+]
+
+# Último registro por juego: un index-scan (fk_juego, fk_tiempo) por juego,
+# sin recorrer la historia. Sirve de lista de juegos y de tarjeta "último día".
+QUERY_ULTIMO_NLP = f"""
+    SELECT {", ".join("s." + c for c in COLUMNAS_NLP)}, d.nombre
+    FROM dim_juego d
+    CROSS JOIN LATERAL (
+        SELECT * FROM hechos_sentimiento s
+        WHERE s.fk_juego = d.appid
+        ORDER BY s.fk_tiempo DESC
+        LIMIT 1
+    ) s
+    ORDER BY d.nombre
+"""
+
+# Misma consulta sin LATERAL para SQLite (ventana ROW_NUMBER, portable)
+QUERY_ULTIMO_NLP_PORTABLE = f"""
+    SELECT {", ".join("s." + c for c in COLUMNAS_NLP)}, d.nombre
+    FROM dim_juego d
+    JOIN (
+        SELECT h.*, ROW_NUMBER() OVER (PARTITION BY h.fk_juego ORDER BY h.fk_tiempo DESC) AS rn
+        FROM hechos_sentimiento h
+    ) s ON s.fk_juego = d.appid AND s.rn = 1
+    ORDER BY d.nombre
+"""
+
+# Serie diaria de un solo juego
+QUERY_SERIE_NLP = f"""
+    SELECT {", ".join(COLUMNAS_NLP)}
+    FROM hechos_sentimiento
+    WHERE fk_juego = :fk_juego
+    ORDER BY fk_tiempo ASC
+"""
+
+
+def query_ultimo_nlp(engine):
+    """LATERAL donde el motor lo soporta (index-scan por juego), ventana si no."""
+    return QUERY_ULTIMO_NLP if engine.dialect.name in ('postgresql', 'duckdb') else QUERY_ULTIMO_NLP_PORTABLE
+
+
+def fecha_corte(engine, tabla, dias):
+    """
+    MAX(fk_tiempo) de la tabla menos 'dias', calculado en Python: la resta
+    fecha - entero no es portable (SQLite guarda DATE como texto).
+    """
+    with engine.connect() as conn:
+        ultimo = conn.execute(text(f"SELECT MAX(fk_tiempo) FROM {tabla}")).scalar()
+    if ultimo is None:
+        return None
+    return (pd.Timestamp(ultimo) - pd.Timedelta(days=dias)).date()
+
+
+def consulta_desde(sql):
+    """text() con :corte tipado como DATE (cada dialecto lo serializa bien)."""
+    return text(sql).bindparams(bindparam('corte', type_=Date))
+
+
+def _compactar(df, categoricas=(), enteras=(), flotantes=()):
+    """Convierte in-place a category / el entero más pequeño / float32."""
+    for col in categoricas:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in enteras:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col].fillna(0), downcast='integer')
+    for col in flotantes:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], downcast='float')
+    return df
+
+
+def compactar_ventas(df):
+    """Tipos compactos + ratio_positividad para los hechos de ventas."""
+    if df.empty:
+        return df
+    positivos = df['votos_positivos'].to_numpy(dtype='float64')
+    total = positivos + df['votos_negativos'].to_numpy(dtype='float64')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(total > 0, positivos / total, 0.0)
+
+    # monto_ventas_usd se queda en float64: las sumas llegan a miles de millones
+    df['monto_ventas_usd'] = df['monto_ventas_usd'].fillna(0).astype('float64')
+    df['ratio_positividad'] = ratio.astype('float32')
+    df['fecha'] = pd.to_datetime(df['fecha'])
+    return _compactar(
+        df,
+        categoricas=('nombre', 'subgenero', 'desarrollador'),
+        enteras=('fk_juego', 'votos_positivos', 'votos_negativos',
+                 'cantidad_descargas', 'conteo_resenas'),
+    )
+
+
+def compactar_nlp(df):
+    """Tipos compactos para la serie diaria de hechos_sentimiento."""
+    if df.empty:
+        return df
+    return _compactar(
+        df,
+        categoricas=('nombre', 'sentimiento_predominante', 'tema_principal'),
+        enteras=('fk_juego', 'total_resenas_analizadas', 'resenas_positivas_nlp',
+                 'resenas_negativas_nlp'),
+        # NULL = día sin datos de la API (backfill): NaN, no 0
+        flotantes=('polaridad_roberta', 'en_oferta', 'hubo_actualizacion', 'jugadores_activos'),
+    )
+
+
+def indices_filtro(df, subgeneros, rango_ventas):
+    """
+    Posiciones de las filas que cumplen los filtros del sidebar.
+    Compara códigos de categoría (enteros) en lugar de cadenas.
+    """
+    categorias = df['subgenero'].cat.categories
+    codigos_sel = np.flatnonzero(categorias.isin(list(subgeneros)))
+    mascara = np.isin(df['subgenero'].cat.codes.to_numpy(), codigos_sel)
+
+    ventas = df['monto_ventas_usd'].to_numpy()
+    mascara &= (ventas >= rango_ventas[0]) & (ventas <= rango_ventas[1])
+    return np.flatnonzero(mascara)
+
+
+def indices_ultimo_por_juego(df):
+    """
+    Posiciones de la fila más reciente de cada juego (una por fk_juego).
+    Las filas sin fecha solo ganan si el juego no tiene ninguna con fecha.
+    """
+    if df.empty:
+        return np.arange(0)
+    fechas = df['fecha'].to_numpy(dtype='datetime64[ns]').astype('int64')
+    juegos = df['fk_juego'].to_numpy()
+    # lexsort: la última llave es la primaria → juego, luego fecha ascendente
+    orden = np.lexsort((fechas, juegos))
+    ultimos = np.flatnonzero(np.append(juegos[orden][1:] != juegos[orden][:-1], True))
+    return np.sort(orden[ultimos])
+
+
+def construir_snapshot(df):
+    """
+    Último registro de cada juego indexado por nombre (índice único → lookup
+    por hash). Se construye una vez por versión de los datos.
+    """
+    snapshot = df.take(indices_ultimo_por_juego(df))
+    snapshot = snapshot[snapshot['nombre'].notna()]
+    snapshot = snapshot.set_index(snapshot['nombre'].astype(str))
+    return snapshot[~snapshot.index.duplicated(keep='last')]
+
+
+def normalizar_por_maximo(valores):
+    """
+    Escala cada columna de una matriz (juegos x métricas) a 0-100 respecto
+    a su máximo. Columnas sin valores positivos quedan en 0.
+    """
+    valores = np.nan_to_num(np.asarray(valores, dtype='float64'))
+    maximos = valores.max(axis=0, initial=0.0)
+    maximos[maximos <= 0] = 1.0
+    return valores / maximos * 100
+
+
+def memoria_mb(df):
+    """Memoria real del DataFrame (incluye categorías) en MB."""
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def _sumas_por_codigo(codigos, minlength, columnas):
+    """
+    Conteo y sumas por grupo con np.bincount (codigos enteros >= 0).
+    Devuelve (grupos presentes, conteos, {columna: sumas}) solo de los
+    grupos con filas, como groupby(observed=True).
+    """
+    conteos = np.bincount(codigos, minlength=minlength)
+    presentes = np.flatnonzero(conteos)
+    sumas = {
+        nombre: np.bincount(codigos, weights=valores, minlength=minlength)[presentes]
+        for nombre, valores in columnas.items()
+    }
+    return presentes, conteos[presentes], sumas
+
+
+def _rollup_categoria(df, columna, posiciones, valores):
+    codigos = df[columna].cat.codes.to_numpy()[posiciones]
+    validos = codigos >= 0
+    presentes, conteos, sumas = _sumas_por_codigo(
+        codigos[validos].astype('int64'), len(df[columna].cat.categories),
+        {nombre: v[validos] for nombre, v in valores.items()}
+    )
+    return pd.DataFrame({columna: df[columna].cat.categories[presentes], 'filas': conteos, **sumas})
+
+
+def agregar_filtro(df, posiciones):
+    """
+    Todos los agregados del dashboard para un estado de filtros, en una sola
+    pasada sobre las filas filtradas: las columnas se extraen una vez y cada
+    rollup (subgénero, juego, desarrollador, fecha) es un np.bincount sobre
+    los códigos de categoría. KPIs, gráficos y PDF consumen este resultado.
+    """
+    ventas = df['monto_ventas_usd'].to_numpy(dtype='float64')[posiciones]
+    descargas = df['cantidad_descargas'].to_numpy(dtype='float64')[posiciones]
+    ratio = df['ratio_positividad'].to_numpy(dtype='float64')[posiciones]
+    valores = {'monto_ventas_usd': ventas, 'cantidad_descargas': descargas,
+               'ratio_positividad': ratio}
+
+    agregados = {
+        'kpis': {
+            'ventas': float(ventas.sum()),
+            'descargas': float(descargas.sum()),
+            'ratio': float(ratio.mean()) if len(ratio) else float('nan'),
+            'registros': int(len(posiciones)),
+        }
+    }
+
+    por_subgenero = _rollup_categoria(df, 'subgenero', posiciones, {'monto_ventas_usd': ventas})
+    agregados['por_subgenero'] = (
+        por_subgenero[['subgenero', 'monto_ventas_usd']]
+        .sort_values('monto_ventas_usd', ascending=False, kind='stable').reset_index(drop=True)
+    )
+
+    # Por juego: ventas y descargas acumuladas, satisfacción promedio
+    por_juego = _rollup_categoria(df, 'nombre', posiciones, valores)
+    por_juego['ratio_positividad'] = por_juego['ratio_positividad'] / por_juego['filas']
+    agregados['por_juego'] = (
+        por_juego.drop(columns='filas')
+        .sort_values('monto_ventas_usd', ascending=False, kind='stable').reset_index(drop=True)
+    )
+
+    por_desarrollador = _rollup_categoria(
+        df, 'desarrollador', posiciones,
+        {'monto_ventas_usd': ventas, 'cantidad_descargas': descargas}
+    )
+    agregados['por_desarrollador'] = (
+        por_desarrollador.rename(columns={'filas': 'juegos'})
+        [['desarrollador', 'monto_ventas_usd', 'cantidad_descargas', 'juegos']]
+        .sort_values('monto_ventas_usd', ascending=False, kind='stable').reset_index(drop=True)
+    )
+
+    # Fechas: códigos con np.unique (ya salen ordenadas); NaT no cuenta
+    fechas = df['fecha'].to_numpy(dtype='datetime64[ns]')[posiciones]
+    con_fecha = ~np.isnat(fechas)
+    dias, codigos = np.unique(fechas[con_fecha], return_inverse=True)
+    _, _, sumas = _sumas_por_codigo(codigos.ravel(), len(dias), {'monto_ventas_usd': ventas[con_fecha]})
+    agregados['por_fecha'] = pd.DataFrame({'fecha': dias, **sumas})
+    return agregados
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Sincronización de dim_juego con la tienda de Steam
+# Descripción: Mantiene dim_juego (nombre, subgénero, desarrollador) sin SQL
+#              manual:
+#              1. Todo fk_juego de los hechos sin fila en dim_juego recibe una
+#                 fila provisional al momento (los JOIN nunca pierden hechos).
+#              2. Solo los juegos nuevos, provisionales o revisados hace más
+#                 de DIAS_VIGENCIA se consultan en appdetails, en paralelo y
+#                 con un tope de peticiones por minuto.
+#              3. Los atributos de Steam se resumen en una huella (sha1); si
+#                 no cambió, solo se actualiza revisado_en.
+#              4. Si cambió: upsert masivo en dim_juego (siempre la versión
+#                 vigente, llave appid) y nueva versión en
+#                 dim_juego_historial (SCD tipo 2: valido_desde/valido_hasta).
+#              Un subgénero curado a mano se respeta; solo se llena desde los
+#              géneros de Steam mientras sea 'Sin clasificar'.
+# Uso:
+#   python catalogo_juegos.py                         # pendientes (tope por corrida)
+#   python catalogo_juegos.py --appids 440,730 --forzar
+#   python catalogo_juegos.py --limite 2000           # onboarding masivo
+# =============================================================================
+
+import argparse
+import datetime
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from sqlalchemy import bindparam, inspect, text
+
+import steam_etl
+from conexion import HEADERS_STEAM, crear_engine
+from esquema import asegurar_tablas
+
+URL_APPDETAILS = "https://store.steampowered.com/api/appdetails"
+DIAS_VIGENCIA = 7
+LIMITE_POR_CORRIDA = 200
+PETICIONES_POR_MINUTO = 40     # appdetails tolera ~200 cada 5 minutos
+ESPERA_LIMITE_S = 60
+MAX_FALLOS = 3                 # provisionales que Steam no reconoce: dejar de insistir
+
+SUBGENERO_PROVISIONAL = 'Sin clasificar'
+DESARROLLADOR_PROVISIONAL = 'Desconocido'
+
+# Hechos cuyos fk_juego deben existir en dim_juego
+TABLAS_HECHOS = ['hechos_resenas_steam', 'hechos_sentimiento', 'hechos_precios', 'hechos_jugadores_diario']
+
+# ---------------------------------------------------------------------------
+# 1. COBERTURA: NINGÚN HECHO SIN DIMENSIÓN
+# ---------------------------------------------------------------------------
+
+def asegurar_cobertura(engine, appids=()):
+    """Fila provisional para cada appid (pedido o en los hechos) que falte en dim_juego."""
+    existentes = set(inspect(engine).get_table_names())
+    faltantes = set(int(a) for a in appids)
+    with engine.connect() as conn:
+        for tabla in TABLAS_HECHOS:
+            if tabla in existentes:
+                faltantes.update(r[0] for r in conn.execute(text(f"""
+                    SELECT DISTINCT h.fk_juego FROM {tabla} h
+                    LEFT JOIN dim_juego d ON d.appid = h.fk_juego
+                    WHERE d.appid IS NULL
+                """)))
+        if faltantes:
+            conn.execute(
+                text("""
+                    INSERT INTO dim_juego (appid, nombre, subgenero, desarrollador)
+                    VALUES (:a, :n, :s, :d) ON CONFLICT (appid) DO NOTHING
+                """),
+                [{"a": a, "n": f"App {a}", "s": SUBGENERO_PROVISIONAL, "d": DESARROLLADOR_PROVISIONAL}
+                 for a in sorted(faltantes)]
+            )
+        conn.commit()
+
+# ---------------------------------------------------------------------------
+# 2. QUÉ HAY QUE CONSULTAR
+# ---------------------------------------------------------------------------
+
+def pendientes(engine, appids=(), forzar=False, limite=LIMITE_POR_CORRIDA):
+    """
+    appids a consultar, los nunca revisados primero y luego los más viejos.
+    Con 'forzar' se toman los appids pedidos aunque estén vigentes.
+    """
+    if forzar and appids:
+        return list(appids)[:limite]
+    corte = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) - datetime.timedelta(days=DIAS_VIGENCIA)
+    with engine.connect() as conn:
+        filas = conn.execute(text("""
+            SELECT d.appid, e.revisado_en
+            FROM dim_juego d
+            LEFT JOIN estado_dim_juego e ON e.appid = d.appid
+            WHERE e.appid IS NULL
+               OR e.revisado_en < :corte
+               OR (d.nombre = 'App ' || CAST(d.appid AS VARCHAR(12)) AND e.fallos < :max_fallos)
+        """), {"corte": corte, "max_fallos": MAX_FALLOS}).fetchall()
+    # None (nunca revisado) primero, luego por antigüedad
+    filas.sort(key=lambda f: (f[1] is not None, str(f[1] or '')))
+    return [f[0] for f in filas][:limite]
+
+# ---------------------------------------------------------------------------
+# 3. DESCARGA
+# ---------------------------------------------------------------------------
+
+class Ritmo:
+    """Espacia las peticiones entre hilos: como máximo 'por_minuto'."""
+
+    def __init__(self, por_minuto):
+        self.intervalo = 60.0 / por_minuto
+        self._siguiente = 0.0
+        self._lock = threading.Lock()
+
+    def esperar(self):
+        with self._lock:
+            ahora = time.monotonic()
+            espera = self._siguiente - ahora
+            self._siguiente = max(ahora, self._siguiente) + self.intervalo
+        if espera > 0:
+            time.sleep(espera)
+
+
+def atributos_steam(appid, session=requests, ritmo=None):
+    """{nombre, desarrollador, generos} desde appdetails, o None si Steam no lo tiene."""
+    params = {'appids': appid, 'filters': 'basic,developers,genres'}
+    for intento in range(2):
+        if ritmo is not None:
+            ritmo.esperar()
+        respuesta = session.get(URL_APPDETAILS, params=params, headers=HEADERS_STEAM, timeout=15)
+        if respuesta.status_code == 429 and intento == 0:
+            time.sleep(ESPERA_LIMITE_S)
+            continue
+        entrada = (respuesta.json() or {}).get(str(appid)) if respuesta.ok else None
+        if not entrada or not entrada.get('success') or not isinstance(entrada.get('data'), dict):
+            return None
+        datos = entrada['data']
+        return {
+            'nombre': (datos.get('name') or f"App {appid}")[:200],
+            'desarrollador': ", ".join(datos.get('developers') or [DESARROLLADOR_PROVISIONAL])[:200],
+            'generos': [g['description'] for g in datos.get('genres') or [] if g.get('description')],
+        }
+    return None
+
+
+def huella(atributos):
+    return hashlib.sha1(json.dumps(atributos, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+# ---------------------------------------------------------------------------
+# 4. ESCRITURA (UPSERT MASIVO + HISTORIAL)
+# ---------------------------------------------------------------------------
+
+def aplicar_cambios(engine, consultados, ahora):
+    """
+    consultados = {appid: atributos o None}. Una sola transacción:
+    estado de todos, y dim_juego + historial solo de los que cambiaron.
+    Devuelve el número de juegos con cambios.
+    """
+    appids = list(consultados)
+    with engine.connect() as conn:
+        consulta = text("""
+            SELECT d.appid, d.subgenero, e.huella
+            FROM dim_juego d LEFT JOIN estado_dim_juego e ON e.appid = d.appid
+            WHERE d.appid IN :appids
+        """).bindparams(bindparam('appids', expanding=True))
+        actuales = {a: (s, h) for a, s, h in conn.execute(consulta, {"appids": appids})}
+
+    cambios, estados = [], []
+    for appid, atributos in consultados.items():
+        subgenero, huella_anterior = actuales.get(appid, (None, None))
+        if atributos is None:
+            estados.append({"a": appid, "h": huella_anterior, "r": ahora, "f": 1})
+            continue
+        nueva = huella(atributos)
+        estados.append({"a": appid, "h": nueva, "r": ahora, "f": 0})
+        if nueva == huella_anterior:
+            continue
+        if not subgenero or subgenero == SUBGENERO_PROVISIONAL:
+            subgenero = atributos['generos'][0] if atributos['generos'] else SUBGENERO_PROVISIONAL
+        cambios.append({"a": appid, "n": atributos['nombre'], "s": subgenero[:100],
+                        "d": atributos['desarrollador'], "h": nueva, "t": ahora})
+
+    with engine.begin() as conn:
+        if cambios:
+            conn.execute(text("""
+                INSERT INTO dim_juego (appid, nombre, subgenero, desarrollador)
+                VALUES (:a, :n, :s, :d)
+                ON CONFLICT (appid) DO UPDATE SET
+                    nombre = excluded.nombre,
+                    subgenero = excluded.subgenero,
+                    desarrollador = excluded.desarrollador
+            """), cambios)
+            conn.execute(
+                text("UPDATE dim_juego_historial SET valido_hasta = :t, es_actual = 0 "
+                     "WHERE appid = :a AND es_actual = 1"),
+                [{"a": c["a"], "t": c["t"]} for c in cambios]
+            )
+            conn.execute(text("""
+                INSERT INTO dim_juego_historial
+                    (appid, valido_desde, valido_hasta, es_actual, nombre, subgenero, desarrollador, huella)
+                VALUES (:a, :t, NULL, 1, :n, :s, :d, :h)
+            """), cambios)
+        conn.execute(text("""
+            INSERT INTO estado_dim_juego (appid, huella, revisado_en, fallos)
+            VALUES (:a, :h, :r, :f)
+            ON CONFLICT (appid) DO UPDATE SET
+                huella = COALESCE(excluded.huella, estado_dim_juego.huella),
+                revisado_en = excluded.revisado_en,
+                fallos = CASE WHEN excluded.fallos = 0 THEN 0 ELSE estado_dim_juego.fallos + 1 END
+        """), estados)
+    return len(cambios)
+
+
+def sincronizar_catalogo(engine, appids=(), session=requests, hilos=4, forzar=False,
+                         limite=LIMITE_POR_CORRIDA):
+    """Cobertura + consulta de pendientes + upsert. Devuelve (consultados, con cambios)."""
+    asegurar_tablas(engine, 'estado_dim_juego', 'dim_juego_historial')
+    asegurar_cobertura(engine, appids)
+    por_consultar = pendientes(engine, appids, forzar, limite)
+    if not por_consultar:
+        print("   └─ ✅ [catalogo] dim_juego al día")
+        return 0, 0
+
+    ritmo = Ritmo(PETICIONES_POR_MINUTO)
+
+    def consultar(appid):
+        try:
+            return atributos_steam(appid, session, ritmo)
+        except Exception as e:
+            print(f"   │  └─ ⚠️  [{appid}] appdetails falló: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        consultados = dict(zip(por_consultar, pool.map(consultar, por_consultar)))
+    cambios = aplicar_cambios(engine, consultados, datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None))
+    sin_dato = sum(a is None for a in consultados.values())
+    print(f"   └─ 🏷️  [catalogo] {len(consultados)} juegos revisados: {cambios} con cambios, "
+          f"{sin_dato} sin datos en la tienda")
+    return len(consultados), cambios
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincroniza dim_juego con la tienda de Steam")
+    parser.add_argument('--appids', help="Lista separada por comas (además de los huérfanos de los hechos)")
+    parser.add_argument('--forzar', action='store_true', help="Revisa los appids pedidos aunque estén vigentes")
+    parser.add_argument('--limite', type=int, default=LIMITE_POR_CORRIDA, help="Juegos a consultar por corrida")
+    parser.add_argument('--hilos', type=int, default=4)
+    args = parser.parse_args()
+
+    engine = crear_engine()
+    if engine is None:
+        print("❌ ERROR: No se encontró DB_URI.")
+    else:
+        appids = [int(a) for a in args.appids.split(',')] if args.appids else steam_etl.juegos_ids
+        sincronizar_catalogo(engine, appids, hilos=args.hilos, forzar=args.forzar, limite=args.limite)
@@ -0,0 +1,212 @@
+# =============================================================================
+# STEAM-BI | Conexiones compartidas (PostgreSQL + HTTP Steam)
+# Descripción: Un solo engine SQLAlchemy y una sola sesión HTTP por proceso,
+#              reutilizados por steam_etl.py, scraper_steam_diario.py y
+#              pipeline_steam.py. api_steam.py usa la variante asíncrona.
+#              DB_SSLMODE (por defecto 'require') permite apuntar a un
+#              Postgres local sin TLS.
+#              Backends embebidos (corridas locales, benchmarks, CI):
+#                DB_URI=sqlite:///steam_local.db
+#                DB_URI=duckdb:///steam_local.duckdb   (requiere duckdb-engine)
+#              El esquema estrella se crea solo (esquema.asegurar_estrella).
+#              DB_URI_BACKUP: réplica que alimenta replica.py; el dashboard le
+#              manda sus lecturas vía EnrutadorLecturas (con failover).
+# =============================================================================
+
+import datetime
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import create_engine, event, make_url, text
+from sqlalchemy.exc import DBAPIError
+
+HEADERS_STEAM = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
+
+
+def normalizar_uri(uri):
+    """Supabase entrega 'postgres://', SQLAlchemy necesita el driver explícito."""
+    if uri.startswith("postgres://"):
+        return uri.replace("postgres://", "postgresql+psycopg2://", 1)
+    return uri
+
+
+def es_embebida(uri):
+    """True para bases en un archivo local (SQLite / DuckDB)."""
+    return uri.startswith(("sqlite:", "duckdb:"))
+
+
+def _crear_engine_embebido(uri):
+    if uri.startswith("duckdb:"):
+        try:
+            import duckdb_engine  # noqa: F401  (registra el dialecto)
+        except ImportError:
+            raise RuntimeError("DB_URI apunta a DuckDB: instala duckdb y duckdb-engine")
+        return create_engine(uri)
+
+    # Las etapas del pipeline comparten el engine entre hilos
+    engine = create_engine(uri, connect_args={"check_same_thread": False, "timeout": 30})
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(conexion_dbapi, _):
+        cursor = conexion_dbapi.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    return engine
+
+
+def crear_engine(uri=None):
+    """
+    Crea el engine de la capa transaccional a partir de DB_URI.
+    Devuelve None si no hay URI configurada (modo CSV local).
+    """
+    uri = uri or os.getenv('DB_URI')
+    if not uri:
+        return None
+    if es_embebida(uri):
+        return _crear_engine_embebido(uri)
+    return create_engine(
+        normalizar_uri(uri),
+        connect_args={
+            "sslmode": os.getenv('DB_SSLMODE', 'require'),
+            "connect_timeout": 10,
+            "options": "-c client_encoding=utf8"
+        },
+        pool_pre_ping=True,
+        pool_recycle=3600
+    )
+
+
+def crear_engine_backup():
+    """Engine de la réplica (DB_URI_BACKUP) o None si no está configurada."""
+    uri = os.getenv('DB_URI_BACKUP')
+    return crear_engine(uri) if uri else None
+
+
+class EnrutadorLecturas:
+    """
+    Elige el engine para lecturas pesadas:
+    - la réplica si responde y no está más de max_retraso_dias atrás,
+    - el primario si la réplica cae o se atrasa,
+    - la réplica aunque esté atrasada si el primario cae (failover).
+    La salud se revisa como máximo cada 'intervalo' segundos.
+    """
+
+    def __init__(self, primario, replica=None, intervalo=30, max_retraso_dias=1):
+        self.primario = primario
+        self.replica = replica
+        self.intervalo = intervalo
+        self.max_retraso_dias = max_retraso_dias
+        self._actual = replica or primario
+        self._revisado = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ultimo_dia(engine):
+        """MAX(id_tiempo) de dim_tiempo, o None si el engine no responde."""
+        try:
+            with engine.connect() as conn:
+                return conn.execute(text("SELECT MAX(id_tiempo) FROM dim_tiempo")).scalar() or ''
+        except Exception:
+            return None
+
+    def _revisar(self):
+        dia_primario = self._ultimo_dia(self.primario)
+        dia_replica = self._ultimo_dia(self.replica) if self.replica is not None else None
+
+        if dia_replica is not None and dia_primario is None:
+            elegido = self.replica
+        elif dia_replica is not None and dia_replica and dia_primario:
+            # str(): SQLite devuelve DATE como texto, Postgres como date
+            retraso = (datetime.date.fromisoformat(str(dia_primario)[:10])
+                       - datetime.date.fromisoformat(str(dia_replica)[:10])).days
+            elegido = self.replica if retraso <= self.max_retraso_dias else self.primario
+        else:
+            elegido = self.primario
+
+        if elegido is not self._actual:
+            nombre = "réplica" if elegido is self.replica else "primario"
+            print(f"🔀 [lecturas] Cambiando a {nombre} (primario: {dia_primario}, réplica: {dia_replica})")
+        self._actual = elegido
+
+    def engine(self):
+        if time.monotonic() - self._revisado >= self.intervalo:
+            with self._lock:
+                if time.monotonic() - self._revisado >= self.intervalo:
+                    self._revisar()
+                    self._revisado = time.monotonic()
+        return self._actual
+
+    def leer(self, funcion):
+        """funcion(engine); si el engine elegido falla se reintenta en el otro."""
+        engine = self.engine()
+        try:
+            return funcion(engine)
+        except DBAPIError:
+            otro = self.primario if engine is self.replica else self.replica
+            self._revisado = 0.0    # revisar salud en la próxima lectura
+            if otro is None:
+                raise
+            return funcion(otro)
+
+
+def crear_engine_async(uri=None, pool=10):
+    """
+    Engine asíncrono (asyncpg) con pool propio para servicios ASGI.
+    Devuelve None si no hay URI configurada.
+    """
+    uri = uri or os.getenv('DB_URI')
+    if not uri:
+        return None
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    # asyncpg no entiende sslmode en la URI: va en connect_args como 'ssl'
+    url = make_url(normalizar_uri(uri)).set(drivername="postgresql+asyncpg")
+    url = url.difference_update_query(["sslmode"])
+    return create_async_engine(
+        url,
+        connect_args={
+            "ssl": os.getenv('DB_SSLMODE', 'require'),
+            "server_settings": {"client_encoding": "utf8"}
+        },
+        pool_size=pool,
+        max_overflow=pool,
+        pool_pre_ping=True,
+        pool_recycle=3600
+    )
+
+
+class SesionSteam(requests.Session):
+    """
+    Sesión HTTP con keep-alive y caché de respuestas por URL.
+    Si dos etapas piden la misma URL, solo la primera llega a Steam;
+    las peticiones concurrentes a la misma URL esperan a la primera.
+    """
+
+    def __init__(self, hilos=10):
+        super().__init__()
+        self.headers.update(HEADERS_STEAM)
+        adaptador = HTTPAdapter(pool_connections=hilos, pool_maxsize=hilos)
+        self.mount("https://", adaptador)
+        self.mount("http://", adaptador)
+        self._cache = {}
+        self._candados = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, cachear=True, **kwargs):
+        if not cachear or kwargs.get('params'):
+            return super().get(url, **kwargs)
+
+        with self._lock:
+            candado = self._candados.setdefault(url, threading.Lock())
+        with candado:
+            respuesta = self._cache.get(url)
+            if respuesta is None:
+                respuesta = super().get(url, **kwargs)
+                if respuesta.ok:
+                    self._cache[url] = respuesta
+            return respuesta
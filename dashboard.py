@@ -1,20 +1,31 @@
-import re  
-import requests
+import base64
+import json
+import os
+import time
+
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import matplotlib.pyplot as plt
 import streamlit as st
-from bs4 import BeautifulSoup
-from sqlalchemy import create_engine
-from wordcloud import WordCloud, STOPWORDS
-from textblob import TextBlob  
-from sklearn.ensemble import RandomForestRegressor
-import os
-import tempfile
-from datetime import datetime
+from sqlalchemy import create_engine, text
+
+import graficos
+import perfilado
+import simulador
+from capa_datos import (
+    QUERY_SERIE_NLP, QUERY_VENTAS, agregar_filtro, compactar_nlp, compactar_ventas,
+    construir_snapshot, consulta_desde, fecha_corte, indices_filtro,
+    indices_ultimo_por_juego, memoria_mb, normalizar_por_maximo, query_ultimo_nlp
+)
+from conexion import EnrutadorLecturas, crear_engine, es_embebida
+
+# Copy-on-Write: los DataFrames compartidos entre sesiones nunca se copian
+# por adelantado ni se modifican por accidente desde una vista.
+# En pandas >= 3 ya es el único modo y la opción está deprecada.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 try:
     from fpdf import FPDF
@@ -33,6 +44,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Tiempos por rerun (perfilado.py); el panel solo aparece con ?perfil=1
+PERFIL_VISIBLE = st.query_params.get("perfil") == "1" or os.getenv("DASHBOARD_PERFIL") == "1"
+perfilado.iniciar_rerun(sesion=st.session_state.setdefault("_perfil_sesion", os.urandom(4).hex()))
+
 # ═══════════════════════════════════════════════════════════════════════════
 # DISEÑO VISUAL: NEO-BRUTALIST CON GRADIENTES PREMIUM
 # ═══════════════════════════════════════════════════════════════════════════
@@ -331,7 +346,10 @@ def format_count(num):
         return f"{num / 1e3:.2f}K"
     return f"{num:,.0f}"
 
-def generar_pdf(df_filtered, ventas, descargas, ratio, juegos_count):
+@perfilado.cronometrar
+def generar_pdf(agregados):
+    kpis = agregados['kpis']
+    ventas, descargas, ratio = kpis['ventas'], kpis['descargas'], kpis['ratio']
     pdf = FPDF()
     pdf.add_page()
     
@@ -384,7 +402,7 @@ def generar_pdf(df_filtered, ventas, descargas, ratio, juegos_count):
     draw_kpi_card(110, y_kpi, "Descargas Est.", format_count(descargas), 118, 75, 162)
     
     draw_kpi_card(10, y_kpi + 26, "Indice de Satisfaccion", f"{ratio*100:.1f}%", 52, 211, 153)
-    draw_kpi_card(110, y_kpi + 26, "Juegos Analizados", str(juegos_count), 248, 113, 113)
+    draw_kpi_card(110, y_kpi + 26, "Juegos Analizados", str(kpis['registros']), 248, 113, 113)
     
     pdf.set_y(y_kpi + 55)
     
@@ -432,13 +450,9 @@ def generar_pdf(df_filtered, ventas, descargas, ratio, juegos_count):
     pdf.cell(0, 10, txt="3. Anexo: Rendimiento Financiero por Titulo", ln=True)
     pdf.ln(2)
     
-    if not df_filtered.empty:
-        # Agrupar por juego (para sumar ventas históricas y no repetir juegos)
-        df_agrupado = df_filtered.groupby('nombre').agg({
-            'monto_ventas_usd': 'sum',
-            'cantidad_descargas': 'sum',
-            'ratio_positividad': 'mean'
-        }).reset_index().sort_values('monto_ventas_usd', ascending=False)
+    if kpis['registros']:
+        # Un renglón por juego (ventas históricas sumadas), ya agregado
+        df_agrupado = agregados['por_juego']
         
         # Cabecera de la tabla
         pdf.set_fill_color(102, 126, 234) # Azul
@@ -501,69 +515,154 @@ def generar_pdf(df_filtered, ventas, descargas, ratio, juegos_count):
 # CONEXIÓN A BASE DE DATOS MODIFICADA
 # ═══════════════════════════════════════════════════════════════════════════
 
-@st.cache_resource(show_spinner=False)
-def get_engine():
-    db_url = st.secrets["DB_URI"]
+def _leer_secreto(nombre):
+    try:
+        return st.secrets[nombre]
+    except Exception:
+        # Corridas locales sin secrets.toml: variable de entorno
+        return os.getenv(nombre, "")
+
+def _crear_engine_dashboard(db_url):
+    if es_embebida(db_url):
+        return crear_engine(db_url)
     if db_url.startswith("postgres://"):
         db_url = db_url.replace("postgres://", "postgresql+psycopg2://", 1)
     return create_engine(
         db_url,
         connect_args={
-            "sslmode": "require",
+            "sslmode": os.getenv("DB_SSLMODE", "require"),
             "prepare_threshold": None,
+            "connect_timeout": 10,
             "options": "-c client_encoding=utf8"
         },
         pool_pre_ping=True,
         pool_recycle=3600
     )
 
-@st.cache_data(ttl=600, show_spinner=False)
+@perfilado.cacheada(st.cache_resource(show_spinner=False))
+def get_enrutador():
+    """
+    Lecturas del dashboard: réplica (DB_URI_BACKUP) si está sana y al día,
+    primario (DB_URI) si no; si el primario cae, la réplica lo sustituye.
+    """
+    primario = _crear_engine_dashboard(_leer_secreto("DB_URI"))
+    uri_backup = _leer_secreto("DB_URI_BACKUP")
+    replica = _crear_engine_dashboard(uri_backup) if uri_backup else None
+    return EnrutadorLecturas(primario, replica)
+
+@perfilado.cacheada(st.cache_resource(ttl=600, show_spinner=False))
 def load_data():
-    engine = get_engine()
-    
-    # 1. Datos Generales de Ventas
-    query_ventas = """
-        SELECT 
-            h.*, 
-            d.nombre, 
-            d.subgenero, 
-            d.desarrollador,
-            t.id_tiempo as fecha
-        FROM hechos_resenas_steam h 
-        JOIN dim_juego d ON h.fk_juego = d.appid
-        LEFT JOIN dim_tiempo t ON h.fk_tiempo = t.id_tiempo
     """
-    df = pd.read_sql(query_ventas, engine)
-    
-    if not df.empty:
-        df['ratio_positividad'] = df['votos_positivos'] / (df['votos_positivos'] + df['votos_negativos'])
-        df['ratio_positividad'] = df['ratio_positividad'].fillna(0)
-        df['monto_ventas_usd'] = df['monto_ventas_usd'].fillna(0)
-        df['cantidad_descargas'] = df['cantidad_descargas'].fillna(0)
-        df['conteo_resenas'] = df['conteo_resenas'].fillna(0)
-
-    # 2. Datos NLP de Sentimiento
-    query_nlp = """
-        SELECT 
-            s.*, 
-            d.nombre 
-        FROM hechos_sentimiento s
-        JOIN dim_juego d ON s.fk_juego = d.appid
-        ORDER BY s.fk_tiempo ASC
+    Una sola copia por proceso, compartida por todas las sesiones.
+    El DataFrame devuelto es de solo lectura: filtrar con indices_filtro
+    y nunca asignar columnas sobre él. Devuelve (df, version): version es
+    el instante de la lectura (ns) y cambia en cada recarga; los cachés
+    derivados de df se indexan con ella.
+    """
+    df = compactar_ventas(get_enrutador().leer(lambda engine: pd.read_sql(QUERY_VENTAS, engine)))
+    return df, time.time_ns()
+
+@perfilado.cacheada(st.cache_resource(show_spinner=False, max_entries=1))
+def load_snapshot(_df, version):
+    """
+    Último registro por juego indexado por nombre. 'version' es la de
+    load_data: se reconstruye solo cuando este se recarga.
+    """
+    return construir_snapshot(_df)
+
+@perfilado.cacheada(st.cache_resource(show_spinner=False, max_entries=32))
+def load_agregados(_df, version, subgeneros, rango_ventas):
+    """
+    Posiciones filtradas + agregados de un estado de filtros del sidebar
+    (subgeneros como tupla ordenada). KPIs, gráficos y PDF leen de aquí.
     """
+    posiciones = indices_filtro(_df, subgeneros, rango_ventas)
+    return posiciones, agregar_filtro(_df, posiciones)
+
+@perfilado.cacheada(st.cache_resource(show_spinner=False, max_entries=2))
+def load_simulador(_df, version, motor):
+    """Modelo del simulador entrenado una vez por versión de load_data y motor."""
+    return simulador.entrenar_simulador(_df, motor)
+
+@perfilado.cacheada(st.cache_data(ttl=600, show_spinner=False))
+def load_ultimo_nlp():
+    """Último registro NLP de cada juego (lista de juegos + tarjeta del día)."""
     try:
-        df_nlp = pd.read_sql(query_nlp, engine)
-    except Exception as e:
-        df_nlp = pd.DataFrame() 
-    
-    return df, df_nlp
+        return compactar_nlp(get_enrutador().leer(
+            lambda engine: pd.read_sql(query_ultimo_nlp(engine), engine)))
+    except Exception:
+        return pd.DataFrame()
+
+@perfilado.cacheada(st.cache_data(ttl=600, show_spinner=False, max_entries=64))
+def load_serie_nlp(fk_juego):
+    """Serie diaria de un juego; se pide solo al seleccionarlo (cacheada por juego)."""
+    try:
+        return compactar_nlp(get_enrutador().leer(
+            lambda engine: pd.read_sql(text(QUERY_SERIE_NLP), engine, params={"fk_juego": int(fk_juego)})))
+    except Exception:
+        return pd.DataFrame()
+
+@perfilado.cacheada(st.cache_data(ttl=600, show_spinner=False))
+def load_pronosticos(fk_juego):
+    """Último pronóstico precalculado por el pipeline (pronosticos.py) para un juego."""
+    query = text("""
+        SELECT metrica, fecha_pronostico, valor, limite_inferior, limite_superior
+        FROM pronosticos_juego
+        WHERE fk_juego = :j
+          AND fecha_base = (SELECT MAX(fecha_base) FROM pronosticos_juego WHERE fk_juego = :j)
+        ORDER BY metrica, fecha_pronostico
+    """)
+    try:
+        return get_enrutador().leer(lambda engine: pd.read_sql(query, engine, params={"j": int(fk_juego)}))
+    except Exception:
+        return pd.DataFrame()
+
+@perfilado.cacheada(st.cache_data(ttl=600, show_spinner=False, max_entries=64))
+def load_nube(fk_juego, ventana_dias):
+    """
+    Nube pre-renderizada por el pipeline (nubes.py): (png bytes o None,
+    {termino: frecuencia}, fecha_base). Aquí nunca se ejecuta WordCloud.
+    """
+    try:
+        df_nube = get_enrutador().leer(lambda engine: pd.read_sql(
+            text("SELECT imagen_png, terminos, fecha_base FROM nubes_palabras "
+                 "WHERE fk_juego = :j AND ventana_dias = :v"),
+            engine, params={"j": int(fk_juego), "v": int(ventana_dias)}
+        ))
+    except Exception:
+        return None, {}, None
+    if df_nube.empty:
+        return None, {}, None
+    fila = df_nube.iloc[0]
+    png = base64.b64decode(fila['imagen_png']) if fila['imagen_png'] else None
+    return png, json.loads(fila['terminos']), fila['fecha_base']
+
+@perfilado.cacheada(st.cache_data(ttl=600, show_spinner=False))
+def load_alertas(dias=30):
+    """Alertas de anomalías de todos los juegos (generadas por anomalias.py)."""
+    query = consulta_desde("""
+        SELECT a.fk_tiempo AS fecha, d.nombre, a.tipo, a.severidad, a.valor, a.esperado, a.puntaje_z
+        FROM alertas_anomalias a
+        JOIN dim_juego d ON a.fk_juego = d.appid
+        WHERE a.fk_tiempo >= :corte
+        ORDER BY a.fk_tiempo DESC, ABS(a.puntaje_z) DESC
+    """)
+    def leer(engine):
+        corte = fecha_corte(engine, 'alertas_anomalias', int(dias))
+        if corte is None:
+            return pd.DataFrame()
+        return pd.read_sql(query, engine, params={"corte": corte})
+    try:
+        return get_enrutador().leer(leer)
+    except Exception:
+        return pd.DataFrame()
 
 # ═══════════════════════════════════════════════════════════════════════════
 # CARGA DE DATOS
 # ═══════════════════════════════════════════════════════════════════════════
 
-with st.spinner('⚡ Cargando datos del data warehouse...'):
-    df, df_nlp = load_data()
+with st.spinner('⚡ Cargando datos del data warehouse...'), perfilado.medir('carga_datos'):
+    df, version_datos = load_data()
 
 if df.empty:
     st.error("⚠️ No se pudieron cargar los datos. Verifica la conexión a la base de datos.")
@@ -573,7 +672,7 @@ if df.empty:
 # SIDEBAR
 # ═══════════════════════════════════════════════════════════════════════════
 
-with st.sidebar:
+with st.sidebar, perfilado.medir('sidebar'):
     col_logo, col_title = st.columns([1, 3])
     with col_logo:
         st.image("https://upload.wikimedia.org/wikipedia/commons/8/83/Steam_icon_logo.svg", width=50)
@@ -607,6 +706,7 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("#### 📊 Estado del Sistema")
     st.success(f"✅ **{len(df):,}** juegos en DWH")
+    st.caption(f"🧠 Memoria compartida: {memoria_mb(df):.1f} MB")
     st.info(f"🔄 Última actualización: Hace {np.random.randint(5, 30)} min")
     
     st.markdown("---")
@@ -623,15 +723,12 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("#### 📄 Reportes para Gerencia")
     
-    df_filtered = df[(df['subgenero'].isin(selected_subgenres)) & (df['monto_ventas_usd'].between(sales_range[0], sales_range[1]))].copy()
+    posiciones, agregados = load_agregados(df, version_datos, tuple(sorted(selected_subgenres)), tuple(sales_range))
+    df_filtered = df.take(posiciones)
+    kpis = agregados['kpis']
 
     if PDF_ENABLED and not df_filtered.empty:
-        v_tot = df_filtered['monto_ventas_usd'].sum()
-        d_tot = df_filtered['cantidad_descargas'].sum()
-        r_prom = df_filtered['ratio_positividad'].mean()
-        j_tot = len(df_filtered)
-        
-        pdf_bytes = generar_pdf(df_filtered, v_tot, d_tot, r_prom, j_tot)
+        pdf_bytes = generar_pdf(agregados)
         st.download_button(
             label="📥 Descargar Reporte Ejecutivo (PDF)",
             data=pdf_bytes,
@@ -654,20 +751,16 @@ st.markdown("---")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_sales = df_filtered['monto_ventas_usd'].sum()
-    st.metric("💵 Ventas Totales", format_number(total_sales))
+    st.metric("💵 Ventas Totales", format_number(kpis['ventas']))
 
 with col2:
-    total_downloads = df_filtered['cantidad_descargas'].sum()
-    st.metric("📥 Descargas Totales", format_count(total_downloads))
+    st.metric("📥 Descargas Totales", format_count(kpis['descargas']))
 
 with col3:
-    avg_positivity = df_filtered['ratio_positividad'].mean()
-    st.metric("⭐ Índice de Satisfacción", f"{avg_positivity:.1%}")
+    st.metric("⭐ Índice de Satisfacción", f"{kpis['ratio']:.1%}")
 
 with col4:
-    game_count = len(df_filtered)
-    st.metric("🎯 Juegos Analizados", f"{game_count:,}")
+    st.metric("🎯 Juegos Analizados", f"{kpis['registros']:,}")
 
 st.markdown("---")
 
@@ -682,16 +775,20 @@ tab1, tab2, tab3, tab4 = st.tabs([
 # TAB 1: ANÁLISIS DE MERCADO
 # ═══════════════════════════════════════════════════════════════════════════
 
-with tab1:
+with tab1, perfilado.medir('tab_mercado'):
     st.markdown("## 📊 Inteligencia de Mercado: Volumen vs. Rentabilidad")
     
     if df_filtered.empty:
         st.warning("⚠️ No hay datos disponibles con los filtros actuales.")
         st.info("💡 Ajusta los filtros en la barra lateral para ver el análisis de mercado.")
     else:
-        if len(df_filtered) > 2:
+        # Por defecto un punto por juego (su último día); el historial diario
+        # completo crece con cada corrida y se dibuja con WebGL.
+        historial_completo = st.toggle("Mostrar historial diario completo", value=False, key="scatter_historial")
+        df_scatter = df_filtered if historial_completo else df_filtered.take(indices_ultimo_por_juego(df_filtered))
+        if len(df_scatter) > 2:
             fig_scatter = px.scatter(
-                df_filtered,
+                df_scatter,
                 x='conteo_resenas',
                 y='monto_ventas_usd',
                 size='cantidad_descargas',
@@ -701,7 +798,8 @@ with tab1:
                 trendline="ols",
                 labels={'conteo_resenas': 'Popularidad (Reseñas)', 'monto_ventas_usd': 'Ingresos (USD)', 'cantidad_descargas': 'Descargas', 'subgenero': 'Categoría'},
                 template="plotly_dark",
-                height=550
+                height=550,
+                render_mode=graficos.render_mode(len(df_scatter))
             )
             fig_scatter.update_layout(
                 font=dict(family="DM Sans", size=12), paper_bgcolor='rgba(15, 20, 40, 0.6)', plot_bgcolor='rgba(0, 0, 0, 0.2)',
@@ -719,8 +817,7 @@ with tab1:
         col_left, col_right = st.columns(2)
         with col_left:
             st.markdown("### 🥧 Distribución por Categoría")
-            market_share = df_filtered.groupby('subgenero')['monto_ventas_usd'].sum().reset_index()
-            market_share = market_share.sort_values('monto_ventas_usd', ascending=False).head(10)
+            market_share = agregados['por_subgenero'].head(10)
             fig_pie = px.pie(market_share, values='monto_ventas_usd', names='subgenero', hole=0.4, template="plotly_dark", color_discrete_sequence=px.colors.sequential.Purples_r)
             fig_pie.update_layout(font=dict(family="DM Sans", size=12), paper_bgcolor='rgba(15, 20, 40, 0.6)', legend=dict(bgcolor='rgba(15, 20, 40, 0.8)', bordercolor='rgba(102, 126, 234, 0.3)', borderwidth=1), margin=dict(t=20, b=20, l=20, r=20))
             fig_pie.update_traces(textposition='inside', textinfo='percent+label', hovertemplate="<b>%{label}</b><br>Ventas: $%{value:,.0f}<br>Porcentaje: %{percent}<extra></extra>")
@@ -729,8 +826,8 @@ with tab1:
         with col_right:
             st.markdown("### 🏆 Top 10 Juegos Rentables")
             if len(df_filtered) > 0:
-                top_games = df_filtered.nlargest(min(10, len(df_filtered)), 'monto_ventas_usd').sort_values('monto_ventas_usd', ascending=True)
-                fig_bar = px.bar(top_games, x='monto_ventas_usd', y='nombre', orientation='h', color='monto_ventas_usd', color_continuous_scale='Purples', hover_data={'monto_ventas_usd': ':$,.2f', 'conteo_resenas': ':,', 'ratio_positividad': ':.1%'}, labels={'monto_ventas_usd': 'Ventas (USD)', 'nombre': 'Juego'}, template="plotly_dark")
+                top_games = agregados['por_juego'].head(10).iloc[::-1]
+                fig_bar = px.bar(top_games, x='monto_ventas_usd', y='nombre', orientation='h', color='monto_ventas_usd', color_continuous_scale='Purples', hover_data={'monto_ventas_usd': ':$,.2f', 'cantidad_descargas': ':,', 'ratio_positividad': ':.1%'}, labels={'monto_ventas_usd': 'Ventas (USD)', 'nombre': 'Juego'}, template="plotly_dark")
                 fig_bar.update_layout(font=dict(family="DM Sans", size=11), paper_bgcolor='rgba(15, 20, 40, 0.6)', plot_bgcolor='rgba(0, 0, 0, 0.2)', xaxis=dict(showgrid=True, gridcolor='rgba(102, 126, 234, 0.1)', tickformat="$,.0s"), yaxis=dict(tickfont=dict(size=10)), showlegend=False, margin=dict(t=20, b=40, l=10, r=20))
                 st.plotly_chart(fig_bar, use_container_width=True)
             else:
@@ -739,18 +836,16 @@ with tab1:
         st.markdown("---")
         st.markdown("### 📈 Rendimiento por Desarrollador")
         if 'desarrollador' in df_filtered.columns:
-            dev_stats = df_filtered.groupby('desarrollador').agg({'monto_ventas_usd': 'sum', 'cantidad_descargas': 'sum', 'nombre': 'count'}).reset_index()
+            dev_stats = agregados['por_desarrollador'].head(15)
             dev_stats.columns = ['Desarrollador', 'Ventas Totales', 'Descargas', 'Cantidad de Juegos']
-            dev_stats = dev_stats.sort_values('Ventas Totales', ascending=False).head(15)
             fig_dev = px.bar(dev_stats, x='Desarrollador', y='Ventas Totales', color='Cantidad de Juegos', hover_data=['Descargas'], labels={'Ventas Totales': 'Ventas (USD)'}, template="plotly_dark", color_continuous_scale='Viridis')
             fig_dev.update_layout(font=dict(family="DM Sans", size=12), paper_bgcolor='rgba(15, 20, 40, 0.6)', plot_bgcolor='rgba(0, 0, 0, 0.2)', xaxis=dict(showgrid=False, tickangle=-45), yaxis=dict(showgrid=True, gridcolor='rgba(102, 126, 234, 0.1)', tickformat="$,.0s"), margin=dict(t=40, b=100, l=40, r=40), height=400)
             st.plotly_chart(fig_dev, use_container_width=True)
 
         st.markdown("---")
         st.markdown("### 📈 Tendencia de Ventas en el Tiempo")
-        if 'fecha' in df_filtered.columns and not df_filtered['fecha'].isnull().all():
-            df_time = df_filtered.groupby('fecha')['monto_ventas_usd'].sum().reset_index()
-            df_time = df_time.sort_values('fecha')
+        if not agregados['por_fecha'].empty:
+            df_time = graficos.reducir_serie(agregados['por_fecha'], ['monto_ventas_usd'])
             fig_time = px.line(df_time, x='fecha', y='monto_ventas_usd', template="plotly_dark", labels={'fecha': 'Fecha', 'monto_ventas_usd': 'Ventas Diarias (USD)'})
             fig_time.update_traces(line_color='#a5b4fc', line_width=3)
             fig_time.update_layout(paper_bgcolor='rgba(15, 20, 40, 0.6)', plot_bgcolor='rgba(0, 0, 0, 0.2)', xaxis=dict(showgrid=True, gridcolor='rgba(102, 126, 234, 0.1)'), yaxis=dict(showgrid=True, gridcolor='rgba(102, 126, 234, 0.1)', tickformat="$,.0s"), height=350, margin=dict(t=30, b=30, l=30, r=30))
@@ -762,67 +857,74 @@ with tab1:
         st.markdown("---")
         st.markdown("### ⚔️ Benchmarking Directo: Frente a Frente")
 
-        juegos_disponibles = df_filtered['nombre'].dropna().unique()
+        # Lookup por índice sobre el snapshot (último día de cada juego)
+        snapshot = load_snapshot(df, version_datos)
+        en_filtro = set(agregados['por_juego']['nombre'].astype(str))
+        juegos_disponibles = [j for j in snapshot.index if j in en_filtro]
         if len(juegos_disponibles) >= 2:
-            col_sel1, col_sel2 = st.columns(2)
-            with col_sel1: 
-                juego1 = st.selectbox("🥊 Juego A (Retador)", juegos_disponibles, index=0)
-            with col_sel2: 
-                juego2 = st.selectbox("🛡️ Juego B (Oponente)", juegos_disponibles, index=1 if len(juegos_disponibles)>1 else 0)
-
-            data_j1 = df_filtered[df_filtered['nombre'] == juego1].iloc[0]
-            data_j2 = df_filtered[df_filtered['nombre'] == juego2].iloc[0]
-
-            col_radar, col_barras = st.columns(2)
-
-            with col_radar:
-                st.markdown("#### 🕸️ Perfil de Rendimiento")
-                metricas = ['ratio_positividad', 'cantidad_descargas', 'monto_ventas_usd', 'conteo_resenas']
-                nombres_metricas = ['Satisfacción', 'Descargas', 'Ventas ($)', 'Popularidad']
-
-                vals_j1, vals_j2 = [], []
-                for m in metricas:
-                    val1 = float(data_j1[m]) if pd.notna(data_j1[m]) else 0.0
-                    val2 = float(data_j2[m]) if pd.notna(data_j2[m]) else 0.0
-                    max_val = max(val1, val2)
-                    max_val = max_val if max_val > 0 else 1.0 
-                    vals_j1.append((val1 / max_val) * 100)
-                    vals_j2.append((val2 / max_val) * 100)
-
-                fig_radar = go.Figure()
-                fig_radar.add_trace(go.Scatterpolar(r=vals_j1, theta=nombres_metricas, fill='toself', name=juego1, line_color='#667eea'))
-                fig_radar.add_trace(go.Scatterpolar(r=vals_j2, theta=nombres_metricas, fill='toself', name=juego2, line_color='#f093fb'))
-                fig_radar.update_layout(
-                    template="plotly_dark", paper_bgcolor='rgba(15, 20, 40, 0.6)',
-                    polar=dict(radialaxis=dict(visible=False, range=[0, 100]), bgcolor='rgba(0,0,0,0.2)'),
-                    margin=dict(t=20, b=20, l=30, r=30), legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
-                )
-                st.plotly_chart(fig_radar, use_container_width=True)
-
-            with col_barras:
-                st.markdown("#### 📊 Comparativa de Volumen Neto")
-                comp_df = pd.DataFrame({
-                    'Juego': [juego1, juego2, juego1, juego2],
-                    'Métrica': ['Descargas', 'Descargas', 'Reseñas', 'Reseñas'],
-                    'Valor': [data_j1['cantidad_descargas'], data_j2['cantidad_descargas'], data_j1['conteo_resenas'], data_j2['conteo_resenas']]
-                })
-                fig_barras = px.bar(
-                    comp_df, x='Métrica', y='Valor', color='Juego', barmode='group',
-                    text_auto='.2s', color_discrete_sequence=['#667eea', '#f093fb'], template="plotly_dark"
-                )
-                fig_barras.update_layout(
-                    paper_bgcolor='rgba(15, 20, 40, 0.6)', plot_bgcolor='rgba(0,0,0,0.2)',
-                    margin=dict(t=20, b=20, l=10, r=10), legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
-                )
-                st.plotly_chart(fig_barras, use_container_width=True)
-                
-                st.markdown(f"""
-                <div style="background: rgba(255,255,255,0.05); padding: 10px; border-radius: 8px; border-left: 4px solid #34d399; margin-top: 10px;">
-                    <p style="margin:0; font-size: 0.9rem;"><strong>🏆 Resumen Financiero:</strong></p>
-                    <p style="margin:0; font-size: 0.85rem; color: #c7d2fe;">{juego1}: <strong>${data_j1['monto_ventas_usd']:,.0f}</strong> ({data_j1['ratio_positividad']:.0%} Positivo)</p>
-                    <p style="margin:0; font-size: 0.85rem; color: #f093fb;">{juego2}: <strong>${data_j2['monto_ventas_usd']:,.0f}</strong> ({data_j2['ratio_positividad']:.0%} Positivo)</p>
-                </div>
-                """, unsafe_allow_html=True)
+            seleccion = st.multiselect(
+                "🥊 Juegos a comparar", juegos_disponibles, default=juegos_disponibles[:2],
+                max_selections=20, key="benchmark_juegos"
+            )
+            if len(seleccion) < 2:
+                st.info("Selecciona al menos 2 juegos para comparar.")
+            else:
+                datos_sel = snapshot.loc[seleccion]
+                paleta = px.colors.qualitative.Pastel + px.colors.qualitative.Bold
+                colores = [paleta[i % len(paleta)] for i in range(len(seleccion))]
+
+                col_radar, col_barras = st.columns(2)
+
+                with col_radar:
+                    st.markdown("#### 🕸️ Perfil de Rendimiento")
+                    metricas = ['ratio_positividad', 'cantidad_descargas', 'monto_ventas_usd', 'conteo_resenas']
+                    nombres_metricas = ['Satisfacción', 'Descargas', 'Ventas ($)', 'Popularidad']
+
+                    # (juegos x métricas) normalizado contra el máximo de cada métrica
+                    valores = normalizar_por_maximo(datos_sel[metricas].to_numpy(dtype='float64'))
+
+                    fig_radar = go.Figure()
+                    for juego, fila, color in zip(seleccion, valores, colores):
+                        fig_radar.add_trace(go.Scatterpolar(r=fila, theta=nombres_metricas, fill='toself', name=juego, line_color=color))
+                    fig_radar.update_layout(
+                        template="plotly_dark", paper_bgcolor='rgba(15, 20, 40, 0.6)',
+                        polar=dict(radialaxis=dict(visible=False, range=[0, 100]), bgcolor='rgba(0,0,0,0.2)'),
+                        margin=dict(t=20, b=20, l=30, r=30), legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
+                    )
+                    st.plotly_chart(fig_radar, use_container_width=True)
+
+                with col_barras:
+                    st.markdown("#### 📊 Comparativa de Volumen Neto")
+                    comp_df = (
+                        datos_sel[['cantidad_descargas', 'conteo_resenas']]
+                        .rename(columns={'cantidad_descargas': 'Descargas', 'conteo_resenas': 'Reseñas'})
+                        .rename_axis('Juego').reset_index()
+                        .melt(id_vars='Juego', var_name='Métrica', value_name='Valor')
+                    )
+                    fig_barras = px.bar(
+                        comp_df, x='Métrica', y='Valor', color='Juego', barmode='group',
+                        text_auto='.2s', color_discrete_sequence=colores, template="plotly_dark"
+                    )
+                    fig_barras.update_layout(
+                        paper_bgcolor='rgba(15, 20, 40, 0.6)', plot_bgcolor='rgba(0,0,0,0.2)',
+                        margin=dict(t=20, b=20, l=10, r=10), legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
+                    )
+                    st.plotly_chart(fig_barras, use_container_width=True)
+
+                    lineas_resumen = "".join(
+                        f'<p style="margin:0; font-size: 0.85rem; color: {color};">{juego}: '
+                        f'<strong>${ventas:,.0f}</strong> ({ratio:.0%} Positivo)</p>'
+                        for juego, color, ventas, ratio in zip(
+                            seleccion, colores,
+                            datos_sel['monto_ventas_usd'].to_numpy(), datos_sel['ratio_positividad'].to_numpy()
+                        )
+                    )
+                    st.markdown(f"""
+                    <div style="background: rgba(255,255,255,0.05); padding: 10px; border-radius: 8px; border-left: 4px solid #34d399; margin-top: 10px;">
+                        <p style="margin:0; font-size: 0.9rem;"><strong>🏆 Resumen Financiero:</strong></p>
+                        {lineas_resumen}
+                    </div>
+                    """, unsafe_allow_html=True)
         else:
             st.info("⚠️ Necesitas al menos 2 juegos filtrados para usar la herramienta de Benchmarking.")
 
@@ -830,21 +932,18 @@ with tab1:
 # TAB 2: SIMULADOR DE ESCENARIOS (Riesgo y Segmentación)
 # ═══════════════════════════════════════════════════════════════════════════
 
-with tab2:
+with tab2, perfilado.medir('tab_simulador'):
     st.markdown("## 🎛️ Simulador de Riesgo y Estrategia Comercial (What-If)")
     st.markdown("Proyecta los ingresos de tu lanzamiento basándote en datos reales del mercado. La Inteligencia de Negocios evalúa el riesgo y te da **tres escenarios posibles**.")
     
-    if not df.empty and len(df) > 10:
+    if not df.empty and len(df) > simulador.MIN_REGISTROS:
+        motor = st.radio(
+            "🧮 Motor del modelo", simulador.MOTORES, index=simulador.MOTORES.index(simulador.MOTOR),
+            horizontal=True, key="simulador_motor",
+            format_func={'bosque': "Random Forest", 'cuantiles': "Gradient Boosting cuantil"}.get
+        )
         with st.spinner('🧠 Entrenando modelo analítico avanzado con datos de tu DWH...'):
-            df_ml = df.copy()
-            df_ml = pd.get_dummies(df_ml, columns=['subgenero'], drop_first=False)
-            columnas_genero = [col for col in df_ml.columns if col.startswith('subgenero_')]
-            X_cols = ['conteo_resenas', 'ratio_positividad'] + columnas_genero
-            
-            X = df_ml[X_cols].fillna(0)
-            y = df_ml['monto_ventas_usd'].fillna(0)
-            model = RandomForestRegressor(n_estimators=100, max_depth=12, random_state=42, n_jobs=-1)
-            model.fit(X, y)
+            model, X_cols = load_simulador(df, version_datos, motor)
             
         col_in, col_out = st.columns([1, 1.8])
         
@@ -865,19 +964,10 @@ with tab2:
         with col_out:
             st.markdown("### 2️⃣ Análisis de Riesgo Financiero")
             if btn_calcular:
-                input_data = pd.DataFrame(columns=X_cols)
-                input_data.loc[0] = 0 
-                input_data['conteo_resenas'] = input_reviews
-                input_data['ratio_positividad'] = input_positivity
-                
-                columna_activa = f'subgenero_{genero_elegido}'
-                if columna_activa in input_data.columns:
-                    input_data.loc[0, columna_activa] = 1
-                
-                predicciones_arboles = [arbol.predict(input_data.values)[0] for arbol in model.estimators_]
-                escenario_pesimista = np.percentile(predicciones_arboles, 15)  
-                escenario_realista = np.median(predicciones_arboles)           
-                escenario_optimista = np.percentile(predicciones_arboles, 85)  
+                escenarios = simulador.calcular_escenarios(model, X_cols, genero_elegido, input_reviews, input_positivity)
+                escenario_pesimista = escenarios['pesimista']
+                escenario_realista = escenarios['realista']
+                escenario_optimista = escenarios['optimista']
                 
                 html_tarjetas = f"""
                 <div style="display: flex; gap: 15px; margin-bottom: 20px;">
@@ -920,7 +1010,7 @@ with tab2:
 # TAB 3: EXPLORADOR DE DATOS
 # ═══════════════════════════════════════════════════════════════════════════
 
-with tab3:
+with tab3, perfilado.medir('tab_explorador'):
     st.markdown("## 🗄️ Explorador de Datos del Data Warehouse")
     st.markdown("Visualización y análisis detallado de todos los registros almacenados.")
     
@@ -947,17 +1037,18 @@ with tab3:
         with col_opt3:
             sort_order = st.radio("Orden:", options=["Descendente", "Ascendente"], horizontal=True)
         
-        display_df = df_filtered[selected_columns].copy()
+        display_df = df_filtered[selected_columns]
         ascending = (sort_order == "Ascendente")
         display_df = display_df.sort_values(by=sort_column, ascending=ascending)
         display_df = display_df.head(show_top_n)
         
-        if 'monto_ventas_usd' in display_df.columns:
-            display_df['monto_ventas_usd'] = display_df['monto_ventas_usd'].apply(lambda x: f"${x:,.2f}" if pd.notna(x) else "N/A")
-        if 'ratio_positividad' in display_df.columns:
-            display_df['ratio_positividad'] = display_df['ratio_positividad'].apply(lambda x: f"{x:.1%}" if pd.notna(x) else "N/A")
-        if 'cantidad_descargas' in display_df.columns:
-            display_df['cantidad_descargas'] = display_df['cantidad_descargas'].apply(lambda x: f"{x:,.0f}" if pd.notna(x) else "N/A")
+        with perfilado.medir('explorador_formato'):
+            if 'monto_ventas_usd' in display_df.columns:
+                display_df['monto_ventas_usd'] = display_df['monto_ventas_usd'].apply(lambda x: f"${x:,.2f}" if pd.notna(x) else "N/A")
+            if 'ratio_positividad' in display_df.columns:
+                display_df['ratio_positividad'] = display_df['ratio_positividad'].apply(lambda x: f"{x:.1%}" if pd.notna(x) else "N/A")
+            if 'cantidad_descargas' in display_df.columns:
+                display_df['cantidad_descargas'] = display_df['cantidad_descargas'].apply(lambda x: f"{x:,.0f}" if pd.notna(x) else "N/A")
         
         st.dataframe(display_df, use_container_width=True, height=500)
         
@@ -988,20 +1079,47 @@ with tab3:
 # ═══════════════════════════════════════════════════════════════════════════
 # TAB 4: INTELIGENCIA CUALITATIVA (NUEVA VERSIÓN VADER + DATA WAREHOUSE)
 # ═══════════════════════════════════════════════════════════════════════════
-with tab4:
+with tab4, perfilado.medir('tab_nlp'):
     st.markdown("## 🧠 Motor de Inteligencia Cualitativa (VADER NLP)")
     st.markdown("Lectura directa del Data Warehouse. Análisis histórico de sentimiento, palabras clave y correlación con jugadores activos.")
     
-    if not df_nlp.empty:
+    df_ultimo_nlp = load_ultimo_nlp()
+
+    if not df_ultimo_nlp.empty:
+        df_alertas = load_alertas()
+        etiquetas_alerta = {
+            'caida_sentimiento': "📉 Caída de sentimiento (posible review-bombing)",
+            'pico_sentimiento': "📈 Pico de sentimiento",
+            'colapso_jugadores': "🔻 Colapso de jugadores",
+            'pico_jugadores': "🔺 Pico de jugadores",
+        }
+        with st.expander(f"🚨 Alertas de Anomalías — últimos 30 días ({len(df_alertas)})", expanded=not df_alertas.empty):
+            if df_alertas.empty:
+                st.markdown("✅ Sin anomalías detectadas en sentimiento ni en jugadores activos.")
+            else:
+                st.dataframe(
+                    df_alertas.assign(tipo=df_alertas['tipo'].map(etiquetas_alerta).fillna(df_alertas['tipo'])),
+                    use_container_width=True, hide_index=True,
+                    column_config={
+                        'fecha': 'Fecha', 'nombre': 'Juego', 'tipo': 'Evento', 'severidad': 'Severidad',
+                        'valor': st.column_config.NumberColumn('Valor', format="%.3f"),
+                        'esperado': st.column_config.NumberColumn('Esperado', format="%.3f"),
+                        'puntaje_z': st.column_config.NumberColumn('Z', format="%.1f"),
+                    }
+                )
+
         col_ctrl1, col_ctrl2 = st.columns([1, 3])
         
         with col_ctrl1:
             st.markdown("### 🎯 Seleccionar Título")
-            juegos_disponibles_nlp = sorted(df_nlp['nombre'].unique())
-            juego_seleccionado = st.selectbox("Juego a analizar:", juegos_disponibles_nlp)
+            juegos_disponibles_nlp = df_ultimo_nlp['nombre'].tolist()
+            posicion_juego = st.selectbox(
+                "Juego a analizar:", range(len(juegos_disponibles_nlp)),
+                format_func=lambda i: juegos_disponibles_nlp[i]
+            )
             
-            df_juego_nlp = df_nlp[df_nlp['nombre'] == juego_seleccionado].copy()
-            ultimo_registro = df_juego_nlp.iloc[-1]
+            ultimo_registro = df_ultimo_nlp.iloc[posicion_juego]
+            df_juego_nlp = load_serie_nlp(ultimo_registro['fk_juego'])
             
             st.markdown("#### 📡 Contexto del Día")
             
@@ -1040,30 +1158,76 @@ with tab4:
                 </div>
                 <div style="flex: 1; background: rgba(102, 126, 234, 0.1); border: 1px solid rgba(102, 126, 234, 0.3); border-radius: 16px; padding: 1.5rem; text-align: center;">
                     <p style="margin:0; color:#a5b4fc; font-size:0.8rem; text-transform:uppercase; font-weight:600;">Jugadores Activos</p>
-                    <p style="margin:0.5rem 0; font-size:1.8rem; font-weight:800; color:#ffffff; font-family:'Space Mono', monospace;">{ultimo_registro['jugadores_activos']:,}</p>
+                    <p style="margin:0.5rem 0; font-size:1.8rem; font-weight:800; color:#ffffff; font-family:'Space Mono', monospace;">{f"{int(ultimo_registro['jugadores_activos']):,}" if pd.notna(ultimo_registro['jugadores_activos']) else "—"}</p>
                 </div>
             </div>
             """
             st.markdown(kpi_html, unsafe_allow_html=True)
+
+            st.markdown("#### ☁️ Nube de Palabras")
+            ventana_nube = st.radio(
+                "Ventana:", [7, 30], format_func=lambda d: f"Últimos {d} días",
+                horizontal=True, key="ventana_nube"
+            )
+            png_nube, terminos_nube, fecha_nube = load_nube(ultimo_registro['fk_juego'], ventana_nube)
+            if png_nube is not None:
+                st.image(png_nube, caption=f"Términos más frecuentes al {fecha_nube}", use_container_width=True)
+            elif terminos_nube:
+                # Sin PNG (falló el render): barras con los pesos guardados
+                df_terminos = pd.DataFrame(list(terminos_nube.items())[:20], columns=['Término', 'Frecuencia'])
+                fig_terminos = px.bar(df_terminos.iloc[::-1], x='Frecuencia', y='Término', orientation='h', template="plotly_dark", height=420)
+                fig_terminos.update_layout(paper_bgcolor='rgba(15, 20, 40, 0.6)', plot_bgcolor='rgba(0, 0, 0, 0.2)', margin=dict(t=10, b=10, l=10, r=10))
+                st.plotly_chart(fig_terminos, use_container_width=True)
+            else:
+                st.info("Aún no hay nube para este juego: se genera en la etapa 'nubes' del pipeline nocturno.")
             
         st.markdown("---")
         
         st.markdown("### 📈 Evolución Histórica: Jugadores vs. Sentimiento")
         
         fig_hist = make_subplots(specs=[[{"secondary_y": True}]])
-        
+
+        # Serie reducida en el servidor (~1 punto por píxel) y eje de fechas real
+        df_hist = graficos.reducir_serie(df_juego_nlp, ['jugadores_activos', 'polaridad_roberta'])
+        TrazaHist = graficos.clase_scatter(len(df_hist))
+        modo_hist = graficos.modo_linea(len(df_hist))
+
         fig_hist.add_trace(
-            go.Scatter(x=df_juego_nlp['fk_tiempo'], y=df_juego_nlp['jugadores_activos'], 
-                       name="Jugadores Activos", mode="lines+markers", line=dict(color="#a5b4fc", width=3), marker=dict(size=8)),
+            TrazaHist(x=df_hist['fk_tiempo'], y=df_hist['jugadores_activos'], 
+                      name="Jugadores Activos", mode=modo_hist, line=dict(color="#a5b4fc", width=3), marker=dict(size=8)),
             secondary_y=False,
         )
         
         fig_hist.add_trace(
-            go.Scatter(x=df_juego_nlp['fk_tiempo'], y=df_juego_nlp['polaridad_roberta'], 
-                       name="Polaridad NLP (Sentimiento)", mode="lines+markers", fill='tozeroy', line=dict(color="#34d399", width=2), marker=dict(size=8)),
+            TrazaHist(x=df_hist['fk_tiempo'], y=df_hist['polaridad_roberta'], 
+                      name="Polaridad NLP (Sentimiento)", mode=modo_hist, fill='tozeroy', line=dict(color="#34d399", width=2), marker=dict(size=8)),
             secondary_y=True,
         )
         
+        # Pronóstico + intervalo (80%) calculado de noche por el pipeline
+        df_prono = load_pronosticos(ultimo_registro['fk_juego'])
+        series_prono = [
+            ('jugadores_activos', "Pronóstico Jugadores", False, '#a5b4fc', 'rgba(165, 180, 252, 0.15)'),
+            ('polaridad_roberta', "Pronóstico Polaridad", True, '#34d399', 'rgba(52, 211, 153, 0.15)'),
+        ]
+        for metrica, nombre_traza, eje_secundario, color_linea, color_banda in series_prono:
+            prono = df_prono[df_prono['metrica'] == metrica] if not df_prono.empty else df_prono
+            if prono.empty:
+                continue
+            fechas = prono['fecha_pronostico'].tolist()
+            fig_hist.add_trace(
+                go.Scatter(x=fechas + fechas[::-1],
+                           y=prono['limite_superior'].tolist() + prono['limite_inferior'].tolist()[::-1],
+                           fill='toself', fillcolor=color_banda, line=dict(width=0),
+                           hoverinfo='skip', showlegend=False),
+                secondary_y=eje_secundario,
+            )
+            fig_hist.add_trace(
+                go.Scatter(x=fechas, y=prono['valor'], name=nombre_traza, mode="lines",
+                           line=dict(color=color_linea, width=2, dash='dash')),
+                secondary_y=eje_secundario,
+            )
+
         fig_hist.update_layout(
             template="plotly_dark", paper_bgcolor='rgba(15, 20, 40, 0.6)', plot_bgcolor='rgba(0, 0, 0, 0.2)',
             margin=dict(t=40, b=40, l=40, r=40), legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
@@ -1071,7 +1235,7 @@ with tab4:
         
         fig_hist.update_yaxes(title_text="Cantidad de Jugadores", secondary_y=False, gridcolor='rgba(102, 126, 234, 0.1)')
         fig_hist.update_yaxes(title_text="Índice de Polaridad (-1 a 1)", secondary_y=True, showgrid=False)
-        fig_hist.update_xaxes(type='category') 
+        fig_hist.update_xaxes(type='date')
 
         st.plotly_chart(fig_hist, use_container_width=True)
             
@@ -1093,3 +1257,11 @@ st.markdown("""
     </p>
 </div>
 """, unsafe_allow_html=True)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PERFILADO DEL RERUN
+# ═══════════════════════════════════════════════════════════════════════════
+
+resumen_perfil = perfilado.cerrar_rerun()
+if PERFIL_VISIBLE and resumen_perfil:
+    perfilado.mostrar_panel(resumen_perfil)
@@ -0,0 +1,278 @@
+# =============================================================================
+# STEAM-BI | Tablas auxiliares del Data Warehouse
+# Descripción: DDL de las tablas que el pipeline crea por su cuenta (las del
+#              esquema estrella original viven en Supabase). SQL portable:
+#              CREATE TABLE IF NOT EXISTS con tipos estándar.
+#              DDL_ESTRELLA replica el esquema estrella para los backends
+#              embebidos (SQLite / DuckDB); en PostgreSQL lo administran
+#              Supabase y migrar.py.
+# =============================================================================
+
+from sqlalchemy import text
+
+DDL_TABLAS = {
+    # Desglose por idioma de hechos_sentimiento (una fila por juego/día/idioma)
+    'hechos_sentimiento_idioma': """
+        CREATE TABLE IF NOT EXISTS hechos_sentimiento_idioma (
+            fk_juego INTEGER NOT NULL,
+            fk_tiempo DATE NOT NULL,
+            idioma VARCHAR(8) NOT NULL,
+            total_resenas INTEGER NOT NULL,
+            resenas_puntuadas INTEGER NOT NULL,
+            resenas_positivas_nlp INTEGER NOT NULL,
+            resenas_negativas_nlp INTEGER NOT NULL,
+            polaridad_promedio DOUBLE PRECISION,
+            PRIMARY KEY (fk_juego, fk_tiempo, idioma)
+        )
+    """,
+    # Pronóstico ETS por juego/métrica; una serie por fecha_base (día de corte),
+    # se conservan las últimas PRONOSTICOS_RETENIDOS
+    'pronosticos_juego': """
+        CREATE TABLE IF NOT EXISTS pronosticos_juego (
+            fk_juego INTEGER NOT NULL,
+            metrica VARCHAR(32) NOT NULL,
+            fecha_base DATE NOT NULL,
+            fecha_pronostico DATE NOT NULL,
+            horizonte SMALLINT NOT NULL,
+            valor DOUBLE PRECISION,
+            limite_inferior DOUBLE PRECISION,
+            limite_superior DOUBLE PRECISION,
+            modelo VARCHAR(32),
+            PRIMARY KEY (fk_juego, metrica, fecha_base, fecha_pronostico)
+        )
+    """,
+    # Parámetros + nivel/tendencia/MSE finales (JSON en params): la corrida
+    # siguiente avanza desde ahí leyendo solo los días nuevos
+    'estado_pronosticos': """
+        CREATE TABLE IF NOT EXISTS estado_pronosticos (
+            fk_juego INTEGER NOT NULL,
+            metrica VARCHAR(32) NOT NULL,
+            ultima_fecha DATE NOT NULL,
+            n_obs INTEGER NOT NULL,
+            ajustes_incrementales SMALLINT NOT NULL,
+            params TEXT NOT NULL,
+            PRIMARY KEY (fk_juego, metrica)
+        )
+    """,
+    # Estado EWMA por juego: tamaño fijo, independiente de la historia.
+    # n cuenta días; n_jugadores solo los que traen jugadores (no NULL)
+    'estado_anomalias': """
+        CREATE TABLE IF NOT EXISTS estado_anomalias (
+            fk_juego INTEGER PRIMARY KEY,
+            ultima_fecha DATE NOT NULL,
+            n INTEGER NOT NULL,
+            n_jugadores INTEGER NOT NULL,
+            media_polaridad DOUBLE PRECISION NOT NULL,
+            var_polaridad DOUBLE PRECISION NOT NULL,
+            media_jugadores DOUBLE PRECISION NOT NULL,
+            var_jugadores DOUBLE PRECISION NOT NULL
+        )
+    """,
+    'alertas_anomalias': """
+        CREATE TABLE IF NOT EXISTS alertas_anomalias (
+            fk_juego INTEGER NOT NULL,
+            fk_tiempo DATE NOT NULL,
+            metrica VARCHAR(16) NOT NULL,
+            tipo VARCHAR(32) NOT NULL,
+            valor DOUBLE PRECISION,
+            esperado DOUBLE PRECISION,
+            puntaje_z DOUBLE PRECISION,
+            severidad VARCHAR(8),
+            PRIMARY KEY (fk_juego, fk_tiempo, tipo)
+        )
+    """,
+    # Frecuencia de términos por juego/día (los TERMINOS_POR_DIA más comunes)
+    'hechos_terminos': """
+        CREATE TABLE IF NOT EXISTS hechos_terminos (
+            fk_juego INTEGER NOT NULL,
+            fk_tiempo DATE NOT NULL,
+            termino VARCHAR(64) NOT NULL,
+            frecuencia INTEGER NOT NULL,
+            PRIMARY KEY (fk_juego, fk_tiempo, termino)
+        )
+    """,
+    # Estado de precio por juego/día/país (precios_steam.py); centavos
+    'hechos_precios': """
+        CREATE TABLE IF NOT EXISTS hechos_precios (
+            fk_juego INTEGER NOT NULL,
+            fk_tiempo DATE NOT NULL,
+            pais VARCHAR(2) NOT NULL,
+            con_precio SMALLINT NOT NULL,
+            moneda VARCHAR(3),
+            precio_inicial INTEGER,
+            precio_final INTEGER,
+            descuento_pct SMALLINT NOT NULL,
+            PRIMARY KEY (fk_juego, fk_tiempo, pais)
+        )
+    """,
+    # Control de catalogo_juegos.py: huella de los atributos de Steam y
+    # última revisión de cada juego
+    'estado_dim_juego': """
+        CREATE TABLE IF NOT EXISTS estado_dim_juego (
+            appid INTEGER PRIMARY KEY,
+            huella VARCHAR(40),
+            revisado_en TIMESTAMP NOT NULL,
+            fallos SMALLINT NOT NULL
+        )
+    """,
+    # Versiones de dim_juego (SCD tipo 2); dim_juego guarda solo la vigente
+    'dim_juego_historial': """
+        CREATE TABLE IF NOT EXISTS dim_juego_historial (
+            appid INTEGER NOT NULL,
+            valido_desde TIMESTAMP NOT NULL,
+            valido_hasta TIMESTAMP,
+            es_actual SMALLINT NOT NULL,
+            nombre VARCHAR(200) NOT NULL,
+            subgenero VARCHAR(100),
+            desarrollador VARCHAR(200),
+            huella VARCHAR(40) NOT NULL,
+            PRIMARY KEY (appid, valido_desde)
+        )
+    """,
+    # Noticias vistas por juego (noticias_steam.py): índice incremental por
+    # gid + historial de parches. fecha_utc en UTC, fk_tiempo en día de México
+    'noticias_juego': """
+        CREATE TABLE IF NOT EXISTS noticias_juego (
+            fk_juego INTEGER NOT NULL,
+            gid VARCHAR(32) NOT NULL,
+            fecha_utc TIMESTAMP NOT NULL,
+            fk_tiempo DATE NOT NULL,
+            feedtype SMALLINT NOT NULL,
+            es_parche SMALLINT NOT NULL,
+            fuente VARCHAR(64),
+            titulo VARCHAR(300),
+            PRIMARY KEY (fk_juego, gid)
+        )
+    """,
+    # Muestras crudas de muestreador_jugadores.py (retención corta)
+    'muestras_jugadores': """
+        CREATE TABLE IF NOT EXISTS muestras_jugadores (
+            fk_juego INTEGER NOT NULL,
+            instante TIMESTAMP NOT NULL,
+            jugadores INTEGER NOT NULL,
+            PRIMARY KEY (fk_juego, instante)
+        )
+    """,
+    # Agregados diarios de las muestras (día de México, como fk_tiempo)
+    'hechos_jugadores_diario': """
+        CREATE TABLE IF NOT EXISTS hechos_jugadores_diario (
+            fk_juego INTEGER NOT NULL,
+            fk_tiempo DATE NOT NULL,
+            muestras INTEGER NOT NULL,
+            jugadores_min INTEGER NOT NULL,
+            jugadores_promedio DOUBLE PRECISION NOT NULL,
+            jugadores_pico INTEGER NOT NULL,
+            jugadores_p95 INTEGER NOT NULL,
+            PRIMARY KEY (fk_juego, fk_tiempo)
+        )
+    """,
+    # Bitácora del scraper: juegos ya cargados por día (una corrida repetida los salta)
+    'progreso_scraper': """
+        CREATE TABLE IF NOT EXISTS progreso_scraper (
+            fecha DATE NOT NULL,
+            appid INTEGER NOT NULL,
+            estado VARCHAR(12) NOT NULL,
+            filas INTEGER NOT NULL,
+            actualizado_en TIMESTAMP NOT NULL,
+            PRIMARY KEY (fecha, appid)
+        )
+    """,
+    # Nube de palabras pre-renderizada por juego y ventana (solo la vigente)
+    'nubes_palabras': """
+        CREATE TABLE IF NOT EXISTS nubes_palabras (
+            fk_juego INTEGER NOT NULL,
+            ventana_dias SMALLINT NOT NULL,
+            fecha_base DATE NOT NULL,
+            huella VARCHAR(40) NOT NULL,
+            terminos TEXT NOT NULL,
+            imagen_png TEXT,
+            PRIMARY KEY (fk_juego, ventana_dias)
+        )
+    """,
+}
+
+
+DDL_ESTRELLA = {
+    'dim_tiempo': """
+        CREATE TABLE IF NOT EXISTS dim_tiempo (
+            id_tiempo DATE PRIMARY KEY,
+            mes SMALLINT NOT NULL,
+            trimestre SMALLINT NOT NULL,
+            anio SMALLINT NOT NULL
+        )
+    """,
+    'dim_juego': """
+        CREATE TABLE IF NOT EXISTS dim_juego (
+            appid INTEGER PRIMARY KEY,
+            nombre VARCHAR(200) NOT NULL,
+            subgenero VARCHAR(100),
+            desarrollador VARCHAR(200)
+        )
+    """,
+    'dim_tipo_resena': """
+        CREATE TABLE IF NOT EXISTS dim_tipo_resena (
+            id_tipo_resena SMALLINT PRIMARY KEY,
+            descripcion VARCHAR(100) NOT NULL
+        )
+    """,
+    'hechos_resenas_steam': """
+        CREATE TABLE IF NOT EXISTS hechos_resenas_steam (
+            fk_juego INTEGER NOT NULL,
+            fk_tipo_resena SMALLINT NOT NULL,
+            fk_tiempo DATE NOT NULL,
+            votos_positivos INTEGER,
+            votos_negativos INTEGER,
+            cantidad_descargas BIGINT,
+            monto_ventas_usd DOUBLE PRECISION,
+            conteo_resenas INTEGER,
+            PRIMARY KEY (fk_juego, fk_tiempo, fk_tipo_resena)
+        )
+    """,
+    'hechos_sentimiento': """
+        CREATE TABLE IF NOT EXISTS hechos_sentimiento (
+            fk_juego INTEGER NOT NULL,
+            fk_tiempo DATE NOT NULL,
+            total_resenas_analizadas INTEGER,
+            resenas_positivas_nlp INTEGER,
+            resenas_negativas_nlp INTEGER,
+            polaridad_roberta DOUBLE PRECISION,
+            sentimiento_predominante VARCHAR(20),
+            en_oferta SMALLINT,
+            hubo_actualizacion SMALLINT,
+            jugadores_activos INTEGER,
+            tema_principal VARCHAR(200),
+            PRIMARY KEY (fk_juego, fk_tiempo)
+        )
+    """,
+}
+
+
+def asegurar_estrella(engine, appids=()):
+    """
+    Esquema estrella + tablas auxiliares (backend embebido o réplica). Los
+    juegos que aún no estén en dim_juego se dan de alta con nombre provisional.
+    """
+    with engine.connect() as conn:
+        for ddl in list(DDL_ESTRELLA.values()) + list(DDL_TABLAS.values()):
+            conn.execute(text(ddl))
+        conn.execute(text("""
+            INSERT INTO dim_tipo_resena (id_tipo_resena, descripcion)
+            VALUES (1, 'Resumen diario de appreviews') ON CONFLICT (id_tipo_resena) DO NOTHING
+        """))
+        if appids:
+            conn.execute(
+                text("""
+                    INSERT INTO dim_juego (appid, nombre, subgenero, desarrollador)
+                    VALUES (:a, :n, 'Sin clasificar', 'Desconocido') ON CONFLICT (appid) DO NOTHING
+                """),
+                [{"a": int(a), "n": f"App {a}"} for a in appids]
+            )
+        conn.commit()
+
+
+def asegurar_tablas(engine, *nombres):
+    """Crea (si faltan) las tablas indicadas, o todas si no se indica ninguna."""
+    with engine.connect() as conn:
+        for nombre in nombres or DDL_TABLAS:
+            conn.execute(text(DDL_TABLAS[nombre]))
+        conn.commit()
@@ -0,0 +1,81 @@
+# =============================================================================
+# STEAM-BI | Capa de render escalable para las gráficas del dashboard
+# Descripción: Mantiene acotado el payload de Plotly sin importar cuántos
+#              días o juegos haya en el DWH:
+#              - series de tiempo reducidas en el servidor (LTTB) a un punto
+#                por píxel aproximado del ancho del gráfico
+#              - trazas WebGL (scattergl) por encima de UMBRAL_WEBGL puntos
+# =============================================================================
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Ancho útil típico de un gráfico con use_container_width en layout "wide"
+ANCHO_PX = 1200
+UMBRAL_WEBGL = 1000
+# Por encima de esto los marcadores saturan la línea y solo cuestan bytes
+MAX_PUNTOS_CON_MARCADOR = 120
+
+
+def indices_lttb(x, y, umbral):
+    """
+    Largest-Triangle-Three-Buckets: índices de 'umbral' puntos que preservan
+    la forma visual de la serie (picos y valles incluidos).
+    """
+    n = len(y)
+    if umbral >= n or umbral < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    bordes = np.linspace(1, n - 1, umbral - 1).astype(np.int64)
+
+    indices = np.empty(umbral, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for i in range(umbral - 2):
+        inicio, fin = bordes[i], max(bordes[i + 1], bordes[i] + 1)
+        # Promedio del bucket siguiente (el último punto si ya no hay más)
+        sig_inicio = fin
+        sig_fin = max(bordes[i + 2] if i + 2 < len(bordes) else n, sig_inicio + 1)
+        prom_x = x[sig_inicio:sig_fin].mean()
+        prom_y = y[sig_inicio:sig_fin].mean()
+
+        areas = np.abs(
+            (x[anterior] - prom_x) * (y[inicio:fin] - y[anterior])
+            - (x[anterior] - x[inicio:fin]) * (prom_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    return indices
+
+
+def reducir_serie(df, columnas_y, max_puntos=ANCHO_PX):
+    """
+    Reduce un DataFrame ya ordenado en el tiempo a ~max_puntos filas.
+    Con varias columnas y se une lo que cada una necesita (LTTB por columna).
+    Las series son diarias, así que la posición sirve como eje x.
+    """
+    if len(df) <= max_puntos:
+        return df
+    x_num = np.arange(len(df), dtype='float64')
+    por_columna = max(3, max_puntos // len(columnas_y))
+    seleccion = np.unique(np.concatenate([
+        indices_lttb(x_num, np.nan_to_num(df[c].to_numpy(dtype='float64')), por_columna)
+        for c in columnas_y
+    ]))
+    return df.iloc[seleccion]
+
+
+def clase_scatter(n_puntos):
+    """go.Scattergl por encima del umbral, go.Scatter (SVG) por debajo."""
+    return go.Scattergl if n_puntos > UMBRAL_WEBGL else go.Scatter
+
+
+def modo_linea(n_puntos):
+    return "lines+markers" if n_puntos <= MAX_PUNTOS_CON_MARCADOR else "lines"
+
+
+def render_mode(n_puntos):
+    """Valor de render_mode para plotly.express."""
+    return 'webgl' if n_puntos > UMBRAL_WEBGL else 'svg'
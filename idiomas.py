@@ -0,0 +1,169 @@
+# =============================================================================
+# STEAM-BI | Identificación de idioma + léxicos de sentimiento por idioma
+# Descripción: Las reseñas llegan con mt=all / language=all. Antes de puntuar
+#              se detecta el idioma de cada reseña en lote (script Unicode +
+#              palabras funcionales) y solo se puntúan los idiomas con léxico.
+#              El inglés va al motor de sentimiento.py (VADER + TextBlob u ONNX).
+# =============================================================================
+
+import math
+import re
+
+IDIOMA_DESCONOCIDO = 'und'
+
+# Tokens de "letras" en cualquier alfabeto (sin dígitos ni guion bajo)
+PATRON_PALABRA = re.compile(r"[^\W\d_]+")
+PATRON_TEMA = re.compile(r"\b[^\W\d_]{3,}\b")
+
+# ---------------------------------------------------------------------------
+# 1. DETECCIÓN DE IDIOMA
+# ---------------------------------------------------------------------------
+
+# Rangos Unicode que deciden el idioma sin mirar palabras
+_SCRIPTS = [
+    ('ja', re.compile(r"[぀-ヿ]")),          # Hiragana / Katakana
+    ('ko', re.compile(r"[가-힯]")),          # Hangul
+    ('zh', re.compile(r"[一-鿿]")),          # Han sin kana
+    ('th', re.compile(r"[฀-๿]")),
+    ('ar', re.compile(r"[؀-ۿ]")),
+    ('uk', re.compile(r"[іїєґІЇЄҐ]")),
+    ('ru', re.compile(r"[Ѐ-ӿ]")),
+]
+
+# Palabras funcionales frecuentes; también sirven de stopwords para temas
+PALABRAS_FUNCIONALES = {
+    'en': {'the', 'and', 'is', 'it', 'this', 'to', 'of', 'you', 'that', 'for', 'with',
+           'but', 'are', 'was', 'have', 'not', 'my', 'just', 'if', 'they', 'be'},
+    'es': {'el', 'la', 'de', 'que', 'y', 'es', 'en', 'los', 'las', 'un', 'una', 'por',
+           'con', 'para', 'muy', 'pero', 'juego', 'lo', 'se', 'del', 'al', 'más', 'como',
+           'este', 'esta', 'está'},
+    'pt': {'o', 'de', 'que', 'e', 'é', 'do', 'da', 'em', 'um', 'uma', 'para', 'com',
+           'não', 'mas', 'muito', 'jogo', 'os', 'você', 'isso', 'mais', 'bem', 'esse'},
+    'fr': {'le', 'la', 'les', 'de', 'des', 'et', 'est', 'un', 'une', 'pour', 'pas',
+           'que', 'qui', 'dans', 'avec', 'ce', 'jeu', 'mais', 'très', 'je', 'il', 'du', 'c'},
+    'de': {'der', 'die', 'das', 'und', 'ist', 'nicht', 'ein', 'eine', 'ich', 'es', 'mit',
+           'zu', 'auf', 'für', 'spiel', 'aber', 'sehr', 'sich', 'den', 'dem', 'auch', 'man'},
+    'it': {'il', 'di', 'che', 'è', 'un', 'una', 'per', 'non', 'con', 'gioco', 'ma',
+           'molto', 'sono', 'del', 'della', 'questo', 'anche', 'gli'},
+    'pl': {'w', 'na', 'nie', 'jest', 'się', 'z', 'że', 'do', 'gra', 'ale', 'bardzo',
+           'jak', 'co', 'ta', 'tym', 'grze'},
+    'tr': {'ve', 'bir', 'bu', 'çok', 'için', 'oyun', 'ama', 'ile', 'değil', 'gibi', 'daha'},
+    'ru': {'и', 'в', 'не', 'на', 'что', 'это', 'игра', 'но', 'как', 'очень', 'с', 'я'},
+}
+
+
+def detectar_idioma(texto):
+    """Código ISO 639-1 de una reseña ('und' si no se reconoce)."""
+    for codigo, patron in _SCRIPTS:
+        if patron.search(texto):
+            return codigo
+
+    palabras = PATRON_PALABRA.findall(texto.lower())
+    if not palabras:
+        return IDIOMA_DESCONOCIDO
+
+    mejor, mejor_aciertos = IDIOMA_DESCONOCIDO, 0
+    for codigo, funcionales in PALABRAS_FUNCIONALES.items():
+        aciertos = sum(1 for p in palabras if p in funcionales)
+        if aciertos > mejor_aciertos:
+            mejor, mejor_aciertos = codigo, aciertos
+
+    if mejor_aciertos:
+        return mejor
+    # Reseñas cortas en ASCII sin palabras funcionales ("gud gaem 10/10"):
+    # la mayoría en Steam son inglés y VADER entiende jerga y emojis.
+    return 'en' if all(p.isascii() for p in palabras) else IDIOMA_DESCONOCIDO
+
+
+def detectar_idiomas(textos):
+    """Detección en lote: una lista de textos → lista de códigos alineada."""
+    return [detectar_idioma(t) for t in textos]
+
+# ---------------------------------------------------------------------------
+# 2. LÉXICOS DE SENTIMIENTO POR IDIOMA
+# ---------------------------------------------------------------------------
+# Valencias en la misma escala que VADER (-4 a +4). En ruso las claves son
+# raíces y se comparan por prefijo para cubrir la flexión.
+
+LEXICOS = {
+    'es': {'bueno': 1.9, 'buena': 1.9, 'buen': 1.9, 'excelente': 3.1, 'genial': 2.8,
+           'increíble': 2.9, 'divertido': 2.1, 'recomiendo': 2.0, 'mejor': 1.8, 'encanta': 2.7,
+           'perfecto': 2.9, 'adictivo': 1.5, 'hermoso': 2.6, 'bonito': 2.0,
+           'malo': -2.0, 'mala': -2.0, 'peor': -2.6, 'basura': -2.9, 'aburrido': -2.0,
+           'horrible': -2.9, 'pésimo': -3.0, 'bugs': -1.5, 'errores': -1.5, 'roto': -2.1,
+           'estafa': -2.9, 'lag': -1.6, 'tramposos': -2.2, 'hackers': -2.0, 'caro': -1.2},
+    'pt': {'bom': 1.9, 'boa': 1.9, 'ótimo': 2.9, 'otimo': 2.9, 'excelente': 3.1,
+           'incrível': 2.9, 'divertido': 2.1, 'recomendo': 2.0, 'melhor': 1.8, 'amo': 3.0,
+           'perfeito': 2.9, 'lindo': 2.4, 'viciante': 1.5,
+           'ruim': -2.1, 'pior': -2.6, 'lixo': -2.9, 'chato': -2.0, 'horrível': -2.9,
+           'péssimo': -3.0, 'bugado': -2.0, 'bugs': -1.5, 'quebrado': -2.1, 'lag': -1.6,
+           'hackers': -2.0, 'caro': -1.2},
+    'fr': {'bon': 1.9, 'bonne': 1.9, 'excellent': 3.1, 'génial': 2.8, 'super': 2.4,
+           'incroyable': 2.9, 'amusant': 2.1, 'recommande': 2.0, 'meilleur': 1.8, 'adore': 2.9,
+           'parfait': 2.9, 'magnifique': 2.9, 'beau': 2.2,
+           'mauvais': -2.0, 'pire': -2.6, 'nul': -2.3, 'ennuyeux': -2.0, 'horrible': -2.9,
+           'bugs': -1.5, 'bugué': -2.0, 'cassé': -2.1, 'arnaque': -2.9, 'lag': -1.6,
+           'tricheurs': -2.2, 'cher': -1.2},
+    'de': {'gut': 1.9, 'gutes': 1.9, 'guter': 1.9, 'toll': 2.4, 'super': 2.4,
+           'geil': 2.5, 'hervorragend': 3.1, 'spaß': 2.1, 'empfehlen': 2.0, 'empfehlenswert': 2.3,
+           'besser': 1.8, 'beste': 2.2, 'perfekt': 2.9, 'schön': 2.2, 'liebe': 2.8,
+           'schlecht': -2.1, 'schlechter': -2.3, 'schlimm': -2.2, 'müll': -2.9,
+           'langweilig': -2.0, 'schrecklich': -2.9, 'bugs': -1.5, 'kaputt': -2.1,
+           'abzocke': -2.9, 'lag': -1.6, 'cheater': -2.2, 'teuer': -1.2},
+    'ru': {'хорош': 1.9, 'отличн': 3.0, 'прекрасн': 3.0, 'лучш': 2.2, 'класс': 2.4,
+           'весел': 2.0, 'интересн': 1.9, 'рекоменд': 2.0, 'шедевр': 3.2, 'любл': 2.8,
+           'красив': 2.4, 'кайф': 2.3,
+           'плох': -2.0, 'хуж': -2.6, 'ужасн': -2.9, 'мусор': -2.8, 'скучн': -2.0,
+           'отстой': -2.8, 'баг': -1.5, 'лаг': -1.6, 'читер': -2.2, 'сломан': -2.1,
+           'говн': -3.0, 'дорог': -1.2},
+}
+
+NEGADORES = {
+    'es': {'no', 'nunca', 'ni', 'tampoco'},
+    'pt': {'não', 'nao', 'nunca', 'nem'},
+    'fr': {'pas', 'jamais', 'ne', 'plus'},
+    'de': {'nicht', 'kein', 'keine', 'nie', 'niemals'},
+    'ru': {'не', 'нет', 'ни', 'никогда'},
+}
+
+_POR_PREFIJO = {'ru'}
+_ALPHA = 15  # misma normalización que el "compound" de VADER
+
+
+def _valencia(palabra, lexico, por_prefijo):
+    if not por_prefijo:
+        return lexico.get(palabra, 0.0)
+    for raiz, valor in lexico.items():
+        if palabra.startswith(raiz):
+            return valor
+    return 0.0
+
+
+def polaridad_lexico(texto, idioma):
+    """Polaridad en [-1, 1] con el léxico del idioma; niega la palabra siguiente."""
+    lexico = LEXICOS[idioma]
+    negadores = NEGADORES[idioma]
+    por_prefijo = idioma in _POR_PREFIJO
+
+    total = 0.0
+    negar = False
+    for palabra in PATRON_PALABRA.findall(texto.lower()):
+        if palabra in negadores:
+            negar = True
+            continue
+        valor = _valencia(palabra, lexico, por_prefijo)
+        if valor:
+            total += -0.74 * valor if negar else valor
+        negar = False
+
+    if total == 0:
+        return 0.0
+    return total / math.sqrt(total * total + _ALPHA)
+
+
+def extraer_temas(texto, idioma, stopwords):
+    """Palabras candidatas a tema; sin segmentar idiomas sin espacios."""
+    if idioma in ('zh', 'ja', 'th'):
+        return []
+    vacias = stopwords | PALABRAS_FUNCIONALES.get(idioma, set())
+    return [w for w in PATRON_TEMA.findall(texto.lower()) if w not in vacias]
@@ -0,0 +1,91 @@
+-- =============================================================================
+-- 0001 | Funciones de mantenimiento de particiones mensuales por fk_tiempo
+-- =============================================================================
+
+-- Crea (si falta) la partición mensual de 'tabla' que contiene 'mes'
+CREATE OR REPLACE FUNCTION steam_crear_particion_mensual(tabla text, mes date)
+RETURNS text AS $$
+DECLARE
+    inicio date := date_trunc('month', mes)::date;
+    fin    date := (date_trunc('month', mes) + interval '1 month')::date;
+    nombre text := format('%s_%s', tabla, to_char(inicio, 'YYYYMM'));
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        nombre, tabla, inicio, fin
+    );
+    RETURN nombre;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Crea todas las particiones mensuales entre 'desde' y 'hasta' (inclusive)
+CREATE OR REPLACE FUNCTION steam_crear_particiones(tabla text, desde date, hasta date)
+RETURNS integer AS $$
+DECLARE
+    mes date := date_trunc('month', desde)::date;
+    creadas integer := 0;
+BEGIN
+    WHILE mes <= hasta LOOP
+        PERFORM steam_crear_particion_mensual(tabla, mes);
+        creadas := creadas + 1;
+        mes := (mes + interval '1 month')::date;
+    END LOOP;
+    RETURN creadas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Convierte una tabla heap en particionada por RANGE (fk_tiempo), mensual.
+-- La tabla original se conserva como <tabla>_legacy (sus secuencias siguen
+-- alimentando los DEFAULT copiados); puede borrarse tras verificar conteos.
+CREATE OR REPLACE FUNCTION steam_particionar_por_mes(tabla text)
+RETURNS void AS $$
+DECLARE
+    legacy text := tabla || '_legacy';
+    min_fecha date;
+    max_fecha date;
+BEGIN
+    IF (SELECT c.relkind FROM pg_class c WHERE c.oid = to_regclass(tabla)) IS DISTINCT FROM 'r' THEN
+        RAISE NOTICE '% no es una tabla heap (ya particionada o inexistente); se omite', tabla;
+        RETURN;
+    END IF;
+
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', tabla, legacy);
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (fk_tiempo)',
+        tabla, legacy
+    );
+
+    EXECUTE format('SELECT MIN(fk_tiempo)::date, MAX(fk_tiempo)::date FROM %I', legacy)
+        INTO min_fecha, max_fecha;
+    PERFORM steam_crear_particiones(
+        tabla,
+        COALESCE(min_fecha, CURRENT_DATE),
+        GREATEST(COALESCE(max_fecha, CURRENT_DATE), CURRENT_DATE) + 31
+    );
+
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', tabla, legacy);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Política de retención: desprende (DETACH) las particiones cuyo mes termina
+-- antes de 'antes_de'. Quedan como tablas sueltas para archivarse o borrarse.
+CREATE OR REPLACE FUNCTION steam_desprender_particiones(tabla text, antes_de date)
+RETURNS integer AS $$
+DECLARE
+    particion record;
+    desprendidas integer := 0;
+BEGIN
+    FOR particion IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(tabla)
+          AND c.relname ~ '_[0-9]{6}$'
+          AND (to_date(right(c.relname, 6), 'YYYYMM') + interval '1 month')::date <= antes_de
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', tabla, particion.relname);
+        desprendidas := desprendidas + 1;
+    END LOOP;
+    RETURN desprendidas;
+END;
+$$ LANGUAGE plpgsql;
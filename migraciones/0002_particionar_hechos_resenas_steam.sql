@@ -0,0 +1,12 @@
+-- =============================================================================
+-- 0002 | hechos_resenas_steam → particionada por mes (fk_tiempo)
+-- =============================================================================
+
+SELECT steam_particionar_por_mes('hechos_resenas_steam');
+
+-- BRIN en la fecha: diminuto y suficiente para datos insertados en orden
+CREATE INDEX IF NOT EXISTS idx_hechos_resenas_steam_fk_tiempo_brin
+    ON hechos_resenas_steam USING brin (fk_tiempo);
+-- B-tree por juego para series y "último registro por juego"
+CREATE INDEX IF NOT EXISTS idx_hechos_resenas_steam_fk_juego
+    ON hechos_resenas_steam (fk_juego, fk_tiempo);
@@ -0,0 +1,10 @@
+-- =============================================================================
+-- 0003 | hechos_sentimiento → particionada por mes (fk_tiempo)
+-- =============================================================================
+
+SELECT steam_particionar_por_mes('hechos_sentimiento');
+
+CREATE INDEX IF NOT EXISTS idx_hechos_sentimiento_fk_tiempo_brin
+    ON hechos_sentimiento USING brin (fk_tiempo);
+CREATE INDEX IF NOT EXISTS idx_hechos_sentimiento_fk_juego
+    ON hechos_sentimiento (fk_juego, fk_tiempo);
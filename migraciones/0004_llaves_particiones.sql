@@ -0,0 +1,100 @@
+-- =============================================================================
+-- 0004 | Llaves, FKs, permisos y partición DEFAULT de los hechos particionados
+-- =============================================================================
+-- steam_particionar_por_mes (0002/0003) recrea la tabla con LIKE ... INCLUDING
+-- DEFAULTS INCLUDING CONSTRAINTS, que no copia la PK, las FKs ni los GRANT:
+-- sin PK podían entrar filas duplicadas por (juego, día). Aquí se restauran
+-- en el padre particionado (se propagan a cada partición) y se agrega una
+-- partición DEFAULT para que un cargador suelto (backfill.py, replica.py) no
+-- falle cuando se acaban los meses creados por adelantado.
+
+-- Crea (si falta) la partición mensual de 'tabla' que contiene 'mes'. Si hay
+-- partición DEFAULT, las filas de ese mes que cayeron en ella se mueven a la
+-- nueva partición (PostgreSQL no deja crearla mientras estén ahí).
+CREATE OR REPLACE FUNCTION steam_crear_particion_mensual(tabla text, mes date)
+RETURNS text AS $$
+DECLARE
+    inicio  date := date_trunc('month', mes)::date;
+    fin     date := (date_trunc('month', mes) + interval '1 month')::date;
+    nombre  text := format('%s_%s', tabla, to_char(inicio, 'YYYYMM'));
+    defecto text := tabla || '_default';
+BEGIN
+    IF to_regclass(nombre) IS NOT NULL THEN
+        RETURN nombre;
+    END IF;
+
+    IF to_regclass(defecto) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            nombre, tabla, inicio, fin
+        );
+        RETURN nombre;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', nombre, tabla);
+    EXECUTE format(
+        'WITH movidas AS (DELETE FROM %I WHERE fk_tiempo >= %L AND fk_tiempo < %L RETURNING *) '
+        'INSERT INTO %I SELECT * FROM movidas',
+        defecto, inicio, fin, nombre
+    );
+    EXECUTE format(
+        'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        tabla, nombre, inicio, fin
+    );
+    RETURN nombre;
+END;
+$$ LANGUAGE plpgsql;
+
+-- PK 'llave' (debe incluir fk_tiempo), FKs y GRANT de <tabla>_legacy, y
+-- partición DEFAULT. Idempotente: lo que ya existe se omite.
+CREATE OR REPLACE FUNCTION steam_restaurar_llaves(tabla text, llave text)
+RETURNS void AS $$
+DECLARE
+    legacy text := tabla || '_legacy';
+    restriccion record;
+    permiso record;
+BEGIN
+    IF (SELECT c.relkind FROM pg_class c WHERE c.oid = to_regclass(tabla)) IS DISTINCT FROM 'p' THEN
+        RAISE NOTICE '% no está particionada; se omite', tabla;
+        RETURN;
+    END IF;
+
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = to_regclass(tabla) AND contype = 'p') THEN
+        EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (%s)', tabla, llave);
+    END IF;
+
+    IF to_regclass(legacy) IS NULL THEN
+        RAISE NOTICE '% no existe: FKs y permisos de % no se copian', legacy, tabla;
+    ELSE
+        FOR restriccion IN
+            SELECT l.conname, pg_get_constraintdef(l.oid) AS definicion
+            FROM pg_constraint l
+            WHERE l.conrelid = to_regclass(legacy) AND l.contype = 'f'
+              AND NOT EXISTS (
+                  SELECT 1 FROM pg_constraint p
+                  WHERE p.conrelid = to_regclass(tabla) AND p.conname = l.conname
+              )
+        LOOP
+            EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I %s', tabla, restriccion.conname, restriccion.definicion);
+        END LOOP;
+
+        FOR permiso IN
+            SELECT a.privilege_type,
+                   CASE WHEN a.grantee = 0 THEN 'PUBLIC' ELSE a.grantee::regrole::text END AS rol
+            FROM pg_class c, aclexplode(c.relacl) a
+            WHERE c.oid = to_regclass(legacy)
+        LOOP
+            EXECUTE format('GRANT %s ON %I TO %s', permiso.privilege_type, tabla, permiso.rol);
+        END LOOP;
+    END IF;
+
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I DEFAULT', tabla || '_default', tabla);
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT steam_restaurar_llaves('hechos_resenas_steam', 'fk_juego, fk_tiempo, fk_tipo_resena');
+SELECT steam_restaurar_llaves('hechos_sentimiento', 'fk_juego, fk_tiempo');
+
+-- Las PK empiezan por (fk_juego, fk_tiempo): los B-tree de 0002/0003 sobran
+DROP INDEX IF EXISTS idx_hechos_resenas_steam_fk_juego;
+DROP INDEX IF EXISTS idx_hechos_sentimiento_fk_juego;
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Migraciones de esquema + mantenimiento de particiones
+# Descripción: Aplica en orden los archivos migraciones/NNNN_*.sql que aún no
+#              figuran en schema_migrations (cada uno en su transacción).
+#              Además crea por adelantado las particiones mensuales de los
+#              hechos y aplica la política de retención (DETACH) configurable.
+#              Lo que llegue fuera de esos meses cae en la partición DEFAULT
+#              y se mueve a su mes cuando este se crea.
+#              Solo PostgreSQL: en otros motores no hace nada.
+# Uso:
+#   python migrar.py                 # aplica pendientes + particiones
+#   python migrar.py --estado        # lista aplicadas / pendientes
+#   python migrar.py --retencion 24  # desprende particiones > 24 meses
+# =============================================================================
+
+import argparse
+import datetime
+import os
+
+from sqlalchemy import text
+
+from conexion import crear_engine
+
+DIRECTORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migraciones')
+
+# Tablas de hechos particionadas por mes en fk_tiempo
+TABLAS_PARTICIONADAS = ['hechos_resenas_steam', 'hechos_sentimiento']
+
+MESES_ADELANTE = 2
+# Meses de historia que se conservan adjuntos; vacío = sin retención
+RETENCION_MESES = os.getenv('RETENCION_MESES')
+
+
+def es_postgres(engine):
+    return engine.dialect.name == 'postgresql'
+
+
+def archivos_migracion():
+    """[(version, nombre_archivo)] ordenados por versión."""
+    return sorted(
+        (archivo.split('_', 1)[0], archivo)
+        for archivo in os.listdir(DIRECTORIO)
+        if archivo.endswith('.sql') and archivo[:4].isdigit()
+    )
+
+
+def versiones_aplicadas(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(16) PRIMARY KEY,
+            nombre VARCHAR(200) NOT NULL,
+            aplicada_en TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """))
+    return {r[0] for r in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def migrar(engine):
+    """Aplica las migraciones pendientes. Devuelve la lista de archivos aplicados."""
+    if not es_postgres(engine):
+        return []
+
+    with engine.begin() as conn:
+        aplicadas = versiones_aplicadas(conn)
+
+    nuevas = []
+    for version, archivo in archivos_migracion():
+        if version in aplicadas:
+            continue
+        with open(os.path.join(DIRECTORIO, archivo), encoding='utf-8') as f:
+            sql = f.read()
+        with engine.begin() as conn:
+            # no_parameters: el SQL lleva '%' (format()) que el driver no debe interpretar
+            conn.execution_options(no_parameters=True).exec_driver_sql(sql)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, nombre) VALUES (:v, :n)"),
+                {"v": version, "n": archivo}
+            )
+        print(f"   └─ 🧱 Migración aplicada: {archivo}")
+        nuevas.append(archivo)
+    return nuevas
+
+
+def tablas_particionadas(conn):
+    """Las tablas de TABLAS_PARTICIONADAS que ya están particionadas."""
+    filas = conn.execute(text("""
+        SELECT c.relname FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+    """))
+    existentes = {r[0] for r in filas}
+    return [t for t in TABLAS_PARTICIONADAS if t in existentes]
+
+
+def asegurar_particiones(engine, desde, hasta=None):
+    """Crea las particiones mensuales que cubren [desde, hasta]."""
+    if not es_postgres(engine):
+        return 0
+    hasta = hasta or desde
+    with engine.begin() as conn:
+        tablas = tablas_particionadas(conn)
+        for tabla in tablas:
+            conn.execute(text("SELECT steam_crear_particiones(:t, :d, :h)"),
+                         {"t": tabla, "d": desde, "h": hasta})
+    return len(tablas)
+
+
+def aplicar_retencion(engine, meses, hoy=None):
+    """Desprende las particiones con más de 'meses' meses de antigüedad."""
+    if not es_postgres(engine) or not meses:
+        return 0
+    hoy = hoy or datetime.date.today()
+    total_meses = hoy.year * 12 + hoy.month - 1 - int(meses)
+    corte = datetime.date(total_meses // 12, total_meses % 12 + 1, 1)
+
+    desprendidas = 0
+    with engine.begin() as conn:
+        for tabla in tablas_particionadas(conn):
+            desprendidas += conn.execute(
+                text("SELECT steam_desprender_particiones(:t, :c)"), {"t": tabla, "c": corte}
+            ).scalar()
+    if desprendidas:
+        print(f"   └─ 🗄️  {desprendidas} particiones anteriores a {corte} desprendidas (retención {meses} meses)")
+    return desprendidas
+
+
+def preparar_esquema(engine, fecha):
+    """Migraciones + particiones del mes actual y los siguientes + retención."""
+    migrar(engine)
+    asegurar_particiones(engine, fecha, fecha + datetime.timedelta(days=31 * MESES_ADELANTE))
+    aplicar_retencion(engine, RETENCION_MESES, fecha)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migraciones del esquema Steam-BI")
+    parser.add_argument('--estado', action='store_true', help="Muestra migraciones aplicadas y pendientes")
+    parser.add_argument('--retencion', type=int, default=RETENCION_MESES, help="Meses de historia adjunta")
+    args = parser.parse_args()
+
+    engine = crear_engine()
+    if engine is None:
+        print("❌ ERROR: Falta configurar DB_URI.")
+    elif args.estado:
+        with engine.begin() as conn:
+            aplicadas = versiones_aplicadas(conn)
+        for version, archivo in archivos_migracion():
+            print(f"{'✅' if version in aplicadas else '⏳'} {archivo}")
+    else:
+        hoy = datetime.date.today()
+        migrar(engine)
+        asegurar_particiones(engine, hoy, hoy + datetime.timedelta(days=31 * MESES_ADELANTE))
+        aplicar_retencion(engine, args.retencion, hoy)
@@ -0,0 +1,392 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Muestreador continuo de jugadores activos
+# Descripción: Proceso de larga duración que consulta GetNumberOfCurrentPlayers
+#              para todo el catálogo cada N minutos (una sola lectura diaria
+#              depende del minuto en que el cron llega a cada juego).
+#              - Concurrencia asíncrona acotada (N trabajadores sobre un
+#                iterador compartido, no una tarea por appid) + límite de
+#                peticiones por segundo.
+#              - Las muestras se acumulan en arreglos paralelos de 4 bytes
+#                (instante, appid, jugadores) y se vuelcan en bloque a
+#                muestras_jugadores.
+#              - Al cerrar el día (hora de México) se escriben los agregados
+#                min / promedio / pico / p95 en hechos_jugadores_diario y se
+#                purgan las muestras crudas más viejas que la retención.
+#              - Si la base no responde, las muestras vuelven al buffer y el
+#                volcado / los agregados se reintentan en el ciclo siguiente.
+# Uso:
+#   python muestreador_jugadores.py                       # cada 5 min, sin fin
+#   python muestreador_jugadores.py --intervalo 10 --concurrencia 64 --por-segundo 80
+#   python muestreador_jugadores.py --appids-archivo catalogo.txt
+#   python muestreador_jugadores.py --rollup 2025-06-01   # solo re-agrega un día
+# =============================================================================
+
+import argparse
+import asyncio
+import datetime
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytz
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+import steam_etl
+from conexion import SesionSteam, crear_engine
+from esquema import asegurar_tablas
+
+URL_JUGADORES = "https://api.steampowered.com/ISteamUserStats/GetNumberOfCurrentPlayers/v1/"
+
+INTERVALO_MIN = 5
+CONCURRENCIA = 32
+PETICIONES_POR_SEGUNDO = 50
+ESPERA_LIMITE_S = 30          # pausa tras un 429 de Steam
+
+MAX_MUESTRAS_BUFFER = 250_000  # ~3 MB: tres arreglos de 4 bytes por muestra
+MAX_MUESTRAS_RETENIDAS = 10 * MAX_MUESTRAS_BUFFER  # tope mientras la base no responde
+FILAS_POR_INSERT = 5_000
+JUEGOS_POR_BLOQUE_ROLLUP = 2_000
+RETENCION_MUESTRAS_DIAS = 7
+
+tz_mexico = pytz.timezone('America/Mexico_City')
+
+
+class LimiteSteam(Exception):
+    """Steam respondió 429: hay que bajar el ritmo."""
+
+# ---------------------------------------------------------------------------
+# 1. ALMACENAMIENTO COMPACTO EN MEMORIA
+# ---------------------------------------------------------------------------
+
+class BufferMuestras:
+    """
+    Tres arreglos paralelos de enteros sin signo de 4 bytes: instante (epoch
+    en segundos), appid y jugadores. 12 bytes por muestra, sin objetos Python.
+    """
+
+    def __init__(self):
+        self._vaciar()
+
+    def _vaciar(self):
+        self.instantes, self.appids, self.jugadores = array('I'), array('I'), array('I')
+
+    def agregar(self, instante, appid, jugadores):
+        self.instantes.append(instante)
+        self.appids.append(appid)
+        self.jugadores.append(jugadores)
+
+    def __len__(self):
+        return len(self.appids)
+
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.instantes, self.appids, self.jugadores))
+
+    def tomar(self):
+        """Entrega los arreglos actuales y deja el buffer vacío."""
+        contenido = (self.instantes, self.appids, self.jugadores)
+        self._vaciar()
+        return contenido
+
+    def devolver(self, contenido):
+        """
+        Regresa al buffer lo que no se pudo volcar (delante de lo nuevo). Si se
+        pasa de MAX_MUESTRAS_RETENIDAS se descartan las muestras más viejas.
+        """
+        instantes, appids, jugadores = contenido
+        self.instantes = instantes + self.instantes
+        self.appids = appids + self.appids
+        self.jugadores = jugadores + self.jugadores
+        sobrantes = len(self) - MAX_MUESTRAS_RETENIDAS
+        if sobrantes > 0:
+            del self.instantes[:sobrantes], self.appids[:sobrantes], self.jugadores[:sobrantes]
+            print(f"   │  └─ ⚠️  [jugadores] Buffer lleno sin base: {sobrantes:,} muestras viejas descartadas")
+
+
+def volcar(engine, contenido):
+    """Inserta en bloque (FILAS_POR_INSERT por executemany). Devuelve las filas."""
+    instantes, appids, jugadores = contenido
+    if not appids:
+        return 0
+    sql = text("""
+        INSERT INTO muestras_jugadores (fk_juego, instante, jugadores)
+        VALUES (:j, :i, :n) ON CONFLICT (fk_juego, instante) DO NOTHING
+    """)
+    # Todas las muestras de un ciclo comparten instante: se convierte una vez
+    fechas = {}
+    with engine.begin() as conn:
+        for inicio in range(0, len(appids), FILAS_POR_INSERT):
+            fin = inicio + FILAS_POR_INSERT
+            filas = []
+            for i, j, n in zip(instantes[inicio:fin], appids[inicio:fin], jugadores[inicio:fin]):
+                if i not in fechas:
+                    fechas[i] = datetime.datetime.fromtimestamp(i, datetime.timezone.utc).replace(tzinfo=None)
+                filas.append({"j": j, "i": fechas[i], "n": n})
+            conn.execute(sql, filas)
+    return len(appids)
+
+
+async def escribir_en_base(funcion, *args):
+    """
+    Corre 'funcion' en el ejecutor por defecto. Un DBAPIError (conexión
+    caída, failover) no tumba al muestreador: se avisa y devuelve False.
+    """
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, funcion, *args)
+        return True
+    except DBAPIError as e:
+        print(f"   │  └─ ⚠️  [jugadores] {funcion.__name__} falló, se reintenta el próximo ciclo: {e.orig}")
+        return False
+
+
+async def volcar_buffer(engine, buffer):
+    """Vuelca el buffer; si la base falla, las muestras regresan a él."""
+    contenido = buffer.tomar()
+    if await escribir_en_base(volcar, engine, contenido):
+        return True
+    buffer.devolver(contenido)
+    return False
+
+# ---------------------------------------------------------------------------
+# 2. MUESTREO ASÍNCRONO
+# ---------------------------------------------------------------------------
+
+class LimitadorTasa:
+    """Espacia las peticiones para no pasar de 'por_segundo' en promedio."""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo
+        self._siguiente = 0.0
+        self._lock = asyncio.Lock()
+
+    async def esperar(self):
+        async with self._lock:
+            ahora = asyncio.get_running_loop().time()
+            espera = self._siguiente - ahora
+            self._siguiente = max(ahora, self._siguiente) + self.intervalo
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+def consultar_jugadores(session, appid):
+    """player_count de un appid, o None si Steam no tiene el dato."""
+    try:
+        respuesta = session.get(URL_JUGADORES, params={'appid': appid}, timeout=10)
+    except Exception:
+        return None
+    if respuesta.status_code == 429:
+        raise LimiteSteam()
+    try:
+        datos = respuesta.json().get('response', {})
+    except ValueError:
+        return None
+    if datos.get('result') != 1:
+        return None
+    return datos.get('player_count')
+
+
+async def muestrear_ciclo(engine, appids, session, buffer, limitador, ejecutor, concurrencia):
+    """
+    Una pasada por todo el catálogo. 'concurrencia' trabajadores consumen un
+    iterador compartido: la memoria no crece con el número de appids. Si el
+    buffer llega a MAX_MUESTRAS_BUFFER se vuelca sin esperar al fin del ciclo
+    (tras un fallo de la base ya no se intenta hasta el siguiente).
+    Devuelve (muestras, fallidas).
+    """
+    loop = asyncio.get_running_loop()
+    instante = int(time.time())
+    pendientes = iter(appids)
+    conteo = {'muestras': 0, 'fallidas': 0, 'base_caida': False}
+
+    async def trabajador():
+        for appid in pendientes:
+            await limitador.esperar()
+            try:
+                jugadores = await loop.run_in_executor(ejecutor, consultar_jugadores, session, appid)
+            except LimiteSteam:
+                await asyncio.sleep(ESPERA_LIMITE_S)
+                try:
+                    jugadores = await loop.run_in_executor(ejecutor, consultar_jugadores, session, appid)
+                except LimiteSteam:
+                    jugadores = None
+            if jugadores is None:
+                conteo['fallidas'] += 1
+            else:
+                buffer.agregar(instante, appid, min(int(jugadores), 0xFFFFFFFF))
+                conteo['muestras'] += 1
+                if len(buffer) >= MAX_MUESTRAS_BUFFER and not conteo['base_caida']:
+                    conteo['base_caida'] = not await volcar_buffer(engine, buffer)
+
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    return conteo['muestras'], conteo['fallidas']
+
+# ---------------------------------------------------------------------------
+# 3. AGREGADOS DIARIOS
+# ---------------------------------------------------------------------------
+
+def dia_mexico(instante=None):
+    """Fecha de México (la misma convención que fk_tiempo en todo el DWH)."""
+    instante = instante or datetime.datetime.now(datetime.timezone.utc)
+    return instante.astimezone(tz_mexico).date()
+
+
+def limites_utc(dia):
+    """[inicio, fin) del día de México expresados en UTC sin zona."""
+    def a_utc(fecha):
+        local = tz_mexico.localize(datetime.datetime.combine(fecha, datetime.time.min))
+        return local.astimezone(pytz.utc).replace(tzinfo=None)
+    return a_utc(dia), a_utc(dia + datetime.timedelta(days=1))
+
+
+def agregar_por_juego(appids, jugadores):
+    """
+    min / promedio / pico / p95 (rango más cercano) por appid en una sola
+    pasada: orden por (appid, jugadores) y cortes en los cambios de appid.
+    """
+    appids = np.asarray(appids)
+    jugadores = np.asarray(jugadores, dtype='int64')
+    orden = np.lexsort((jugadores, appids))
+    appids, jugadores = appids[orden], jugadores[orden]
+
+    inicios = np.flatnonzero(np.r_[True, appids[1:] != appids[:-1]])
+    fines = np.r_[inicios[1:], len(appids)]
+    muestras = fines - inicios
+    rango_p95 = np.ceil(muestras * 0.95).astype('int64') - 1
+
+    return pd.DataFrame({
+        'fk_juego': appids[inicios],
+        'muestras': muestras,
+        'jugadores_min': jugadores[inicios],
+        'jugadores_promedio': np.add.reduceat(jugadores, inicios) / muestras,
+        'jugadores_pico': jugadores[fines - 1],
+        'jugadores_p95': jugadores[inicios + rango_p95],
+    })
+
+
+def escribir_rollup(engine, dia):
+    """
+    Re-agrega un día completo desde muestras_jugadores (idempotente). Lee por
+    bloques de appids para que la memoria no dependa del tamaño del catálogo.
+    """
+    inicio, fin = limites_utc(dia)
+    with engine.connect() as conn:
+        juegos = [r[0] for r in conn.execute(
+            text("SELECT DISTINCT fk_juego FROM muestras_jugadores "
+                 "WHERE instante >= :ini AND instante < :fin ORDER BY fk_juego"),
+            {"ini": inicio, "fin": fin})]
+
+    bloques = []
+    for i in range(0, len(juegos), JUEGOS_POR_BLOQUE_ROLLUP):
+        bloque = juegos[i:i + JUEGOS_POR_BLOQUE_ROLLUP]
+        df = pd.read_sql(
+            text("SELECT fk_juego, jugadores FROM muestras_jugadores "
+                 "WHERE fk_juego BETWEEN :a AND :b AND instante >= :ini AND instante < :fin"),
+            engine, params={"a": bloque[0], "b": bloque[-1], "ini": inicio, "fin": fin}
+        )
+        bloques.append(agregar_por_juego(df['fk_juego'].to_numpy(), df['jugadores'].to_numpy()))
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM hechos_jugadores_diario WHERE fk_tiempo = :d"), {"d": dia})
+        if bloques:
+            resumen = pd.concat(bloques, ignore_index=True)
+            resumen.insert(1, 'fk_tiempo', dia)
+            resumen.to_sql('hechos_jugadores_diario', conn, if_exists='append', index=False,
+                           method='multi', chunksize=2000)
+    print(f"   └─ 📊 [jugadores] Agregados de {dia}: {len(juegos):,} juegos")
+    return len(juegos)
+
+
+def purgar_muestras(engine, dias=RETENCION_MUESTRAS_DIAS):
+    limite = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) - datetime.timedelta(days=dias)
+    with engine.begin() as conn:
+        borradas = conn.execute(text("DELETE FROM muestras_jugadores WHERE instante < :l"),
+                                {"l": limite}).rowcount
+    if borradas:
+        print(f"   └─ 🧹 [jugadores] {borradas:,} muestras crudas de más de {dias} días purgadas")
+
+# ---------------------------------------------------------------------------
+# 4. BUCLE PRINCIPAL
+# ---------------------------------------------------------------------------
+
+def cargar_catalogo(engine, archivo=None):
+    """appids ordenados en un array('I'): un archivo (uno por línea) o dim_juego + ETL."""
+    if archivo:
+        with open(archivo, encoding='utf-8') as f:
+            ids = {int(linea) for linea in f if linea.strip().isdigit()}
+    else:
+        ids = set(steam_etl.juegos_ids)
+        with engine.connect() as conn:
+            ids.update(r[0] for r in conn.execute(text("SELECT appid FROM dim_juego")))
+    return array('I', sorted(ids))
+
+
+async def ejecutar(engine, appids, intervalo_min=INTERVALO_MIN, concurrencia=CONCURRENCIA,
+                   por_segundo=PETICIONES_POR_SEGUNDO, ciclos=0):
+    """
+    Muestrea cada 'intervalo_min' minutos; ciclos=0 corre indefinidamente. Los
+    días por agregar se conservan hasta que escribir_rollup y la purga pasan.
+    """
+    session = SesionSteam(hilos=concurrencia)
+    buffer = BufferMuestras()
+    limitador = LimitadorTasa(por_segundo)
+    dia_actual = dia_mexico()
+
+    # Si el proceso estuvo caído al cambiar de día, el de ayer quedó sin agregar
+    por_agregar = [dia_actual - datetime.timedelta(days=1)]
+
+    with ThreadPoolExecutor(max_workers=concurrencia) as ejecutor:
+        ciclo = 0
+        while not ciclos or ciclo < ciclos:
+            ciclo += 1
+            inicio = time.monotonic()
+            muestras, fallidas = await muestrear_ciclo(engine, appids, session, buffer,
+                                                       limitador, ejecutor, concurrencia)
+            memoria_kb = buffer.nbytes() / 1024
+            await volcar_buffer(engine, buffer)
+            duracion = time.monotonic() - inicio
+            print(f"⏱️  [jugadores] Ciclo {ciclo}: {muestras:,} muestras, {fallidas:,} sin dato, "
+                  f"{duracion:.0f}s, buffer {memoria_kb:,.0f} KB")
+
+            hoy = dia_mexico()
+            if hoy != dia_actual:
+                por_agregar.append(dia_actual)
+                dia_actual = hoy
+            # Con muestras del día aún en el buffer el agregado quedaría corto
+            while por_agregar and len(buffer) == 0:
+                if not (await escribir_en_base(escribir_rollup, engine, por_agregar[0])
+                        and await escribir_en_base(purgar_muestras, engine)):
+                    break
+                por_agregar.pop(0)
+
+            if not ciclos or ciclo < ciclos:
+                await asyncio.sleep(max(0.0, intervalo_min * 60 - duracion))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Muestreo continuo de jugadores activos")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_MIN, help="Minutos entre ciclos")
+    parser.add_argument('--concurrencia', type=int, default=CONCURRENCIA)
+    parser.add_argument('--por-segundo', type=float, default=PETICIONES_POR_SEGUNDO,
+                        help="Tope de peticiones por segundo a Steam")
+    parser.add_argument('--appids-archivo', help="Un appid por línea (por defecto dim_juego + ETL)")
+    parser.add_argument('--ciclos', type=int, default=0, help="0 = sin fin")
+    parser.add_argument('--rollup', type=datetime.date.fromisoformat, help="Solo re-agrega ese día")
+    args = parser.parse_args()
+
+    engine = crear_engine()
+    if engine is None:
+        print("❌ ERROR: No se encontró DB_URI.")
+    else:
+        asegurar_tablas(engine, 'muestras_jugadores', 'hechos_jugadores_diario')
+        if args.rollup:
+            escribir_rollup(engine, args.rollup)
+        else:
+            catalogo = cargar_catalogo(engine, args.appids_archivo)
+            print(f"🎮 [jugadores] {len(catalogo):,} juegos cada {args.intervalo:g} min "
+                  f"({args.concurrencia} concurrentes, ≤{args.por_segundo:g} req/s)")
+            asyncio.run(ejecutar(engine, catalogo, args.intervalo, args.concurrencia,
+                                 args.por_segundo, args.ciclos))
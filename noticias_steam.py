@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Seguimiento incremental de noticias y parches
+# Descripción: noticias_juego guarda cada noticia vista (gid) por juego y es
+#              a la vez el índice de lo ya descargado y el historial de
+#              parches. Cada corrida pide a GetNewsForApp solo una página
+#              corta con maxlength=1 (sin el cuerpo de la noticia) y pagina
+#              hacia atrás únicamente mientras todo lo recibido sea nuevo.
+#              Las fechas se guardan en UTC (fecha_utc) y como día de México
+#              (fk_tiempo), la misma convención que el resto del DWH; antes
+#              se comparaba contra la hora local del servidor.
+#              hubo_actualizacion = alguna noticia oficial (feedtype 1) con
+#              fk_tiempo igual al día de la corrida.
+# Uso:
+#   python noticias_steam.py                    # juegos del ETL
+#   python noticias_steam.py --appids 440,730
+# =============================================================================
+
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from sqlalchemy import Date, bindparam, text
+
+import steam_etl
+from conexion import HEADERS_STEAM, crear_engine
+from esquema import asegurar_tablas
+
+URL_NOTICIAS = "https://api.steampowered.com/ISteamNews/GetNewsForApp/v0002/"
+PRIMERA_PAGINA = 3      # lo normal es 0-1 noticias nuevas por día
+PAGINA = 10
+MAX_PAGINAS = 5
+DIAS_INDICE = 30        # gids recientes que se cargan para deduplicar
+
+# ---------------------------------------------------------------------------
+# 1. ÍNDICE DE NOTICIAS VISTAS
+# ---------------------------------------------------------------------------
+
+def leer_indice(engine, appids):
+    """({appid: {gid}}, {appid: última fecha_utc}) de los últimos DIAS_INDICE."""
+    corte = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) - datetime.timedelta(days=DIAS_INDICE)
+    conocidas, marcas = {}, {}
+    with engine.connect() as conn:
+        filas = conn.execute(
+            text("SELECT fk_juego, gid, fecha_utc FROM noticias_juego WHERE fecha_utc >= :c"),
+            {"c": corte}
+        )
+        for fk_juego, gid, fecha_utc in filas:
+            conocidas.setdefault(fk_juego, set()).add(gid)
+            fecha_utc = pd.Timestamp(fecha_utc).to_pydatetime()
+            if fk_juego not in marcas or fecha_utc > marcas[fk_juego]:
+                marcas[fk_juego] = fecha_utc
+    appids = set(appids)
+    return ({a: g for a, g in conocidas.items() if a in appids},
+            {a: m for a, m in marcas.items() if a in appids})
+
+# ---------------------------------------------------------------------------
+# 2. DESCARGA INCREMENTAL
+# ---------------------------------------------------------------------------
+
+def a_fila(appid, noticia):
+    instante = datetime.datetime.fromtimestamp(noticia['date'], datetime.timezone.utc)
+    return {
+        'fk_juego': appid,
+        'gid': str(noticia['gid']),
+        'fecha_utc': instante.replace(tzinfo=None),
+        'fk_tiempo': instante.astimezone(steam_etl.tz_mexico).date(),
+        'feedtype': int(noticia.get('feedtype', 0) or 0),
+        'es_parche': int('patchnotes' in (noticia.get('tags') or [])),
+        'fuente': (noticia.get('feedlabel') or noticia.get('feedname') or '')[:64],
+        'titulo': (noticia.get('title') or '')[:300],
+    }
+
+
+def noticias_nuevas(appid, session=requests, conocidas=frozenset(), marca=None):
+    """
+    Noticias que no están en el índice. Se detiene en el primer gid conocido
+    o en la primera noticia anterior a la marca. Sin índice (juego nuevo)
+    solo se toma la primera página. Devuelve (filas, peticiones).
+    """
+    nuevas, peticiones, fin = [], 0, None
+    cantidad = PRIMERA_PAGINA if marca is not None else PAGINA
+    while peticiones < MAX_PAGINAS:
+        params = {'appid': appid, 'count': cantidad, 'maxlength': 1, 'format': 'json'}
+        if fin is not None:
+            params['enddate'] = fin
+        items = (
+            session.get(URL_NOTICIAS, params=params, headers=HEADERS_STEAM, timeout=10)
+            .json()
+            .get('appnews', {})
+            .get('newsitems', [])
+        )
+        peticiones += 1
+
+        vistas = {f['gid'] for f in nuevas}
+        alcanzado = False
+        for noticia in items:
+            fila = a_fila(appid, noticia)
+            if fila['gid'] in conocidas or (marca is not None and fila['fecha_utc'] < marca):
+                alcanzado = True
+                break
+            if fila['gid'] not in vistas:
+                nuevas.append(fila)
+
+        if alcanzado or marca is None or len(items) < cantidad:
+            break
+        # Todo lo recibido era nuevo: la página anterior puede tener más
+        fin = min(n['date'] for n in items)
+        cantidad = PAGINA
+    return nuevas, peticiones
+
+
+def actualizar_noticias(engine, appids, session=requests, fecha=None, hilos=4):
+    """
+    Descarga solo lo nuevo de cada juego, lo agrega a noticias_juego y
+    devuelve {appid: hubo_actualizacion} para 'fecha'. Sin engine no hay
+    índice: se revisa solo la primera página de cada juego.
+    """
+    fecha = fecha or steam_etl.hoy
+    conocidas, marcas = {}, {}
+    if engine is not None:
+        asegurar_tablas(engine, 'noticias_juego')
+        conocidas, marcas = leer_indice(engine, appids)
+
+    def revisar(appid):
+        try:
+            return noticias_nuevas(appid, session, conocidas.get(appid, frozenset()), marcas.get(appid))
+        except Exception as e:
+            print(f"   │  └─ ⚠️  [{appid}] API News falló: {e}")
+            return [], 1
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        resultados = dict(zip(appids, pool.map(revisar, appids)))
+    filas = [f for nuevas, _ in resultados.values() for f in nuevas]
+    peticiones = sum(p for _, p in resultados.values())
+
+    if engine is not None and filas:
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO noticias_juego
+                    (fk_juego, gid, fecha_utc, fk_tiempo, feedtype, es_parche, fuente, titulo)
+                VALUES (:fk_juego, :gid, :fecha_utc, :fk_tiempo, :feedtype, :es_parche, :fuente, :titulo)
+                ON CONFLICT (fk_juego, gid) DO NOTHING
+            """), filas)
+    print(f"   └─ 📰 [noticias] {len(filas)} noticias nuevas en {peticiones} peticiones "
+          f"({len(appids)} juegos)")
+
+    # El día se evalúa contra todo el historial: una segunda corrida del día
+    # ya no ve la noticia como nueva, pero debe seguir marcando el parche
+    if engine is not None:
+        consulta = text(
+            "SELECT DISTINCT fk_juego FROM noticias_juego WHERE fk_tiempo = :d AND feedtype = 1"
+        ).bindparams(bindparam('d', type_=Date))
+        with engine.connect() as conn:
+            con_parche = {r[0] for r in conn.execute(consulta, {"d": fecha})}
+    else:
+        con_parche = {f['fk_juego'] for f in filas if f['fk_tiempo'] == fecha and f['feedtype'] == 1}
+    return {appid: int(appid in con_parche) for appid in appids}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Noticias y parches nuevos de Steam")
+    parser.add_argument('--appids', help="Lista separada por comas (por defecto, los juegos del ETL)")
+    args = parser.parse_args()
+
+    appids = [int(a) for a in args.appids.split(',')] if args.appids else steam_etl.juegos_ids
+    actualizaciones = actualizar_noticias(crear_engine(), appids)
+    for appid, hubo in actualizaciones.items():
+        if hubo:
+            print(f"   🛠️  [{appid}] Actualización/Parche hoy")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Nubes de palabras pre-renderizadas por juego
+# Descripción: Suma hechos_terminos por juego en ventanas de días (7 y 30 por
+#              defecto), renderiza la nube (WordCloud → PNG) en un pool de
+#              procesos y la guarda en nubes_palabras junto con los pesos de
+#              los términos en JSON. El layout de WordCloud es CPU intensivo:
+#              nunca corre dentro de Streamlit, el dashboard solo lee la tabla.
+#              Si los términos de una ventana no cambiaron (misma huella) no
+#              se vuelve a renderizar.
+# Uso:
+#   python nubes.py [--procesos 4] [--ventanas 7,30]
+# =============================================================================
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from sqlalchemy import text
+
+from capa_datos import consulta_desde, fecha_corte
+from conexion import crear_engine
+from esquema import asegurar_tablas
+
+VENTANAS_DIAS = (7, 30)
+TERMINOS_POR_NUBE = 100
+NUBES_POR_LOTE = 20
+ANCHO_NUBE, ALTO_NUBE = 800, 400
+
+# ---------------------------------------------------------------------------
+# 1. RENDER (corre dentro de los procesos hijos)
+# ---------------------------------------------------------------------------
+
+def renderizar_png(frecuencias):
+    """PNG (bytes) de la nube para un dict {termino: frecuencia}."""
+    from wordcloud import WordCloud
+
+    nube = WordCloud(
+        width=ANCHO_NUBE, height=ALTO_NUBE, mode='RGBA', background_color=None,
+        colormap='cool', prefer_horizontal=0.9, random_state=42,
+    ).generate_from_frequencies(frecuencias)
+    buffer = io.BytesIO()
+    nube.to_image().save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def procesar_lote(lote):
+    """
+    Unidad de trabajo de un proceso hijo: lista de (clave, frecuencias).
+    Devuelve [(clave, png_base64 o None)].
+    """
+    resultados = []
+    for clave, frecuencias in lote:
+        try:
+            png = base64.b64encode(renderizar_png(frecuencias)).decode('ascii')
+        except Exception as e:
+            print(f"   │  └─ ⚠️  [{clave[0]}] Nube de {clave[1]} días falló: {e}")
+            png = None
+        resultados.append((clave, png))
+    return resultados
+
+# ---------------------------------------------------------------------------
+# 2. LECTURA / ESCRITURA
+# ---------------------------------------------------------------------------
+
+def leer_terminos(engine, dias):
+    """Términos de los últimos 'dias' días (respecto a la fecha más reciente)."""
+    corte = fecha_corte(engine, 'hechos_terminos', dias)
+    if corte is None:
+        return pd.DataFrame(columns=['fk_juego', 'fk_tiempo', 'termino', 'frecuencia'])
+    return pd.read_sql(
+        consulta_desde("""
+            SELECT fk_juego, fk_tiempo, termino, frecuencia
+            FROM hechos_terminos
+            WHERE fk_tiempo > :corte
+        """),
+        engine,
+        params={"corte": corte},
+        parse_dates=['fk_tiempo'],
+    )
+
+
+def leer_huellas(engine):
+    df = pd.read_sql("SELECT fk_juego, ventana_dias, huella FROM nubes_palabras", engine)
+    return {(int(r.fk_juego), int(r.ventana_dias)): r.huella for r in df.itertuples()}
+
+
+def agregar_ventanas(terminos, ventanas):
+    """
+    {(appid, ventana): (fecha_base, {termino: frecuencia})} con los
+    TERMINOS_POR_NUBE más frecuentes de cada ventana.
+    """
+    fecha_base = terminos['fk_tiempo'].max()
+    nubes = {}
+    for ventana in ventanas:
+        recientes = terminos[terminos['fk_tiempo'] > fecha_base - pd.Timedelta(days=ventana)]
+        sumas = recientes.groupby(['fk_juego', 'termino'])['frecuencia'].sum().reset_index()
+        sumas = sumas.sort_values(['fk_juego', 'frecuencia', 'termino'], ascending=[True, False, True])
+        for appid, grupo in sumas.groupby('fk_juego', sort=False):
+            top = grupo.head(TERMINOS_POR_NUBE)
+            nubes[(int(appid), ventana)] = (
+                fecha_base.date(),
+                dict(zip(top['termino'].tolist(), top['frecuencia'].astype(int).tolist())),
+            )
+    return nubes
+
+
+def huella(frecuencias):
+    return hashlib.sha1(json.dumps(frecuencias, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def guardar(engine, filas):
+    df = pd.DataFrame(filas)[['fk_juego', 'ventana_dias', 'fecha_base', 'huella', 'terminos', 'imagen_png']]
+    with engine.begin() as conn:
+        conn.execute(
+            text("DELETE FROM nubes_palabras WHERE fk_juego = :j AND ventana_dias = :v"),
+            [{"j": int(r.fk_juego), "v": int(r.ventana_dias)} for r in df.itertuples()]
+        )
+        df.to_sql('nubes_palabras', conn, if_exists='append', index=False, method='multi', chunksize=500)
+    return len(df)
+
+# ---------------------------------------------------------------------------
+# 3. ORQUESTACIÓN
+# ---------------------------------------------------------------------------
+
+def generar_nubes(engine, procesos=None, ventanas=VENTANAS_DIAS):
+    """Etapa completa: agrega términos, renderiza lo que cambió y guarda."""
+    asegurar_tablas(engine, 'hechos_terminos', 'nubes_palabras')
+    terminos = leer_terminos(engine, max(ventanas))
+    if terminos.empty:
+        print("   └─ ⚠️  [nubes] hechos_terminos vacía — nada que renderizar")
+        return 0
+
+    previas = leer_huellas(engine)
+    nubes, pendientes = agregar_ventanas(terminos, ventanas), {}
+    for clave, (fecha_base, frecuencias) in nubes.items():
+        h = huella(frecuencias)
+        if previas.get(clave) != h:
+            pendientes[clave] = (fecha_base, frecuencias, h)
+
+    if not pendientes:
+        print("   └─ ✅ [nubes] Sin cambios en los términos — se reutilizan las nubes guardadas")
+        return 0
+
+    tareas = [(clave, frecuencias) for clave, (_, frecuencias, _) in pendientes.items()]
+    lotes = [tareas[i:i + NUBES_POR_LOTE] for i in range(0, len(tareas), NUBES_POR_LOTE)]
+    procesos = min(procesos or os.cpu_count() or 1, len(lotes))
+
+    filas = []
+    # spawn: el pipeline llega aquí desde un hilo, y fork con hilos vivos no es seguro
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+        for resultados in pool.map(procesar_lote, lotes):
+            for (appid, ventana), png in resultados:
+                fecha_base, frecuencias, h = pendientes[(appid, ventana)]
+                filas.append({
+                    'fk_juego': appid, 'ventana_dias': ventana, 'fecha_base': fecha_base,
+                    'huella': h, 'terminos': json.dumps(frecuencias, ensure_ascii=False),
+                    'imagen_png': png,
+                })
+
+    total = guardar(engine, filas)
+    print(f"   └─ ☁️  [nubes] {total} nubes renderizadas, {len(nubes) - len(pendientes)} sin cambios "
+          f"(ventanas: {', '.join(f'{v}d' for v in ventanas)})")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nubes de palabras pre-renderizadas por juego")
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--ventanas', default=",".join(str(v) for v in VENTANAS_DIAS),
+                        help="Ventanas en días separadas por comas")
+    args = parser.parse_args()
+
+    engine = crear_engine()
+    if engine is None:
+        print("❌ ERROR: Falta configurar DB_URI.")
+    else:
+        generar_nubes(engine, args.procesos, tuple(int(v) for v in args.ventanas.split(',')))
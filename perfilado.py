@@ -0,0 +1,187 @@
+# =============================================================================
+# STEAM-BI | Perfilado del dashboard (tiempos por rerun)
+# Descripción: Cada rerun de dashboard.py registra el tiempo de pared de sus
+#              secciones (medir), de las funciones pesadas (cronometrar) y de
+#              las funciones cacheadas (cacheada: además acierto/fallo de
+#              caché y tamaño del resultado). Registrar solo cuesta un
+#              perf_counter por llamada, así que siempre está activo.
+#              Salidas (opcionales):
+#                ?perfil=1 en la URL o DASHBOARD_PERFIL=1 → panel en el sidebar
+#                PERFIL_ARCHIVO=perfil.jsonl → una línea JSON por rerun
+#                PERFIL_LOG=1 → la misma línea JSON por stdout
+#              PRESUPUESTOS_MS fija el presupuesto de cada pestaña; lo que se
+#              pase se marca en el panel y en el JSON ('excedidos').
+# =============================================================================
+
+import contextlib
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+
+# Presupuesto de tiempo de pared por sección (ms)
+PRESUPUESTOS_MS = {
+    'carga_datos': 1500,
+    'sidebar': 800,
+    'tab_mercado': 1200,
+    'tab_simulador': 600,
+    'tab_explorador': 400,
+    'tab_nlp': 1000,
+    'rerun': 3000,
+}
+
+ARCHIVO_METRICAS = os.getenv('PERFIL_ARCHIVO')
+LOG_STDOUT = os.getenv('PERFIL_LOG') == '1'
+
+# Streamlit ejecuta el script de cada sesión en su propio hilo
+_local = threading.local()
+_lock_archivo = threading.Lock()
+
+
+class Rerun:
+    """Registros de una ejecución del script."""
+
+    def __init__(self, sesion=None):
+        self.sesion = sesion
+        self.inicio = time.perf_counter()
+        self.registros = []
+
+    def agregar(self, nombre, tipo, ms, acierto=None, bytes_=None):
+        self.registros.append({'nombre': nombre, 'tipo': tipo, 'ms': round(ms, 2),
+                               'acierto': acierto, 'bytes': bytes_})
+
+
+def iniciar_rerun(sesion=None):
+    _local.rerun = Rerun(sesion)
+    return _local.rerun
+
+
+def _registrar(nombre, tipo, inicio, **extra):
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is not None:
+        rerun.agregar(nombre, tipo, (time.perf_counter() - inicio) * 1000, **extra)
+
+
+def tamano_bytes(valor):
+    """Tamaño aproximado del resultado (DataFrames sin deep: barato en cada rerun)."""
+    if hasattr(valor, 'memory_usage'):
+        try:
+            return int(valor.memory_usage(index=True, deep=False).sum())
+        except TypeError:
+            return None
+    if isinstance(valor, (bytes, bytearray, str)):
+        return len(valor)
+    if isinstance(valor, (tuple, list)):
+        tamanos = [tamano_bytes(v) for v in valor]
+        return sum(t for t in tamanos if t) or None
+    return None
+
+# ---------------------------------------------------------------------------
+# 1. GANCHOS
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def medir(nombre):
+    """Tiempo de pared de un bloque (pestaña, sección, formateo...)."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registrar(nombre, 'seccion', inicio)
+
+
+def cronometrar(funcion):
+    """Decorador para funciones no cacheadas (p. ej. generar_pdf)."""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = funcion(*args, **kwargs)
+        _registrar(funcion.__name__, 'funcion', inicio, bytes_=tamano_bytes(resultado))
+        return resultado
+    return envoltura
+
+
+def cacheada(decorador_cache):
+    """
+    Envuelve st.cache_data / st.cache_resource:
+        @perfilado.cacheada(st.cache_data(ttl=600))
+    La función interna solo corre en un fallo de caché; al correr marca el
+    hilo, y la envoltura externa distingue así acierto de fallo.
+    """
+    def decorar(funcion):
+        @functools.wraps(funcion)
+        def interna(*args, **kwargs):
+            _local.fallo = True
+            return funcion(*args, **kwargs)
+
+        en_cache = decorador_cache(interna)
+
+        @functools.wraps(funcion)
+        def externa(*args, **kwargs):
+            anterior = getattr(_local, 'fallo', False)
+            _local.fallo = False
+            inicio = time.perf_counter()
+            try:
+                resultado = en_cache(*args, **kwargs)
+            finally:
+                fallo = _local.fallo
+                _local.fallo = anterior
+            _registrar(funcion.__name__, 'cache', inicio, acierto=not fallo, bytes_=tamano_bytes(resultado))
+            return resultado
+
+        externa.clear = en_cache.clear
+        return externa
+    return decorar
+
+# ---------------------------------------------------------------------------
+# 2. CIERRE DEL RERUN Y EXPORTACIÓN
+# ---------------------------------------------------------------------------
+
+def excedidos(registros):
+    return [
+        {'nombre': r['nombre'], 'ms': r['ms'], 'presupuesto_ms': PRESUPUESTOS_MS[r['nombre']]}
+        for r in registros
+        if r['tipo'] == 'seccion' and r['nombre'] in PRESUPUESTOS_MS and r['ms'] > PRESUPUESTOS_MS[r['nombre']]
+    ]
+
+
+def cerrar_rerun():
+    """Resumen del rerun (dict serializable); lo exporta si está configurado."""
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is None:
+        return None
+    _local.rerun = None
+    rerun.agregar('rerun', 'seccion', (time.perf_counter() - rerun.inicio) * 1000)
+    resumen = {
+        'instante': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'sesion': rerun.sesion,
+        'total_ms': rerun.registros[-1]['ms'],
+        'registros': rerun.registros,
+        'excedidos': excedidos(rerun.registros),
+    }
+    if ARCHIVO_METRICAS or LOG_STDOUT:
+        linea = json.dumps(resumen, ensure_ascii=False)
+        if LOG_STDOUT:
+            print(linea, flush=True)
+        if ARCHIVO_METRICAS:
+            with _lock_archivo, open(ARCHIVO_METRICAS, 'a', encoding='utf-8') as f:
+                f.write(linea + "\n")
+    return resumen
+
+
+def mostrar_panel(resumen):
+    """Panel de depuración en el sidebar (solo si se pidió con ?perfil=1)."""
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander(f"🧪 Perfilado · {resumen['total_ms']:,.0f} ms", expanded=True):
+        tabla = pd.DataFrame(resumen['registros'])
+        tabla['cache'] = tabla['acierto'].map({True: 'acierto', False: 'fallo'}).fillna('')
+        tabla['KB'] = (tabla['bytes'] / 1024).round(1)
+        st.dataframe(tabla[['nombre', 'tipo', 'ms', 'cache', 'KB']], hide_index=True, use_container_width=True)
+        for exceso in resumen['excedidos']:
+            st.warning(f"⏱️ {exceso['nombre']}: {exceso['ms']:,.0f} ms (presupuesto {exceso['presupuesto_ms']:,} ms)")
+        if ARCHIVO_METRICAS:
+            st.caption(f"Exportando a {ARCHIVO_METRICAS}")
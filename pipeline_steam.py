@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Orquestador único del pipeline diario
+# Descripción: Ejecuta steam_etl.py y scraper_steam_diario.py en un solo
+#              proceso como un DAG de etapas. Las etapas independientes
+#              corren en paralelo y comparten engine y sesión HTTP.
+# Uso:
+#   python pipeline_steam.py                      # pipeline completo
+#   python pipeline_steam.py --etapas nlp         # una etapa (+ sus dependencias)
+#   python pipeline_steam.py --listar             # muestra el DAG
+# =============================================================================
+
+import argparse
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+import anomalias
+import catalogo_juegos
+import esquema
+import migrar
+import noticias_steam
+import nubes
+import precios_steam
+import pronosticos
+import replica
+import scraper_steam_diario as scraper
+import steam_etl
+from conexion import SesionSteam, crear_engine, crear_engine_backup
+
+# ---------------------------------------------------------------------------
+# 1. CONTEXTO COMPARTIDO
+# ---------------------------------------------------------------------------
+
+class ContextoPipeline:
+    """Recursos compartidos por todas las etapas de una corrida."""
+
+    def __init__(self, appids, fecha, engine=None, hilos=4):
+        self.appids = list(appids)
+        self.fecha = fecha
+        self.engine = engine
+        self.hilos = hilos
+        self.session = SesionSteam(hilos=hilos * 3)
+        self.resultados = {}
+        self._lock = threading.Lock()
+
+    def guardar(self, etapa, valor):
+        with self._lock:
+            self.resultados[etapa] = valor
+
+    def mapear(self, funcion, appids=None):
+        """Aplica funcion(appid) en paralelo. Devuelve {appid: resultado}."""
+        appids = self.appids if appids is None else appids
+        with ThreadPoolExecutor(max_workers=self.hilos) as pool:
+            return dict(zip(appids, pool.map(funcion, appids)))
+
+# ---------------------------------------------------------------------------
+# 2. ETAPAS
+# ---------------------------------------------------------------------------
+
+Etapa = namedtuple('Etapa', ['nombre', 'funcion', 'dependencias', 'descripcion'])
+
+def etapa_esquema(ctx):
+    if ctx.engine is None:
+        print("   └─ ⏭️  [esquema] Sin DB_URI — sin migraciones ni particiones")
+        return None
+    if migrar.es_postgres(ctx.engine):
+        migrar.preparar_esquema(ctx.engine, ctx.fecha)
+    else:
+        esquema.asegurar_estrella(ctx.engine, ctx.appids)
+        print(f"   └─ 🗃️  [esquema] Esquema estrella listo en {ctx.engine.dialect.name} ({ctx.engine.url.database})")
+    return ctx.fecha
+
+def etapa_catalogo(ctx):
+    if ctx.engine is None:
+        print("   └─ ⏭️  [catalogo] Sin DB_URI — no se sincroniza dim_juego")
+        return 0
+    return catalogo_juegos.sincronizar_catalogo(ctx.engine, ctx.appids, ctx.session, ctx.hilos)
+
+def etapa_dimensiones(ctx):
+    if ctx.engine is None:
+        print("   └─ ⏭️  [dimensiones] Sin DB_URI — se omite dim_tiempo")
+        return None
+    steam_etl.asegurar_dim_tiempo(ctx.engine, ctx.fecha)
+    print(f"   └─ 📅 [dimensiones] dim_tiempo lista para {ctx.fecha}")
+    return ctx.fecha
+
+def etapa_resumen_resenas(ctx):
+    datos = ctx.mapear(lambda appid: steam_etl.extraer_datos(appid, ctx.session))
+    filas = [d for d in datos.values() if d is not None]
+    print(f"   └─ 📊 [resumen_resenas] {len(filas)}/{len(ctx.appids)} juegos con query_summary")
+    return pd.DataFrame(filas)
+
+def etapa_precios(ctx):
+    precios = precios_steam.consultar_precios(ctx.appids, ctx.session)
+    con_dato = sum(p is not None for p in precios.values())
+    print(f"   └─ 💰 [precios] {con_dato}/{len(ctx.appids)} juegos con estado de precio")
+    return precios
+
+def etapa_noticias(ctx):
+    return noticias_steam.actualizar_noticias(ctx.engine, ctx.appids, ctx.session, ctx.fecha, ctx.hilos)
+
+def etapa_progreso(ctx):
+    if ctx.engine is None:
+        return list(ctx.appids)
+    hechos = scraper.apps_cargadas(ctx.engine, ctx.fecha)
+    pendientes = [a for a in ctx.appids if a not in hechos]
+    print(f"   └─ ♻️  [progreso] {len(hechos)} juegos ya cargados hoy — {len(pendientes)} pendientes")
+    return pendientes
+
+def etapa_metadatos(ctx):
+    precios = ctx.resultados['precios']
+    actualizaciones = ctx.resultados['noticias']
+    return ctx.mapear(lambda appid: scraper.consultar_apis(
+        appid, ctx.session, precios.get(appid), actualizaciones.get(appid)), ctx.resultados['progreso'])
+
+def etapa_nlp(ctx):
+    return ctx.mapear(lambda appid: scraper.analizar_resenas(appid, ctx.session), ctx.resultados['progreso'])
+
+def etapa_carga_resenas(ctx):
+    df = ctx.resultados['resumen_resenas']
+    if ctx.engine is None:
+        print("   └─ ⏭️  [carga_resenas] Sin DB_URI — no se cargan hechos_resenas_steam")
+        return 0
+    if df.empty:
+        print("   └─ ⚠️  [carga_resenas] No se obtuvieron datos válidos para cargar.")
+        return 0
+    steam_etl.preparar_supabase(ctx.engine)
+    steam_etl.cargar_resenas(ctx.engine, df)
+    print(f"   └─ ✅ [carga_resenas] {len(df)} registros en hechos_resenas_steam")
+    return len(df)
+
+def etapa_carga_precios(ctx):
+    if ctx.engine is None:
+        print("   └─ ⏭️  [carga_precios] Sin DB_URI — no se carga hechos_precios")
+        return 0
+    return precios_steam.cargar_precios(ctx.engine, ctx.resultados['precios'], ctx.fecha)
+
+def etapa_carga_sentimiento(ctx):
+    apis = ctx.resultados['metadatos']
+    nlp = ctx.resultados['nlp']
+    resultados = [
+        scraper.resultado_app(appid, apis[appid], nlp[appid], ctx.fecha)
+        for appid in ctx.resultados['progreso']
+    ]
+    scraper.cargar_resultados(resultados, ctx.engine, ctx.fecha)
+    return sum(r['resumen'] is not None for r in resultados)
+
+def etapa_pronosticos(ctx):
+    if ctx.engine is None:
+        print("   └─ ⏭️  [pronosticos] Sin DB_URI — se omiten los pronósticos")
+        return 0
+    return pronosticos.generar_pronosticos(ctx.engine)
+
+def etapa_anomalias(ctx):
+    if ctx.engine is None:
+        print("   └─ ⏭️  [anomalias] Sin DB_URI — se omite la detección de anomalías")
+        return 0
+    return anomalias.detectar_anomalias(ctx.engine)
+
+def etapa_nubes(ctx):
+    if ctx.engine is None:
+        print("   └─ ⏭️  [nubes] Sin DB_URI — no se renderizan nubes de palabras")
+        return 0
+    return nubes.generar_nubes(ctx.engine)
+
+def etapa_replica(ctx):
+    if ctx.engine is None:
+        print("   └─ ⏭️  [replica] Sin DB_URI — no hay nada que replicar")
+        return 0
+    backup = crear_engine_backup()
+    if backup is None:
+        print("   └─ ⏭️  [replica] Sin DB_URI_BACKUP — se omite la réplica")
+        return 0
+    return replica.sincronizar(ctx.engine, backup, hoy=ctx.fecha)
+
+ETAPAS = {e.nombre: e for e in [
+    Etapa('esquema', etapa_esquema, (), "Migraciones/particiones (Postgres) o esquema estrella embebido"),
+    Etapa('catalogo', etapa_catalogo, ('esquema',), "dim_juego: huérfanos, juegos nuevos/vencidos e historial"),
+    Etapa('dimensiones', etapa_dimensiones, ('esquema',), "Inserta la fecha del día en dim_tiempo"),
+    Etapa('resumen_resenas', etapa_resumen_resenas, (), "query_summary de appreviews por juego"),
+    Etapa('precios', etapa_precios, (), "Precios y descuentos por lotes (filters=price_overview)"),
+    Etapa('noticias', etapa_noticias, ('esquema',), "Noticias nuevas por gid + historial de parches"),
+    Etapa('progreso', etapa_progreso, ('esquema',), "Juegos del día aún sin cargar (progreso_scraper)"),
+    Etapa('metadatos', etapa_metadatos, ('precios', 'noticias', 'progreso'), "Jugadores activos, ofertas y parches"),
+    Etapa('nlp', etapa_nlp, ('progreso',), "Scraping de reseñas + idioma + sentimiento"),
+    Etapa('carga_resenas', etapa_carga_resenas, ('dimensiones', 'catalogo', 'resumen_resenas'),
+          "Carga hechos_resenas_steam"),
+    Etapa('carga_precios', etapa_carga_precios, ('dimensiones', 'catalogo', 'precios'),
+          "Carga hechos_precios (historial de precio y descuento)"),
+    Etapa('carga_sentimiento', etapa_carga_sentimiento, ('dimensiones', 'catalogo', 'metadatos', 'nlp'),
+          "Carga hechos_sentimiento en micro-lotes (o CSV local)"),
+    Etapa('pronosticos', etapa_pronosticos, ('carga_sentimiento',),
+          "Pronósticos ETS de jugadores y polaridad por juego"),
+    Etapa('anomalias', etapa_anomalias, ('carga_sentimiento',),
+          "EWMA incremental por juego + alertas de anomalías"),
+    Etapa('nubes', etapa_nubes, ('carga_sentimiento',),
+          "Nubes de palabras pre-renderizadas (7 y 30 días) por juego"),
+    Etapa('replica', etapa_replica,
+          ('carga_resenas', 'carga_precios', 'carga_sentimiento', 'pronosticos', 'anomalias', 'nubes'),
+          "Copia lo pendiente a DB_URI_BACKUP (catch-up durable)"),
+]}
+
+# ---------------------------------------------------------------------------
+# 3. EJECUCIÓN DEL DAG
+# ---------------------------------------------------------------------------
+
+def resolver_etapas(nombres):
+    """Cierre transitivo de dependencias para las etapas pedidas."""
+    requeridas = set()
+    pendientes = list(nombres)
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre not in ETAPAS:
+            raise ValueError(f"Etapa desconocida: {nombre}. Disponibles: {', '.join(ETAPAS)}")
+        if nombre not in requeridas:
+            requeridas.add(nombre)
+            pendientes.extend(ETAPAS[nombre].dependencias)
+    return requeridas
+
+def ejecutar(ctx, nombres=None):
+    """
+    Corre las etapas en cuanto sus dependencias terminan.
+    Si una etapa falla, sus dependientes no se ejecutan pero las ramas
+    independientes siguen; al final se relanza el primer error.
+    """
+    pendientes = resolver_etapas(nombres or ETAPAS)
+    completadas, fallidas = set(), {}
+    en_curso = {}
+
+    with ThreadPoolExecutor(max_workers=len(ETAPAS)) as pool:
+        while pendientes or en_curso:
+            for nombre in sorted(pendientes):
+                deps = set(ETAPAS[nombre].dependencias)
+                if deps & set(fallidas):
+                    print(f"⏭️  Etapa '{nombre}' omitida: dependencia fallida")
+                    pendientes.discard(nombre)
+                    fallidas[nombre] = None
+                elif deps <= completadas:
+                    print(f"▶️  Etapa '{nombre}' — {ETAPAS[nombre].descripcion}")
+                    en_curso[pool.submit(ETAPAS[nombre].funcion, ctx)] = (nombre, time.perf_counter())
+                    pendientes.discard(nombre)
+
+            if not en_curso:
+                continue
+
+            terminadas, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminadas:
+                nombre, inicio = en_curso.pop(futuro)
+                duracion = time.perf_counter() - inicio
+                try:
+                    ctx.guardar(nombre, futuro.result())
+                    completadas.add(nombre)
+                    print(f"✅ Etapa '{nombre}' completada en {duracion:.1f}s")
+                except Exception as e:
+                    fallidas[nombre] = e
+                    print(f"❌ Etapa '{nombre}' falló tras {duracion:.1f}s: {e}")
+
+    errores = [e for e in fallidas.values() if e is not None]
+    if errores:
+        raise errores[0]
+    return ctx.resultados
+
+# ---------------------------------------------------------------------------
+# 4. CLI
+# ---------------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline diario Steam-BI (ETL + NLP)")
+    parser.add_argument('--etapas', help="Lista separada por comas; incluye sus dependencias")
+    parser.add_argument('--hilos', type=int, default=4, help="Juegos procesados en paralelo por etapa")
+    parser.add_argument('--listar', action='store_true', help="Muestra las etapas y termina")
+    args = parser.parse_args(argv)
+
+    if args.listar:
+        for etapa in ETAPAS.values():
+            deps = ", ".join(etapa.dependencias) or "—"
+            print(f"{etapa.nombre:<18} deps: {deps:<36} {etapa.descripcion}")
+        return 0
+
+    nombres = args.etapas.split(',') if args.etapas else None
+
+    print("=======================================================================")
+    print("🚀 PIPELINE STEAM-BI (ETL + NLP en un solo proceso)")
+    print(f"   Fecha México: {steam_etl.hoy}")
+    print("=======================================================================")
+
+    ctx = ContextoPipeline(steam_etl.juegos_ids, steam_etl.hoy, crear_engine(), hilos=args.hilos)
+    try:
+        ejecutar(ctx, nombres)
+    except Exception as e:
+        print(f"❌ ERROR CRÍTICO: El pipeline falló debido a: {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Precios y descuentos de la tienda por lotes
+# Descripción: appdetails con filters=price_overview acepta muchos appids en
+#              una sola llamada y devuelve solo el bloque de precio (unos
+#              cientos de bytes por juego en lugar del payload completo).
+#              - Lotes de APPIDS_POR_LLAMADA; si un lote falla (respuesta
+#                vacía, no-JSON o error HTTP) se reintenta juego por juego.
+#              - Se guarda el estado completo (moneda, precio inicial/final,
+#                % de descuento) en hechos_precios, una fila por juego/día/país;
+#                en_oferta de hechos_sentimiento se deriva de aquí.
+# Uso:
+#   python precios_steam.py                     # juegos del ETL, país 'us'
+#   python precios_steam.py --appids 440,730 --pais mx
+# =============================================================================
+
+import argparse
+import time
+
+import pandas as pd
+import requests
+from sqlalchemy import text
+
+import steam_etl
+from conexion import HEADERS_STEAM, crear_engine
+from esquema import asegurar_tablas
+
+URL_APPDETAILS = "https://store.steampowered.com/api/appdetails"
+APPIDS_POR_LLAMADA = 100
+PAIS = 'us'
+ESPERA_LIMITE_S = 30
+
+# ---------------------------------------------------------------------------
+# 1. PARSEO
+# ---------------------------------------------------------------------------
+
+def parsear_precio(entrada):
+    """
+    Estado de precio de una entrada de appdetails, o None si Steam no la
+    reconoce. Los juegos sin price_overview (gratis o sin lanzar) quedan con
+    con_precio=0 y precios nulos.
+    """
+    if not isinstance(entrada, dict) or not entrada.get('success'):
+        return None
+    datos = entrada.get('data')
+    precio = datos.get('price_overview') if isinstance(datos, dict) else None
+    if not precio:
+        return {'con_precio': 0, 'moneda': None, 'precio_inicial': None,
+                'precio_final': None, 'descuento_pct': 0}
+    return {
+        'con_precio': 1,
+        'moneda': precio.get('currency'),
+        'precio_inicial': precio.get('initial'),     # centavos
+        'precio_final': precio.get('final'),
+        'descuento_pct': int(precio.get('discount_percent', 0) or 0),
+    }
+
+# ---------------------------------------------------------------------------
+# 2. DESCARGA
+# ---------------------------------------------------------------------------
+
+def _pedir(appids, session, pais):
+    """Una llamada filtrada. Devuelve el dict de Steam o None si el lote falló."""
+    params = {'appids': ",".join(str(a) for a in appids), 'filters': 'price_overview', 'cc': pais}
+    for intento in range(2):
+        try:
+            respuesta = session.get(URL_APPDETAILS, params=params, headers=HEADERS_STEAM, timeout=15)
+        except requests.RequestException:
+            return None
+        if respuesta.status_code == 429 and intento == 0:
+            time.sleep(ESPERA_LIMITE_S)
+            continue
+        if not respuesta.ok:
+            return None
+        try:
+            cuerpo = respuesta.json()
+        except ValueError:
+            return None
+        return cuerpo if isinstance(cuerpo, dict) else None
+    return None
+
+
+def consultar_precios(appids, session=requests, pais=PAIS):
+    """{appid: estado de precio} para todos los appids (None si no hay dato)."""
+    precios = {}
+    appids = list(appids)
+    for i in range(0, len(appids), APPIDS_POR_LLAMADA):
+        lote = appids[i:i + APPIDS_POR_LLAMADA]
+        cuerpo = _pedir(lote, session, pais)
+        if cuerpo is None and len(lote) > 1:
+            print(f"   │  └─ ⚠️  [precios] Lote de {len(lote)} falló — reintentando juego por juego")
+            cuerpo = {}
+            for appid in lote:
+                cuerpo.update(_pedir([appid], session, pais) or {})
+        for appid in lote:
+            precios[appid] = parsear_precio((cuerpo or {}).get(str(appid)))
+    return precios
+
+# ---------------------------------------------------------------------------
+# 3. CARGA
+# ---------------------------------------------------------------------------
+
+def construir_filas(precios, fecha, pais=PAIS):
+    return pd.DataFrame([
+        {'fk_juego': appid, 'fk_tiempo': fecha, 'pais': pais, **estado}
+        for appid, estado in precios.items() if estado is not None
+    ])
+
+
+def cargar_precios(engine, precios, fecha, pais=PAIS):
+    """Reemplaza el día/país en hechos_precios (idempotente)."""
+    df = construir_filas(precios, fecha, pais)
+    asegurar_tablas(engine, 'hechos_precios')
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM hechos_precios WHERE fk_tiempo = :d AND pais = :p"),
+                     {"d": fecha, "p": pais})
+        if not df.empty:
+            df.to_sql('hechos_precios', conn, if_exists='append', index=False, method='multi', chunksize=2000)
+    en_oferta = int((df['descuento_pct'] > 0).sum()) if not df.empty else 0
+    print(f"   └─ 💰 [precios] {len(df)} precios cargados ({en_oferta} en oferta) para {fecha}")
+    return len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precios y descuentos de Steam por lotes")
+    parser.add_argument('--appids', help="Lista separada por comas (por defecto, los juegos del ETL)")
+    parser.add_argument('--pais', default=PAIS, help="Código de país de la tienda (cc)")
+    args = parser.parse_args()
+
+    appids = [int(a) for a in args.appids.split(',')] if args.appids else steam_etl.juegos_ids
+    precios = consultar_precios(appids, pais=args.pais)
+    engine = crear_engine()
+    if engine is None:
+        print(construir_filas(precios, steam_etl.hoy, args.pais).to_string(index=False))
+    else:
+        steam_etl.asegurar_dim_tiempo(engine, steam_etl.hoy)
+        cargar_precios(engine, precios, steam_etl.hoy, args.pais)
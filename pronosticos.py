@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Pronósticos por juego (jugadores activos + polaridad NLP)
+# Descripción: Ajusta un modelo ETS (statsmodels) por juego y métrica en un
+#              pool de procesos y guarda pronóstico + intervalos en
+#              pronosticos_juego. Nunca corre dentro de Streamlit: el
+#              dashboard solo lee la tabla.
+#              Ajuste incremental: el estado guarda parámetros y el nivel /
+#              tendencia / MSE finales, así que cada noche solo se leen las
+#              filas posteriores al estado y se avanzan las ecuaciones del
+#              ETS con esos días, sin optimizar. Se lee la historia completa
+#              y se reajusta cada REAJUSTE_COMPLETO_DIAS días, si falta un
+#              día en medio o si la serie aún no tiene estado.
+#              pronosticos_juego conserva las últimas PRONOSTICOS_RETENIDOS
+#              fechas base por juego y métrica.
+# Uso:
+#   python pronosticos.py [--procesos 4] [--horizonte 14]
+# =============================================================================
+
+import argparse
+import json
+import multiprocessing
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from conexion import crear_engine
+from esquema import asegurar_tablas
+
+METRICAS = {
+    # métrica: (límite inferior, límite superior) físicos del valor
+    'jugadores_activos': (0, None),
+    'polaridad_roberta': (-1, 1),
+}
+
+HORIZONTE_DIAS = 14
+MIN_OBSERVACIONES = 10
+REAJUSTE_COMPLETO_DIAS = 7
+NIVEL_CONFIANZA = 0.80
+SERIES_POR_LOTE = 50
+PRONOSTICOS_RETENIDOS = 30    # fechas base por juego y métrica
+
+# ---------------------------------------------------------------------------
+# 1. AJUSTE POR JUEGO (corre dentro de los procesos hijos)
+# ---------------------------------------------------------------------------
+
+def _serie_diaria(fechas, valores):
+    """
+    Serie con frecuencia diaria; los días faltantes se interpolan. Los NULL
+    (p. ej. jugadores de días reconstruidos por backfill.py) no son
+    observaciones: la serie empieza en el primer valor real.
+    """
+    serie = pd.Series(valores, index=pd.DatetimeIndex(fechas), dtype='float64').dropna()
+    serie = serie[~serie.index.duplicated(keep='last')].asfreq('D')
+    return serie.interpolate(limit_direction='both')
+
+
+def pronosticar(estado, horizonte):
+    """
+    Pronóstico ETS(A,Ad,N) desde el estado final: media
+    l + (φ + … + φ^h)·b y varianza mse·(1 + Σ_{j<h} (α + β·φ(1-φ^j)/(1-φ))²).
+    """
+    alpha, beta, phi = estado['params'][:3]
+    h = np.arange(1, horizonte + 1)
+    suma_phi = np.cumsum(phi ** h)
+    coeficientes = alpha + beta * suma_phi
+    varianza = estado['mse'] * (1 + np.concatenate([[0.0], np.cumsum(coeficientes[:-1] ** 2)]))
+    media = estado['nivel'] + suma_phi * estado['tendencia']
+    margen = NormalDist().inv_cdf(0.5 + NIVEL_CONFIANZA / 2) * np.sqrt(varianza)
+    return pd.DataFrame({
+        'fecha_pronostico': pd.date_range(pd.Timestamp(estado['ultima_fecha']) + pd.Timedelta(days=1),
+                                          periods=horizonte, freq='D'),
+        'horizonte': h,
+        'valor': media,
+        'limite_inferior': media - margen,
+        'limite_superior': media + margen,
+    })
+
+
+def ajustar_serie(serie, estado):
+    """Ajuste completo de un ETS aditivo amortiguado. Devuelve el nuevo estado."""
+    from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+
+    modelo = ETSModel(serie, error='add', trend='add', damped_trend=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        inicio = np.asarray(estado['params']) if estado else None
+        resultado = modelo.fit(start_params=inicio, disp=False)
+
+    return {
+        'ultima_fecha': serie.index[-1].date().isoformat(),
+        'n_obs': len(serie),
+        'ajustes_incrementales': 0,
+        'params': [float(p) for p in resultado.params],
+        'nivel': float(np.asarray(resultado.level)[-1]),
+        'tendencia': float(np.asarray(resultado.slope)[-1]),
+        'mse': float(resultado.mse),
+    }
+
+
+def actualizar_serie(serie, estado):
+    """
+    Avanza el estado con los días nuevos (consecutivos a ultima_fecha) usando
+    los parámetros guardados: e = y - (l + φb), l += φb + αe, b = φb + βe.
+    """
+    alpha, beta, phi = estado['params'][:3]
+    nivel, tendencia, sse = estado['nivel'], estado['tendencia'], estado['mse'] * estado['n_obs']
+    for y in serie.to_numpy():
+        error = y - (nivel + phi * tendencia)
+        nivel = nivel + phi * tendencia + alpha * error
+        tendencia = phi * tendencia + beta * error
+        sse += error ** 2
+    n_obs = estado['n_obs'] + len(serie)
+    return {
+        'ultima_fecha': serie.index[-1].date().isoformat(),
+        'n_obs': n_obs,
+        'ajustes_incrementales': estado['ajustes_incrementales'] + len(serie),
+        'params': estado['params'],
+        'nivel': float(nivel),
+        'tendencia': float(tendencia),
+        'mse': float(sse / n_obs),
+    }
+
+
+def procesar_lote(lote, horizonte):
+    """
+    Unidad de trabajo de un proceso hijo: una lista de
+    (appid, metrica, fechas, valores, estado, incremental). Con incremental
+    los valores son solo los días nuevos. Devuelve (filas, estados).
+    """
+    filas, estados = [], []
+    for appid, metrica, fechas, valores, estado, incremental in lote:
+        serie = _serie_diaria(fechas, valores)
+        if not incremental and len(serie) < MIN_OBSERVACIONES:
+            continue
+        try:
+            nuevo_estado = actualizar_serie(serie, estado) if incremental else ajustar_serie(serie, estado)
+            pronostico = pronosticar(nuevo_estado, horizonte)
+        except Exception as e:
+            print(f"   │  └─ ⚠️  [{appid}] ETS {metrica} falló: {e}")
+            continue
+
+        minimo, maximo = METRICAS[metrica]
+        for col in ('valor', 'limite_inferior', 'limite_superior'):
+            pronostico[col] = pronostico[col].clip(lower=minimo, upper=maximo)
+
+        pronostico['fk_juego'] = appid
+        pronostico['metrica'] = metrica
+        pronostico['fecha_base'] = pd.Timestamp(nuevo_estado['ultima_fecha']).date()
+        pronostico['modelo'] = 'ETS(A,Ad,N)'
+        filas.append(pronostico)
+        estados.append((appid, metrica, nuevo_estado))
+    return filas, estados
+
+# ---------------------------------------------------------------------------
+# 2. LECTURA / ESCRITURA
+# ---------------------------------------------------------------------------
+
+def leer_historia(engine, appids=None):
+    """
+    Sin 'appids': de cada juego solo las filas posteriores a su estado; toda
+    la historia si a alguna métrica le falta estado o le toca reajuste
+    completo ('desde' nulo). Con 'appids': la historia completa de esos juegos.
+    """
+    columnas = f"s.fk_juego, s.fk_tiempo, {', '.join('s.' + m for m in METRICAS)}"
+    if appids is not None:
+        consulta = text(f"""
+            SELECT {columnas}, NULL AS desde
+            FROM hechos_sentimiento s
+            WHERE s.fk_juego IN :appids
+            ORDER BY s.fk_juego, s.fk_tiempo
+        """).bindparams(bindparam('appids', expanding=True))
+        return pd.read_sql(consulta, engine, params={'appids': [int(a) for a in appids]})
+    return pd.read_sql(
+        text(f"""
+            SELECT {columnas}, e.desde
+            FROM hechos_sentimiento s
+            LEFT JOIN (
+                SELECT fk_juego, MIN(ultima_fecha) AS desde
+                FROM estado_pronosticos
+                GROUP BY fk_juego
+                HAVING COUNT(*) = :metricas AND MAX(ajustes_incrementales) < :reajuste
+            ) e ON e.fk_juego = s.fk_juego
+            WHERE e.desde IS NULL OR s.fk_tiempo > e.desde
+            ORDER BY s.fk_juego, s.fk_tiempo
+        """),
+        engine,
+        params={'metricas': len(METRICAS), 'reajuste': REAJUSTE_COMPLETO_DIAS},
+    )
+
+
+def leer_estados(engine):
+    estados = pd.read_sql(
+        "SELECT fk_juego, metrica, ultima_fecha, n_obs, ajustes_incrementales, params "
+        "FROM estado_pronosticos",
+        engine,
+    )
+    resultado = {}
+    for r in estados.itertuples():
+        guardado = json.loads(r.params)
+        if isinstance(guardado, list):
+            # Estados anteriores: solo parámetros, sin nivel/tendencia finales
+            guardado = {'params': guardado}
+        resultado[(int(r.fk_juego), r.metrica)] = {
+            'ultima_fecha': str(r.ultima_fecha),
+            'n_obs': int(r.n_obs),
+            'ajustes_incrementales': int(r.ajustes_incrementales),
+            **guardado,
+        }
+    return resultado
+
+
+def guardar(engine, filas, estados):
+    df = pd.concat(filas, ignore_index=True)
+    df = df[['fk_juego', 'metrica', 'fecha_base', 'fecha_pronostico', 'horizonte',
+             'valor', 'limite_inferior', 'limite_superior', 'modelo']]
+    df['fecha_pronostico'] = df['fecha_pronostico'].dt.date
+
+    df_estados = pd.DataFrame([
+        {'fk_juego': appid, 'metrica': metrica, 'ultima_fecha': e['ultima_fecha'],
+         'n_obs': e['n_obs'], 'ajustes_incrementales': e['ajustes_incrementales'],
+         'params': json.dumps({k: e[k] for k in ('params', 'nivel', 'tendencia', 'mse')})}
+        for appid, metrica, e in estados
+    ])
+
+    claves = df[['fk_juego', 'metrica', 'fecha_base']].drop_duplicates()
+    with engine.begin() as conn:
+        # Idempotente por (juego, métrica, fecha base): re-ejecutar el día reemplaza sus pronósticos
+        conn.execute(
+            text("DELETE FROM pronosticos_juego WHERE fk_juego = :j AND metrica = :m AND fecha_base = :d"),
+            [{"j": int(r.fk_juego), "m": r.metrica, "d": r.fecha_base} for r in claves.itertuples()]
+        )
+        conn.execute(
+            text("DELETE FROM estado_pronosticos WHERE fk_juego = :j AND metrica = :m"),
+            [{"j": int(r['fk_juego']), "m": r['metrica']} for r in df_estados.to_dict('records')]
+        )
+        df.to_sql('pronosticos_juego', conn, if_exists='append', index=False, method='multi', chunksize=5000)
+        df_estados.to_sql('estado_pronosticos', conn, if_exists='append', index=False, method='multi', chunksize=5000)
+        depurar(conn)
+    return len(df)
+
+
+def depurar(conn, retenidos=PRONOSTICOS_RETENIDOS):
+    """Borra las fechas base más viejas que las últimas 'retenidos' de cada juego y métrica."""
+    bases = pd.read_sql(text("SELECT DISTINCT fk_juego, metrica, fecha_base FROM pronosticos_juego"), conn)
+    cortes = (bases.sort_values('fecha_base', ascending=False)
+              .groupby(['fk_juego', 'metrica']).nth(retenidos - 1))
+    if not cortes.empty:
+        conn.execute(
+            text("DELETE FROM pronosticos_juego WHERE fk_juego = :j AND metrica = :m AND fecha_base < :d"),
+            [{"j": int(r.fk_juego), "m": r.metrica, "d": r.fecha_base} for r in cortes.itertuples()]
+        )
+
+# ---------------------------------------------------------------------------
+# 3. ORQUESTACIÓN
+# ---------------------------------------------------------------------------
+
+def generar_pronosticos(engine, procesos=None, horizonte=HORIZONTE_DIAS):
+    """Etapa completa: lee historia, ajusta en paralelo y guarda."""
+    asegurar_tablas(engine, 'pronosticos_juego', 'estado_pronosticos')
+    historia = leer_historia(engine)
+    if historia.empty:
+        print("   └─ ✅ [pronosticos] Sin filas nuevas en hechos_sentimiento")
+        return 0
+
+    estados_previos = leer_estados(engine)
+    tareas, completas, sin_dias_nuevos = [], [], 0
+    for appid, grupo in historia.groupby('fk_juego', sort=False):
+        appid = int(appid)
+        parcial = grupo['desde'].notna().any()
+        for metrica in METRICAS:
+            estado = estados_previos.get((appid, metrica))
+            validos = grupo[grupo[metrica].notna()]
+            fechas = pd.to_datetime(validos['fk_tiempo']).to_numpy()
+            valores = validos[metrica].to_numpy(dtype='float64')
+            if not parcial:
+                tareas.append((appid, metrica, fechas, valores, estado, False))
+                continue
+
+            # Juego leído desde su estado: los días nuevos deben seguir a ultima_fecha sin huecos
+            nuevos = fechas > pd.Timestamp(estado['ultima_fecha']).to_datetime64()
+            esperadas = pd.date_range(pd.Timestamp(estado['ultima_fecha']) + pd.Timedelta(days=1),
+                                      periods=int(nuevos.sum()), freq='D')
+            if not nuevos.any():
+                sin_dias_nuevos += 1
+            elif 'nivel' in estado and np.array_equal(fechas[nuevos], esperadas.to_numpy()):
+                tareas.append((appid, metrica, fechas[nuevos], valores[nuevos], estado, True))
+            else:
+                completas.append((appid, metrica))
+
+    if completas:
+        # Huecos o estados sin nivel final: se reajustan con la historia completa
+        historia_completa = leer_historia(engine, sorted({a for a, _ in completas}))
+        grupos = dict(tuple(historia_completa.groupby('fk_juego', sort=False)))
+        for appid, metrica in completas:
+            grupo = grupos[appid]
+            validos = grupo[grupo[metrica].notna()]
+            tareas.append((appid, metrica, pd.to_datetime(validos['fk_tiempo']).to_numpy(),
+                           validos[metrica].to_numpy(dtype='float64'),
+                           estados_previos.get((appid, metrica)), False))
+
+    if not tareas:
+        print(f"   └─ ✅ [pronosticos] Sin días nuevos desde la última corrida ({sin_dias_nuevos} series al día)")
+        return 0
+
+    lotes = [tareas[i:i + SERIES_POR_LOTE] for i in range(0, len(tareas), SERIES_POR_LOTE)]
+    procesos = procesos or os.cpu_count() or 1
+
+    filas, estados = [], []
+    # spawn: el pipeline llega aquí desde un hilo, y fork con hilos vivos no es seguro
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+        for f, e in pool.map(procesar_lote, lotes, [horizonte] * len(lotes)):
+            filas.extend(f)
+            estados.extend(e)
+
+    if not filas:
+        print(f"   └─ ⚠️  [pronosticos] Ninguna serie con ≥{MIN_OBSERVACIONES} días")
+        return 0
+
+    total = guardar(engine, filas, estados)
+    incrementales = sum(1 for _, _, e in estados if e['ajustes_incrementales'] > 0)
+    print(f"   └─ 🔮 [pronosticos] {len(estados)} series ({incrementales} incrementales, "
+          f"{len(estados) - incrementales} ajustes completos, {sin_dias_nuevos} sin días nuevos), "
+          f"{total} filas en pronosticos_juego")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pronósticos ETS por juego")
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--horizonte', type=int, default=HORIZONTE_DIAS)
+    args = parser.parse_args()
+
+    engine = crear_engine()
+    if engine is None:
+        print("❌ ERROR: Falta configurar DB_URI.")
+    else:
+        generar_pronosticos(engine, args.procesos, args.horizonte)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Sincronización primario → réplica (DB_URI_BACKUP)
+# Descripción: Las cargas confirman primero en el primario; después esta
+#              etapa copia a la réplica los días que le faltan o que
+#              cambiaron. El libro replica_sync vive en la réplica y se
+#              escribe en la misma transacción que los datos copiados, así
+#              que tras cualquier caída se sabe con exactitud qué días ya
+#              están (catch-up automático en la siguiente corrida).
+#              Un día se vuelve a copiar si no está en el libro, si su conteo
+#              de filas difiere o si cae dentro de los últimos REVISAR_DIAS;
+#              si está en el libro pero ya no en el primario (retención,
+#              particiones desprendidas) se borra de la réplica.
+#              Cada noche solo se cuentan los días desde la última
+#              sincronización; cada RECONCILIAR_CADA_DIAS se cuenta toda la
+#              historia para alcanzar los borrados de días viejos.
+# Uso:
+#   python replica.py                              # sincroniza lo pendiente
+#   python replica.py --desde 2024-01-01 --hasta 2024-03-31   # fuerza un rango
+# =============================================================================
+
+import argparse
+import datetime
+
+import pandas as pd
+from sqlalchemy import Date, bindparam, inspect, text
+
+import migrar
+from conexion import crear_engine, crear_engine_backup
+from esquema import asegurar_estrella
+
+# Tablas con una columna de día: se copian día por día
+TABLAS_POR_DIA = {
+    'hechos_resenas_steam': 'fk_tiempo',
+    'hechos_sentimiento': 'fk_tiempo',
+    'hechos_sentimiento_idioma': 'fk_tiempo',
+    'hechos_terminos': 'fk_tiempo',
+    'hechos_jugadores_diario': 'fk_tiempo',
+    'hechos_precios': 'fk_tiempo',
+    'noticias_juego': 'fk_tiempo',
+    'alertas_anomalias': 'fk_tiempo',
+    'pronosticos_juego': 'fecha_base',
+}
+# Dimensiones y tablas chicas: upsert completo por llave primaria en cada
+# corrida (nunca DELETE, por si la réplica tiene llaves foráneas)
+TABLAS_COMPLETAS = ['dim_tiempo', 'dim_juego', 'dim_tipo_resena', 'dim_juego_historial', 'nubes_palabras']
+
+# Llaves de tipo fecha: se normalizan a date para comparar primario y réplica
+TIPOS_DIA = {'id_tiempo'}
+
+REVISAR_DIAS = 3     # días recientes que se copian siempre (recargas del día)
+RECONCILIAR_CADA_DIAS = 7   # pasada con toda la historia (borrados viejos)
+DIAS_POR_LOTE = 31
+
+DDL_LIBRO = """
+    CREATE TABLE IF NOT EXISTS replica_sync (
+        tabla VARCHAR(64) NOT NULL,
+        dia DATE NOT NULL,
+        filas INTEGER NOT NULL,
+        sincronizado_en TIMESTAMP NOT NULL,
+        PRIMARY KEY (tabla, dia)
+    )
+"""
+
+# ---------------------------------------------------------------------------
+# 1. QUÉ FALTA EN LA RÉPLICA
+# ---------------------------------------------------------------------------
+
+def _dia(valor):
+    return pd.Timestamp(valor).date()
+
+
+def conteos_por_dia(engine, tabla, columna, desde=None):
+    """{dia: filas} del primario; un GROUP BY sobre la columna de día (desde 'desde')."""
+    consulta = f"SELECT {columna} AS dia, COUNT(*) AS filas FROM {tabla}"
+    if desde is not None:
+        consulta = text(f"{consulta} WHERE {columna} >= :desde GROUP BY {columna}").bindparams(
+            bindparam('desde', type_=Date))
+        filas = pd.read_sql(consulta, engine, params={"desde": desde})
+    else:
+        filas = pd.read_sql(f"{consulta} GROUP BY {columna}", engine)
+    return {_dia(r.dia): int(r.filas) for r in filas.itertuples()}
+
+
+def leer_libro(backup):
+    with backup.begin() as conn:
+        conn.execute(text(DDL_LIBRO))
+    libro = pd.read_sql("SELECT tabla, dia, filas FROM replica_sync", backup)
+    return {(r.tabla, _dia(r.dia)): int(r.filas) for r in libro.itertuples()}
+
+
+def ventana_conteo(tabla, libro, hoy, forzar=None):
+    """
+    Primer día a contar en el primario: el último día sincronizado menos
+    REVISAR_DIAS (o el inicio del rango forzado). None = toda la historia:
+    tabla nueva en el libro o pasada de reconciliación.
+    """
+    sincronizados = [dia for t, dia in libro if t == tabla]
+    if not sincronizados or hoy.toordinal() % RECONCILIAR_CADA_DIAS == 0:
+        return None
+    desde = min(max(sincronizados), hoy) - datetime.timedelta(days=REVISAR_DIAS)
+    return min(desde, forzar[0]) if forzar is not None else desde
+
+
+def dias_pendientes(tabla, conteos, libro, hoy, forzar=None, desde=None):
+    """
+    Días del primario que la réplica no tiene, tiene distintos o son
+    recientes, más los del libro que el primario ya no tiene (desde 'desde').
+    """
+    reciente = hoy - datetime.timedelta(days=REVISAR_DIAS)
+    pendientes = set()
+    for dia, filas in conteos.items():
+        forzado = forzar is not None and forzar[0] <= dia <= forzar[1]
+        if forzado or dia >= reciente or libro.get((tabla, dia)) != filas:
+            pendientes.add(dia)
+    # copiar_dias los borra de la réplica y deja filas=0 en el libro
+    pendientes.update(
+        dia for (t, dia), filas in libro.items()
+        if t == tabla and filas > 0 and dia not in conteos and (desde is None or dia >= desde)
+    )
+    return sorted(pendientes)
+
+# ---------------------------------------------------------------------------
+# 2. COPIA
+# ---------------------------------------------------------------------------
+
+def _columnas_comunes(primario, backup, tabla):
+    destino = {c['name'] for c in inspect(backup).get_columns(tabla)}
+    return [c['name'] for c in inspect(primario).get_columns(tabla) if c['name'] in destino]
+
+
+def copiar_dias(primario, backup, tabla, columna, dias):
+    """Copia los días en lotes; cada lote (datos + libro) es una transacción."""
+    columnas = ", ".join(_columnas_comunes(primario, backup, tabla))
+    leer = text(f"SELECT {columnas} FROM {tabla} WHERE {columna} IN :dias").bindparams(
+        bindparam('dias', expanding=True, type_=Date))
+    borrar = text(f"DELETE FROM {tabla} WHERE {columna} IN :dias").bindparams(
+        bindparam('dias', expanding=True, type_=Date))
+    borrar_libro = text("DELETE FROM replica_sync WHERE tabla = :t AND dia IN :dias").bindparams(
+        bindparam('dias', expanding=True, type_=Date))
+
+    copiadas = 0
+    for i in range(0, len(dias), DIAS_POR_LOTE):
+        lote = dias[i:i + DIAS_POR_LOTE]
+        df = pd.read_sql(leer, primario, params={"dias": lote})
+        conteo = df[columna].map(_dia).value_counts() if not df.empty else pd.Series(dtype='int64')
+        libro = pd.DataFrame({
+            'tabla': tabla,
+            'dia': lote,
+            'filas': [int(conteo.get(d, 0)) for d in lote],
+            'sincronizado_en': datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
+        })
+        with backup.begin() as conn:
+            conn.execute(borrar, {"dias": lote})
+            if not df.empty:
+                df.to_sql(tabla, conn, if_exists='append', index=False, method='multi', chunksize=2000)
+            conn.execute(borrar_libro, {"t": tabla, "dias": lote})
+            libro.to_sql('replica_sync', conn, if_exists='append', index=False, method='multi')
+        copiadas += len(df)
+    return copiadas
+
+
+def copiar_completa(primario, backup, tabla):
+    """Upsert por llave primaria: UPDATE de las existentes, INSERT de las nuevas."""
+    columnas = _columnas_comunes(primario, backup, tabla)
+    llave = inspect(backup).get_pk_constraint(tabla)['constrained_columns']
+    df = pd.read_sql(f"SELECT {', '.join(columnas)} FROM {tabla}", primario)
+    if df.empty:
+        return 0
+
+    en_backup = pd.read_sql(f"SELECT {', '.join(llave)} FROM {tabla}", backup)
+    existentes = set(zip(*(en_backup[c].map(_dia) if c in TIPOS_DIA else en_backup[c] for c in llave)))
+    claves = zip(*(df[c].map(_dia) if c in TIPOS_DIA else df[c] for c in llave))
+    es_nueva = [k not in existentes for k in claves]
+    nuevas, viejas = df[es_nueva], df[[not n for n in es_nueva]]
+
+    resto = [c for c in columnas if c not in llave]
+    with backup.begin() as conn:
+        if resto and not viejas.empty:
+            conn.execute(
+                text(f"UPDATE {tabla} SET {', '.join(f'{c} = :{c}' for c in resto)} "
+                     f"WHERE {' AND '.join(f'{c} = :{c}' for c in llave)}"),
+                viejas.to_dict('records')
+            )
+        if not nuevas.empty:
+            nuevas.to_sql(tabla, conn, if_exists='append', index=False, method='multi', chunksize=500)
+    return len(df)
+
+# ---------------------------------------------------------------------------
+# 3. ORQUESTACIÓN
+# ---------------------------------------------------------------------------
+
+def preparar_backup(backup, desde, hasta):
+    """Esquema estrella en la réplica; en Postgres, también particiones."""
+    asegurar_estrella(backup)
+    if migrar.es_postgres(backup):
+        migrar.migrar(backup)
+        migrar.asegurar_particiones(backup, desde, hasta)
+
+
+def sincronizar(primario, backup, hoy=None, forzar=None):
+    """
+    Copia a la réplica todo lo pendiente. 'forzar' = (desde, hasta) vuelve a
+    copiar ese rango aunque los conteos coincidan (p. ej. tras un backfill).
+    Devuelve el número de días copiados.
+    """
+    hoy = hoy or datetime.date.today()
+    existentes = set(inspect(primario).get_table_names())
+
+    libro = leer_libro(backup)
+    ventanas = {
+        tabla: ventana_conteo(tabla, libro, hoy, forzar)
+        for tabla in TABLAS_POR_DIA if tabla in existentes
+    }
+    conteos = {
+        tabla: conteos_por_dia(primario, tabla, TABLAS_POR_DIA[tabla], desde)
+        for tabla, desde in ventanas.items()
+    }
+    todos_los_dias = [d for c in conteos.values() for d in c]
+    if not todos_los_dias and not libro:
+        print("   └─ ⚠️  [replica] El primario no tiene datos que replicar")
+        return 0
+
+    preparar_backup(backup, min(todos_los_dias, default=hoy), max(todos_los_dias, default=hoy))
+
+    # Dimensiones primero: los hechos pueden tener llaves foráneas hacia ellas
+    for tabla in TABLAS_COMPLETAS:
+        if tabla in existentes:
+            copiar_completa(primario, backup, tabla)
+
+    total_dias = 0
+    for tabla, columna in TABLAS_POR_DIA.items():
+        if tabla not in conteos:
+            continue
+        dias = dias_pendientes(tabla, conteos[tabla], libro, hoy, forzar, ventanas[tabla])
+        if not dias:
+            continue
+        filas = copiar_dias(primario, backup, tabla, columna, dias)
+        total_dias += len(dias)
+        print(f"   │  └─ 🔁 [replica] {tabla}: {len(dias)} días ({filas} filas) "
+              f"{dias[0]} → {dias[-1]}")
+
+    print(f"   └─ ✅ [replica] Réplica al día: {total_dias} días copiados")
+    return total_dias
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincroniza el primario con DB_URI_BACKUP")
+    parser.add_argument('--desde', type=datetime.date.fromisoformat, help="Fuerza la copia desde esta fecha")
+    parser.add_argument('--hasta', type=datetime.date.fromisoformat, help="Fin del rango forzado (por defecto hoy)")
+    args = parser.parse_args()
+
+    primario, backup = crear_engine(), crear_engine_backup()
+    if primario is None or backup is None:
+        print("❌ ERROR: Se necesitan DB_URI y DB_URI_BACKUP.")
+    else:
+        forzar = (args.desde, args.hasta or datetime.date.today()) if args.desde else None
+        sincronizar(primario, backup, forzar=forzar)
@@ -1,12 +1,14 @@
 #!/usr/bin/env python
 # coding: utf-8
 # =============================================================================
-# STEAM-BI | Motor de Extracción + NLP Híbrido (VADER + TextBlob)
+# STEAM-BI | Motor de Extracción + NLP Híbrido (VADER + TextBlob + léxicos por idioma)
 # Autor: Farid Rodriguez Puc
 # Descripción: Extrae reseñas de Steam, aplica análisis de sentimiento híbrido
-#              y genera CSV para Pentaho (local) o carga directo a Supabase (nube).
-# NOTA: En GitHub Actions este script corre DESPUÉS de steam_etl.py
-#       que ya insertó la fecha del día en dim_tiempo.
+#              y genera CSV para Pentaho (local) o carga directo a Supabase (nube)
+#              en micro-lotes con bitácora por día (progreso_scraper).
+# NOTA: Corriendo solo, este script asume que steam_etl.py ya insertó la
+#       fecha del día en dim_tiempo. pipeline_steam.py ejecuta ambos en un
+#       solo proceso con esa dependencia explícita.
 # =============================================================================
 
 import requests
@@ -15,33 +17,26 @@ import pandas as pd
 import time
 import datetime
 import pytz
-import nltk
 import os
-import re
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
 from collections import Counter
-from textblob import TextBlob
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, text
+
+import idiomas
+import sentimiento
+import noticias_steam
+import precios_steam
+from conexion import HEADERS_STEAM, crear_engine
+from esquema import asegurar_tablas
 
 # ---------------------------------------------------------------------------
-# 1. INICIALIZACIÓN DE MODELOS NLP
+# 1. MOTOR DE SENTIMIENTO
 # ---------------------------------------------------------------------------
+# Las reseñas en inglés se puntúan con el motor de sentimiento.py: el híbrido
+# VADER + TextBlob por defecto, o el transformer ONNX con SENTIMIENTO_MOTOR.
 
-nltk.download('vader_lexicon', quiet=True)
-nltk.download('punkt', quiet=True)
-sia = SentimentIntensityAnalyzer()
-
-def calcular_polaridad(texto):
-    """
-    Análisis de sentimiento híbrido VADER + TextBlob.
-    - Zona ambigua (-0.15 a 0.15): promedia ambos modelos
-    - Fuera de zona ambigua: usa VADER directo
-    """
-    score_vader = sia.polarity_scores(texto)['compound']
-    if -0.15 < score_vader < 0.15:
-        score_tb = TextBlob(texto).sentiment.polarity
-        return (score_vader + score_tb) / 2
-    return score_vader
+def calcular_polaridad(texto, motor=None):
+    """Polaridad en [-1, 1] de una reseña en inglés con el motor configurado."""
+    return sentimiento.obtener_puntuador(motor).puntuar_lote([texto])[0]
 
 # ---------------------------------------------------------------------------
 # 2. CONFIGURACIÓN GENERAL
@@ -61,31 +56,33 @@ stopwords = set([
     'into', 'https', 'new', 'left'
 ])
 
+# Términos por juego/día que se guardan en hechos_terminos (insumo de nubes.py)
+TERMINOS_POR_DIA = 200
+
 appids = [440, 550, 730, 218230, 252490, 578080, 1085660, 1172470, 1240440, 1938090]
-headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
+headers = HEADERS_STEAM
 
 # Fecha correcta en zona horaria de México (no UTC)
 tz_mexico = pytz.timezone('America/Mexico_City')
 fecha_hoy = datetime.datetime.now(tz_mexico).date()
 
-resumen_diario = []
-
 # ---------------------------------------------------------------------------
-# 3. LOOP PRINCIPAL DE EXTRACCIÓN
+# 3. EXTRACCIÓN: APIs OFICIALES + MINERÍA DE TEXTO
 # ---------------------------------------------------------------------------
 
-print("=======================================================================")
-print("🚀 INICIANDO MOTOR PREMIUM STEAM-BI (EXTRACCIÓN + VADER/TextBlob NLP)")
-print(f"   Fecha México: {fecha_hoy}")
-print("=======================================================================")
-
-for appid in appids:
-    print(f"\n🎮 [Iniciando Análisis] AppID: {appid}")
-    print("   ├─ 📡 Consultando APIs oficiales de Steam...")
-
-    en_oferta = 0
+def consultar_apis(appid, session=requests, precio=None, actualizacion=None):
+    """
+    Jugadores activos, oferta y parche del día desde las APIs de Steam.
+    'precio' es el estado de precios_steam.consultar_precios (pedido por
+    lotes); si no viene, se pide solo el bloque de precio de este juego.
+    'actualizacion' es el flag de noticias_steam.actualizar_noticias; si no
+    viene, se revisa la primera página de noticias sin índice.
+    Si falla la API de jugadores o la de precios, su valor queda en None
+    (NULL): un 0 de jugadores se leería como colapso en anomalias.py.
+    """
+    en_oferta = None
     hubo_actualizacion = 0
-    jugadores_activos = 0
+    jugadores_activos = None
 
     # API 1: Jugadores activos
     try:
@@ -94,64 +91,47 @@ for appid in appids:
             f"GetNumberOfCurrentPlayers/v1/?appid={appid}"
         )
         jugadores_activos = (
-            requests.get(url_players, headers=headers, timeout=10)
+            session.get(url_players, headers=headers, timeout=10)
             .json()
             .get('response', {})
-            .get('player_count', 0)
+            .get('player_count')
         )
-        print(f"   │  └─ Jugadores activos detectados: {jugadores_activos:,}")
+        if jugadores_activos is None:
+            print(f"   │  └─ ⚠️  [{appid}] API Jugadores sin player_count")
+        else:
+            print(f"   │  └─ [{appid}] Jugadores activos detectados: {jugadores_activos:,}")
     except Exception as e:
-        print(f"   │  └─ ⚠️  API Jugadores falló: {e}")
+        print(f"   │  └─ ⚠️  [{appid}] API Jugadores falló: {e}")
 
-    # API 2: Oferta activa
+    # API 2: Oferta activa (solo price_overview, no el payload completo)
     try:
-        url_store = f"https://store.steampowered.com/api/appdetails?appids={appid}"
-        res_store = requests.get(url_store, headers=headers, timeout=10).json()
-        if (
-            res_store
-            and res_store[str(appid)]['success']
-            and res_store[str(appid)]['data']
-            .get('price_overview', {})
-            .get('discount_percent', 0) > 0
-        ):
+        if precio is None:
+            precio = precios_steam.consultar_precios([appid], session)[appid]
+        en_oferta = 0
+        if precio is None:
+            print(f"   │  └─ ⚠️  [{appid}] API Store sin datos de precio")
+        elif precio['descuento_pct'] > 0:
             en_oferta = 1
-            print("   │  └─ 💰 ¡Juego en oferta hoy!")
+            print(f"   │  └─ 💰 [{appid}] ¡Juego en oferta hoy! (-{precio['descuento_pct']}%)")
     except Exception as e:
-        print(f"   │  └─ ⚠️  API Store falló: {e}")
-
-    # API 3: Parche del día
-    try:
-        url_news = (
-            f"https://api.steampowered.com/ISteamNews/"
-            f"GetNewsForApp/v0002/?appid={appid}&count=5"
-        )
-        noticias = (
-            requests.get(url_news, headers=headers, timeout=10)
-            .json()
-            .get('appnews', {})
-            .get('newsitems', [])
-        )
-        for noticia in noticias:
-            if (
-                datetime.date.fromtimestamp(noticia['date']) == fecha_hoy
-                and noticia.get('feedtype') == 1
-            ):
-                hubo_actualizacion = 1
-                print("   │  └─ 🛠️  ¡Actualización/Parche detectado hoy!")
-                break
-    except Exception as e:
-        print(f"   │  └─ ⚠️  API News falló: {e}")
-
-    # Scraping + NLP
-    print("   ├─ 🕷️  Iniciando minería de texto y evaluación de sentimientos...")
-
-    resenas_validas = 0
-    suma_polaridad = 0
-    positivas_hoy = 0
-    negativas_hoy = 0
-    neutrales_hoy = 0
-    todas_las_palabras = []
-
+        print(f"   │  └─ ⚠️  [{appid}] API Store falló: {e}")
+
+    # API 3: Parche del día (incremental por gid, día de México)
+    if actualizacion is None:
+        actualizacion = noticias_steam.actualizar_noticias(None, [appid], session, fecha_hoy)[appid]
+    hubo_actualizacion = actualizacion
+    if hubo_actualizacion:
+        print(f"   │  └─ 🛠️  [{appid}] ¡Actualización/Parche detectado hoy!")
+
+    return {
+        'en_oferta': en_oferta,
+        'hubo_actualizacion': hubo_actualizacion,
+        'jugadores_activos': jugadores_activos
+    }
+
+def extraer_textos(appid, session=requests):
+    """Scraping de las reseñas recientes (todos los idiomas)."""
+    textos = []
     for scroll in range(1, 11):
         url = (
             f"https://steamcommunity.com/app/{appid}/homecontent/"
@@ -160,13 +140,13 @@ for appid in appids:
             f"&mt=all&filter=recent&validity=all"
         )
         try:
-            response = requests.get(url, headers=headers, timeout=15)
+            response = session.get(url, headers=headers, timeout=15)
             bloques = html.fromstring(response.content).xpath(
                 '//div[contains(@class, "apphub_Card")]'
             )
 
             if not bloques:
-                print(f"   │  └─ ⚠️  Sin bloques en scroll {scroll}")
+                print(f"   │  └─ ⚠️  [{appid}] Sin bloques en scroll {scroll}")
                 time.sleep(1)
                 continue
 
@@ -174,126 +154,263 @@ for appid in appids:
                 texto = " ".join(
                     bloque.xpath('.//div[@class="apphub_CardTextContent"]/text()')
                 ).strip()
-
                 if len(texto) > 10:
-                    polaridad = calcular_polaridad(texto)
-
-                    if polaridad > 0.05:
-                        positivas_hoy += 1
-                    elif polaridad < -0.05:
-                        negativas_hoy += 1
-                    else:
-                        neutrales_hoy += 1
-
-                    suma_polaridad += polaridad
-                    resenas_validas += 1
-
-                    palabras_limpias = re.findall(r'\b[a-z]{3,}\b', texto.lower())
-                    todas_las_palabras.extend(
-                        [w for w in palabras_limpias if w not in stopwords]
-                    )
+                    textos.append(texto)
 
         except Exception as e:
-            print(f"   │  └─ ⚠️  Error en scroll {scroll}: {e}")
+            print(f"   │  └─ ⚠️  [{appid}] Error en scroll {scroll}: {e}")
 
-        print(f"   │  └─ Procesando bloque {scroll}/10...", end="\r")
         time.sleep(1)
+    return textos
 
-    print(f"   │  └─ Procesamiento completado. {resenas_validas} reseñas evaluadas.    ")
+def puntuar_lote(textos, codigos, motor=None):
+    """
+    Polaridad de cada reseña según su idioma: el inglés va en una sola llamada
+    al motor de sentimiento.py (lotes por longitud), los idiomas con léxico a
+    idiomas.polaridad_lexico. None = idioma sin soporte (solo se cuenta).
+    """
+    polaridades = [
+        idiomas.polaridad_lexico(texto, idioma) if idioma in idiomas.LEXICOS else None
+        for texto, idioma in zip(textos, codigos)
+    ]
+    en_ingles = [i for i, idioma in enumerate(codigos) if idioma == 'en']
+    if en_ingles:
+        puntuadas = sentimiento.obtener_puntuador(motor).puntuar_lote([textos[i] for i in en_ingles])
+        for i, polaridad in zip(en_ingles, puntuadas):
+            polaridades[i] = polaridad
+    return polaridades
+
+def analizar_resenas(appid, session=requests, motor=None):
+    """Scraping + identificación de idioma en lote + sentimiento por idioma."""
+    textos = extraer_textos(appid, session)
+    nlp = evaluar_textos(textos, idiomas.detectar_idiomas(textos), motor)
+
+    sin_puntuar = len(textos) - nlp['resenas_validas']
+    print(
+        f"   │  └─ [{appid}] Procesamiento completado. {nlp['resenas_validas']} reseñas evaluadas"
+        f" ({sin_puntuar} en idiomas sin soporte)."
+    )
+    return nlp
+
+def evaluar_textos(textos, codigos, motor=None):
+    """Sentimiento y temas de un lote de reseñas con su idioma ya detectado."""
+    resenas_validas = 0
+    suma_polaridad = 0
+    positivas_hoy = 0
+    negativas_hoy = 0
+    neutrales_hoy = 0
+    todas_las_palabras = []
+    por_idioma = {}
 
-    # Agregación
-    if resenas_validas > 0:
-        polaridad_promedio = suma_polaridad / resenas_validas
+    for texto, idioma, polaridad in zip(textos, codigos, puntuar_lote(textos, codigos, motor)):
+        tally = por_idioma.setdefault(idioma, {
+            'total': 0, 'puntuadas': 0, 'positivas': 0, 'negativas': 0, 'suma_polaridad': 0.0
+        })
+        tally['total'] += 1
 
-        if positivas_hoy > negativas_hoy and positivas_hoy > neutrales_hoy:
-            sentimiento_pred = "POSITIVO"
-        elif negativas_hoy > positivas_hoy and negativas_hoy > neutrales_hoy:
-            sentimiento_pred = "NEGATIVO"
+        if polaridad is None:
+            continue
+
+        if polaridad > 0.05:
+            positivas_hoy += 1
+            tally['positivas'] += 1
+        elif polaridad < -0.05:
+            negativas_hoy += 1
+            tally['negativas'] += 1
         else:
-            sentimiento_pred = "MIXTO/NEUTRAL"
+            neutrales_hoy += 1
+
+        suma_polaridad += polaridad
+        resenas_validas += 1
+        tally['puntuadas'] += 1
+        tally['suma_polaridad'] += polaridad
+
+        todas_las_palabras.extend(idiomas.extraer_temas(texto, idioma, stopwords))
+
+    return {
+        'resenas_validas': resenas_validas,
+        'suma_polaridad': suma_polaridad,
+        'positivas': positivas_hoy,
+        'negativas': negativas_hoy,
+        'neutrales': neutrales_hoy,
+        'palabras': todas_las_palabras,
+        'por_idioma': por_idioma
+    }
+
+def construir_resumen(appid, apis, nlp, fecha=None):
+    """Agrega el resultado del día para un juego. None si no hubo reseñas."""
+    fecha = fecha or fecha_hoy
+    if nlp['resenas_validas'] == 0:
+        print(f"   └─ ⚠️  Sin reseñas válidas para AppID {appid} — se omite")
+        return None
 
-        top_3 = Counter(todas_las_palabras).most_common(3)
-        tema_principal = ", ".join([p[0] for p in top_3]) if top_3 else "Ninguno"
+    positivas_hoy = nlp['positivas']
+    negativas_hoy = nlp['negativas']
+    neutrales_hoy = nlp['neutrales']
+    polaridad_promedio = nlp['suma_polaridad'] / nlp['resenas_validas']
 
-        resumen_diario.append({
+    if positivas_hoy > negativas_hoy and positivas_hoy > neutrales_hoy:
+        sentimiento_pred = "POSITIVO"
+    elif negativas_hoy > positivas_hoy and negativas_hoy > neutrales_hoy:
+        sentimiento_pred = "NEGATIVO"
+    else:
+        sentimiento_pred = "MIXTO/NEUTRAL"
+
+    top_3 = Counter(nlp['palabras']).most_common(3)
+    tema_principal = ", ".join([p[0] for p in top_3]) if top_3 else "Ninguno"
+
+    print(
+        f"   └─ 🧠 [{appid}] RESULTADO: {sentimiento_pred} "
+        f"(Pol: {polaridad_promedio:+.2f}) | "
+        f"Temas Clave: '{tema_principal.upper()}'"
+    )
+
+    return {
+        'fk_juego': appid,
+        'fk_tiempo': fecha.strftime('%Y-%m-%d'),
+        'total_resenas_analizadas': nlp['resenas_validas'],
+        'resenas_positivas_nlp': positivas_hoy,
+        'resenas_negativas_nlp': negativas_hoy,
+        'polaridad_roberta': round(polaridad_promedio, 4),  # nombre legacy, valor = motor de sentimiento.py
+        'sentimiento_predominante': sentimiento_pred,
+        'en_oferta': apis['en_oferta'],
+        'hubo_actualizacion': apis['hubo_actualizacion'],
+        'jugadores_activos': apis['jugadores_activos'],
+        'tema_principal': tema_principal
+    }
+
+def construir_desglose_idiomas(appid, nlp, fecha=None):
+    """Filas de hechos_sentimiento_idioma (una por idioma detectado)."""
+    fecha = fecha or fecha_hoy
+    filas = []
+    for idioma, tally in sorted(nlp['por_idioma'].items()):
+        filas.append({
             'fk_juego': appid,
-            'fk_tiempo': fecha_hoy.strftime('%Y-%m-%d'),
-            'total_resenas_analizadas': resenas_validas,
-            'resenas_positivas_nlp': positivas_hoy,
-            'resenas_negativas_nlp': negativas_hoy,
-            'polaridad_roberta': round(polaridad_promedio, 4),  # nombre legacy, valor = VADER híbrido
-            'sentimiento_predominante': sentimiento_pred,
-            'en_oferta': en_oferta,
-            'hubo_actualizacion': hubo_actualizacion,
-            'jugadores_activos': jugadores_activos,
-            'tema_principal': tema_principal
+            'fk_tiempo': fecha.strftime('%Y-%m-%d'),
+            'idioma': idioma,
+            'total_resenas': tally['total'],
+            'resenas_puntuadas': tally['puntuadas'],
+            'resenas_positivas_nlp': tally['positivas'],
+            'resenas_negativas_nlp': tally['negativas'],
+            'polaridad_promedio': (
+                round(tally['suma_polaridad'] / tally['puntuadas'], 4)
+                if tally['puntuadas'] else None
+            )
         })
+    return filas
 
-        print(
-            f"   └─ 🧠 RESULTADO: {sentimiento_pred} "
-            f"(Pol: {polaridad_promedio:+.2f}) | "
-            f"Temas Clave: '{tema_principal.upper()}'"
-        )
-    else:
-        print(f"   └─ ⚠️  Sin reseñas válidas para AppID {appid} — se omite")
+def construir_terminos(appid, nlp, fecha=None, limite=TERMINOS_POR_DIA):
+    """Filas de hechos_terminos: los 'limite' términos más frecuentes del día."""
+    fecha = fecha or fecha_hoy
+    return [
+        {'fk_juego': appid, 'fk_tiempo': fecha.strftime('%Y-%m-%d'),
+         'termino': termino[:64], 'frecuencia': frecuencia}
+        for termino, frecuencia in Counter(nlp['palabras']).most_common(limite)
+    ]
 
 # ---------------------------------------------------------------------------
 # 4. CARGA DE DATOS — LÓGICA DUAL LOCAL vs NUBE
 # ---------------------------------------------------------------------------
 
-print("\n=======================================================================")
-print("💾 FASE ETL: GUARDANDO / CARGANDO DATOS")
-print("=======================================================================")
-
-df_final = pd.DataFrame(resumen_diario)
-DB_URI = os.getenv('DB_URI')
-
-if DB_URI:
-    # -----------------------------------------------------------------------
-    # MODO NUBE (GitHub Actions / Docker)
-    # La fecha ya existe en dim_tiempo porque steam_etl.py corrió primero
-    # -----------------------------------------------------------------------
-    print("☁️  Modo Nube detectado — cargando directo a Supabase...")
-    try:
-        uri_final = DB_URI.replace("postgres://", "postgresql+psycopg2://", 1)
-        engine = create_engine(
-            uri_final,
-            connect_args={
-                "sslmode": "require",
-                "options": "-c client_encoding=utf8"
-            },
-            pool_pre_ping=True,
-            pool_recycle=3600
+LOTE_APPS = 10   # juegos por micro-lote; cada lote es una transacción corta
+
+def resultado_app(appid, apis, nlp, fecha=None):
+    """Lo que un juego aporta al día: resumen (o None), desglose por idioma y términos."""
+    return {
+        'appid': appid,
+        'resumen': construir_resumen(appid, apis, nlp, fecha),
+        'idiomas': construir_desglose_idiomas(appid, nlp, fecha),
+        'terminos': construir_terminos(appid, nlp, fecha),
+    }
+
+def apps_cargadas(engine, fecha=None):
+    """appids cuyo día ya quedó cargado según progreso_scraper."""
+    fecha = fecha or fecha_hoy
+    asegurar_tablas(engine, 'progreso_scraper', 'hechos_sentimiento_idioma', 'hechos_terminos')
+    with engine.connect() as conn:
+        filas = conn.execute(
+            text("SELECT appid FROM progreso_scraper WHERE fecha = :d AND estado = 'cargado'"),
+            {"d": fecha}
         )
+        return {r[0] for r in filas}
 
-        with engine.connect() as conn:
+def cargar_lote(engine, lote, fecha=None):
+    """
+    MODO NUBE (GitHub Actions / Docker) — un micro-lote en una transacción.
+    Reemplaza el día de esos juegos en las tres tablas de hechos y los marca
+    en progreso_scraper. Si algo falla no queda nada a medias y los juegos
+    del lote siguen pendientes. Requiere que la fecha ya exista en dim_tiempo.
+    """
+    fecha = fecha or fecha_hoy
+    apps = [r['appid'] for r in lote]
+    tablas = {
+        'hechos_sentimiento': [r['resumen'] for r in lote if r['resumen'] is not None],
+        'hechos_sentimiento_idioma': [f for r in lote for f in r['idiomas']],
+        'hechos_terminos': [f for r in lote for f in r['terminos']],
+    }
+    progreso = [
+        {"d": fecha, "a": r['appid'],
+         "e": 'cargado' if r['resumen'] is not None else 'sin_datos',
+         "f": int(r['resumen'] is not None) + len(r['idiomas']) + len(r['terminos']),
+         "t": datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)}
+        for r in lote
+    ]
+    with engine.begin() as conn:
+        for tabla, filas in tablas.items():
             conn.execute(
-                text("DELETE FROM hechos_sentimiento WHERE fk_tiempo = :d"),
-                {"d": fecha_hoy}
+                text(f"DELETE FROM {tabla} WHERE fk_tiempo = :d AND fk_juego IN :apps")
+                .bindparams(bindparam('apps', expanding=True)),
+                {"d": fecha, "apps": apps}
             )
-            conn.commit()
-            print("   └─ 🧹 Limpieza del día completada (idempotencia)")
-
-        df_final.to_sql(
-            'hechos_sentimiento',
-            engine,
-            if_exists='append',
-            index=False,
-            method='multi'
-        )
-        print(f"   └─ ✅ {len(df_final)} registros cargados exitosamente a Supabase")
-        print(f"   └─ Fecha México: {fecha_hoy}")
-        print(f"   └─ Columnas: {list(df_final.columns)}")
-
+            if filas:
+                pd.DataFrame(filas).to_sql(
+                    tabla, conn, if_exists='append', index=False, method='multi', chunksize=5000
+                )
+        conn.execute(text("""
+            INSERT INTO progreso_scraper (fecha, appid, estado, filas, actualizado_en)
+            VALUES (:d, :a, :e, :f, :t)
+            ON CONFLICT (fecha, appid) DO UPDATE SET
+                estado = excluded.estado,
+                filas = excluded.filas,
+                actualizado_en = excluded.actualizado_en
+        """), progreso)
+    return len(tablas['hechos_sentimiento'])
+
+def volcar(engine, lote, fecha=None):
+    """cargar_lote sin detener la corrida. Devuelve los appids que quedaron pendientes."""
+    apps = [r['appid'] for r in lote]
+    try:
+        cargados = cargar_lote(engine, lote, fecha)
     except Exception as e:
-        print(f"   └─ ❌ Error al cargar a Supabase: {e}")
-        raise
-
-else:
-    # -----------------------------------------------------------------------
-    # MODO LOCAL (Windows + Pentaho)
-    # Genera CSV para que Pentaho lo tome como siempre
-    # -----------------------------------------------------------------------
+        print(f"   └─ ❌ Micro-lote {apps} no se cargó: {e}")
+        return apps
+    print(f"   └─ 💾 Micro-lote de {len(lote)} juegos confirmado ({cargados} en hechos_sentimiento)")
+    return []
+
+def reportar_carga(total, sin_cargar, fecha=None):
+    """Cierre de la corrida: falla si algún juego quedó pendiente (la próxima lo retoma)."""
+    fecha = fecha or fecha_hoy
+    if sin_cargar:
+        print(f"   └─ ❌ {len(sin_cargar)}/{total} juegos sin cargar: {sin_cargar}")
+        raise RuntimeError(f"{len(sin_cargar)} juegos pendientes para {fecha}; "
+                           f"una nueva corrida procesa solo esos")
+    print(f"   └─ ✅ {total} juegos cargados exitosamente a Supabase")
+    print(f"   └─ Fecha México: {fecha}")
+
+def cargar_supabase(resultados, engine, fecha=None):
+    """Carga resultados ya calculados en micro-lotes de LOTE_APPS."""
+    print("☁️  Modo Nube detectado — cargando a Supabase en micro-lotes...")
+    asegurar_tablas(engine, 'progreso_scraper', 'hechos_sentimiento_idioma', 'hechos_terminos')
+    sin_cargar = []
+    for i in range(0, len(resultados), LOTE_APPS):
+        sin_cargar += volcar(engine, resultados[i:i + LOTE_APPS], fecha)
+    reportar_carga(len(resultados), sin_cargar, fecha)
+
+def guardar_csv(df_final, df_idiomas=None, df_terminos=None):
+    """
+    MODO LOCAL (Windows + Pentaho)
+    Genera CSV para que Pentaho lo tome como siempre
+    """
     print("💻 Modo Local detectado — generando CSV para Pentaho...")
     try:
         directorio_actual = os.path.dirname(os.path.abspath(__file__))
@@ -307,3 +424,91 @@ else:
     print(f"   └─ ✨ Archivo listo para Pentaho en: {ruta_csv}")
     print(f"   └─ Registros guardados: {len(df_csv)}")
     print(f"   └─ Columnas: {list(df_csv.columns)}")
+
+    if df_idiomas is not None and not df_idiomas.empty:
+        ruta_idiomas = os.path.join(directorio_actual, 'resumen_sentimiento_idiomas.csv')
+        df_idiomas.rename(columns={'fk_tiempo': 'fecha_extraccion'}).to_csv(
+            ruta_idiomas, index=False, encoding='utf-8'
+        )
+        print(f"   └─ 🌐 Desglose por idioma en: {ruta_idiomas}")
+
+    if df_terminos is not None and not df_terminos.empty:
+        ruta_terminos = os.path.join(directorio_actual, 'resumen_terminos_diario.csv')
+        df_terminos.rename(columns={'fk_tiempo': 'fecha_extraccion'}).to_csv(
+            ruta_terminos, index=False, encoding='utf-8'
+        )
+        print(f"   └─ 🔤 Frecuencia de términos en: {ruta_terminos}")
+
+def cargar_resultados(resultados, engine=None, fecha=None):
+    """Carga a Supabase si hay engine, si no genera el CSV local."""
+    print("\n=======================================================================")
+    print("💾 FASE ETL: GUARDANDO / CARGANDO DATOS")
+    print("=======================================================================")
+
+    if engine is not None:
+        cargar_supabase(resultados, engine, fecha)
+    else:
+        guardar_csv(
+            pd.DataFrame([r['resumen'] for r in resultados if r['resumen'] is not None]),
+            pd.DataFrame([f for r in resultados for f in r['idiomas']]),
+            pd.DataFrame([f for r in resultados for f in r['terminos']])
+        )
+
+# ---------------------------------------------------------------------------
+# 5. LOOP PRINCIPAL
+# ---------------------------------------------------------------------------
+# Con DB_URI cada LOTE_APPS juegos terminados se confirman en su propia
+# transacción y quedan en progreso_scraper: si la corrida cae en el juego
+# 900, repetirla procesa solo los que faltan. Sin DB_URI se mantiene el CSV
+# único al final para Pentaho.
+
+if __name__ == "__main__":
+    print("=======================================================================")
+    print("🚀 INICIANDO MOTOR PREMIUM STEAM-BI (EXTRACCIÓN + VADER/TextBlob NLP)")
+    print(f"   Fecha México: {fecha_hoy}")
+    print("=======================================================================")
+
+    engine = crear_engine()
+    pendientes = list(appids)
+    if engine is not None:
+        hechos = apps_cargadas(engine)
+        pendientes = [a for a in appids if a not in hechos]
+        if hechos:
+            print(f"♻️  {len(hechos)} juegos ya cargados hoy (progreso_scraper) — quedan {len(pendientes)}")
+
+    print("💰 Consultando precios de la tienda por lotes...")
+    precios = precios_steam.consultar_precios(pendientes)
+    print("📰 Revisando noticias nuevas...")
+    actualizaciones = noticias_steam.actualizar_noticias(engine, pendientes, fecha=fecha_hoy)
+
+    resultados = []
+    lote = []
+    sin_cargar = []
+    for appid in pendientes:
+        print(f"\n🎮 [Iniciando Análisis] AppID: {appid}")
+        try:
+            print("   ├─ 📡 Consultando APIs oficiales de Steam...")
+            apis = consultar_apis(appid, precio=precios.get(appid), actualizacion=actualizaciones[appid])
+
+            print("   ├─ 🕷️  Iniciando minería de texto y evaluación de sentimientos...")
+            nlp = analizar_resenas(appid)
+        except Exception as e:
+            print(f"   └─ ❌ [{appid}] Falló la extracción: {e} — queda pendiente")
+            sin_cargar.append(appid)
+            continue
+
+        resultado = resultado_app(appid, apis, nlp)
+        if engine is None:
+            resultados.append(resultado)
+            continue
+        lote.append(resultado)
+        if len(lote) >= LOTE_APPS:
+            sin_cargar += volcar(engine, lote)
+            lote = []
+
+    if engine is None:
+        cargar_resultados(resultados)
+    else:
+        if lote:
+            sin_cargar += volcar(engine, lote)
+        reportar_carga(len(pendientes), sin_cargar)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# coding: utf-8
+# =============================================================================
+# STEAM-BI | Motores de sentimiento para reseñas en inglés
+# Descripción: Interfaz común puntuar_lote(textos) → polaridades en [-1, 1]
+#              detrás de calcular_polaridad del scraper. Motores:
+#                lexico  Híbrido VADER + TextBlob (por defecto, el más rápido)
+#                onnx    Transformer tipo RoBERTa exportado a ONNX y
+#                        cuantizado a int8, en CPU. Lotes dinámicos: los textos
+#                        se ordenan por longitud y cada lote se rellena solo
+#                        hasta su texto más largo (múltiplo de 16), con tope
+#                        de tokens por lote. Polaridad = P(positivo) - P(negativo).
+#              El motor se elige con SENTIMIENTO_MOTOR; el modelo ONNX se lee
+#              de SENTIMIENTO_MODELO (directorio local, sin red). Si falta
+#              onnxruntime/tokenizers o el modelo, se avisa y se usa 'lexico'.
+#              bench_sentimiento.py mide reseñas/s de cada motor.
+# Uso:
+#   pip install onnxruntime tokenizers                  # motor onnx
+#   pip install torch transformers                      # solo para exportar
+#   python sentimiento.py exportar --modelo cardiffnlp/twitter-roberta-base-sentiment-latest
+#   SENTIMIENTO_MOTOR=onnx python pipeline_steam.py
+# =============================================================================
+
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+MOTORES = ('lexico', 'onnx')
+MOTOR = os.getenv('SENTIMIENTO_MOTOR', 'lexico')
+RUTA_MODELO = os.getenv('SENTIMIENTO_MODELO', os.path.join(DIRECTORIO, 'modelos', 'sentimiento'))
+
+ARCHIVO_MODELO = 'modelo_int8.onnx'
+ARCHIVO_CONFIG = 'sentimiento.json'
+MAX_TOKENS = 256               # truncado por reseña
+TAMANO_LOTE = 32
+TOKENS_POR_LOTE = 8192         # filas x largo rellenado
+MULTIPLO_RELLENO = 16          # pocos tamaños distintos de tensor
+
+# ---------------------------------------------------------------------------
+# 1. MOTOR LÉXICO (VADER + TextBlob)
+# ---------------------------------------------------------------------------
+# El léxico VADER viene horneado en la imagen Docker (NLTK_DATA), así que no
+# hay descargas al arrancar. nltk y TextBlob se importan la primera vez que
+# se evalúa una reseña, no al importar el módulo.
+
+NLTK_DATA = os.getenv('NLTK_DATA', os.path.join(DIRECTORIO, 'nltk_data'))
+
+_sia = None
+_lock_sia = threading.Lock()
+
+def obtener_sia():
+    """Carga perezosa del analizador VADER desde el directorio local de NLTK."""
+    global _sia
+    if _sia is not None:
+        return _sia
+    with _lock_sia:
+        if _sia is not None:
+            return _sia
+        import nltk
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+        if NLTK_DATA not in nltk.data.path:
+            nltk.data.path.insert(0, NLTK_DATA)
+        try:
+            nltk.data.find('sentiment/vader_lexicon.zip')
+        except LookupError:
+            # Solo en entornos locales sin el léxico horneado
+            print(f"   ⚠️  vader_lexicon no encontrado en {NLTK_DATA} — descargando una vez...")
+            nltk.download('vader_lexicon', download_dir=NLTK_DATA, quiet=True)
+        _sia = SentimentIntensityAnalyzer()
+        return _sia
+
+def polaridad_hibrida(texto):
+    """
+    Análisis de sentimiento híbrido VADER + TextBlob.
+    - Zona ambigua (-0.15 a 0.15): promedia ambos modelos
+    - Fuera de zona ambigua: usa VADER directo
+    """
+    score_vader = obtener_sia().polarity_scores(texto)['compound']
+    if -0.15 < score_vader < 0.15:
+        from textblob import TextBlob
+        score_tb = TextBlob(texto).sentiment.polarity
+        return (score_vader + score_tb) / 2
+    return score_vader
+
+
+class PuntuadorLexico:
+    nombre = 'lexico'
+
+    def puntuar_lote(self, textos):
+        return [polaridad_hibrida(texto) for texto in textos]
+
+# ---------------------------------------------------------------------------
+# 2. MOTOR ONNX (transformer int8 en CPU)
+# ---------------------------------------------------------------------------
+
+def _indices_etiquetas(etiquetas):
+    """(índice positivo, índice negativo) a partir de los nombres de clase."""
+    nombres = [str(e).lower() for e in etiquetas]
+    positivo = next((i for i, n in enumerate(nombres) if n.startswith('pos')), None)
+    negativo = next((i for i, n in enumerate(nombres) if n.startswith('neg')), None)
+    if positivo is None or negativo is None:
+        # LABEL_0..LABEL_n: convención negativo → (neutral) → positivo
+        positivo, negativo = len(nombres) - 1, 0
+    return positivo, negativo
+
+
+class PuntuadorOnnx:
+    nombre = 'onnx'
+
+    def __init__(self, ruta=RUTA_MODELO, tamano_lote=TAMANO_LOTE, tokens_por_lote=TOKENS_POR_LOTE, hilos=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(ruta, ARCHIVO_CONFIG), encoding='utf-8') as f:
+            config = json.load(f)
+        self.tokenizer = Tokenizer.from_file(os.path.join(ruta, 'tokenizer.json'))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(config.get('max_tokens', MAX_TOKENS))
+        self.pad_id = config.get('pad_id', 1)
+        self.positivo, self.negativo = _indices_etiquetas(config['etiquetas'])
+        self.tamano_lote = tamano_lote
+        self.tokens_por_lote = tokens_por_lote
+
+        opciones = ort.SessionOptions()
+        opciones.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if hilos:
+            opciones.intra_op_num_threads = hilos
+        self.sesion = ort.InferenceSession(
+            os.path.join(ruta, ARCHIVO_MODELO), opciones, providers=['CPUExecutionProvider']
+        )
+        self.entradas = {e.name for e in self.sesion.get_inputs()}
+
+    def lotes(self, largos):
+        """Índices agrupados por longitud: lotes de textos parecidos, con tope de filas y tokens."""
+        orden = np.argsort(largos, kind='stable')
+        lote = []
+        for i in orden:
+            relleno = -(-int(largos[i]) // MULTIPLO_RELLENO) * MULTIPLO_RELLENO
+            # Orden ascendente: el texto actual es el más largo del lote
+            if lote and (len(lote) >= self.tamano_lote or (len(lote) + 1) * relleno > self.tokens_por_lote):
+                yield lote
+                lote = []
+            lote.append(i)
+        if lote:
+            yield lote
+
+    def puntuar_lote(self, textos):
+        if not textos:
+            return []
+        ids = [c.ids for c in self.tokenizer.encode_batch(list(textos))]
+        largos = np.array([len(i) for i in ids])
+        polaridades = np.zeros(len(ids))
+        for lote in self.lotes(largos):
+            ancho = -(-int(largos[lote].max()) // MULTIPLO_RELLENO) * MULTIPLO_RELLENO
+            input_ids = np.full((len(lote), ancho), self.pad_id, dtype='int64')
+            mascara = np.zeros((len(lote), ancho), dtype='int64')
+            for fila, i in enumerate(lote):
+                input_ids[fila, :largos[i]] = ids[i]
+                mascara[fila, :largos[i]] = 1
+            entrada = {'input_ids': input_ids, 'attention_mask': mascara}
+            if 'token_type_ids' in self.entradas:
+                entrada['token_type_ids'] = np.zeros_like(input_ids)
+            logits = self.sesion.run(None, entrada)[0]
+            probabilidades = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probabilidades /= probabilidades.sum(axis=1, keepdims=True)
+            polaridades[lote] = probabilidades[:, self.positivo] - probabilidades[:, self.negativo]
+        return polaridades.tolist()
+
+# ---------------------------------------------------------------------------
+# 3. SELECCIÓN DEL MOTOR
+# ---------------------------------------------------------------------------
+
+_puntuadores = {}
+_lock_puntuadores = threading.Lock()
+
+def obtener_puntuador(motor=None):
+    """Instancia compartida del motor pedido (SENTIMIENTO_MOTOR por defecto)."""
+    motor = motor or MOTOR
+    if motor not in MOTORES:
+        raise ValueError(f"Motor desconocido: {motor}. Disponibles: {', '.join(MOTORES)}")
+    if motor in _puntuadores:
+        return _puntuadores[motor]
+    with _lock_puntuadores:
+        if motor not in _puntuadores:
+            if motor == 'onnx':
+                try:
+                    _puntuadores[motor] = PuntuadorOnnx()
+                except (ImportError, OSError) as e:
+                    print(f"   ⚠️  Motor onnx no disponible ({e}) — se usa el léxico")
+                    _puntuadores[motor] = _puntuadores.setdefault('lexico', PuntuadorLexico())
+            else:
+                _puntuadores[motor] = PuntuadorLexico()
+        return _puntuadores[motor]
+
+# ---------------------------------------------------------------------------
+# 4. EXPORTACIÓN (única vez que se usa la red)
+# ---------------------------------------------------------------------------
+
+def exportar_onnx(modelo, destino=RUTA_MODELO, max_tokens=MAX_TOKENS):
+    """Exporta un clasificador de Hugging Face a ONNX y lo cuantiza a int8."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(destino, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(modelo, use_fast=True)
+    red = AutoModelForSequenceClassification.from_pretrained(modelo).eval()
+    ejemplo = tokenizer(["This game is great"], return_tensors='pt')
+
+    ruta_fp32 = os.path.join(destino, 'modelo_fp32.onnx')
+    with torch.no_grad():
+        torch.onnx.export(
+            red, (ejemplo['input_ids'], ejemplo['attention_mask']), ruta_fp32,
+            input_names=['input_ids', 'attention_mask'], output_names=['logits'],
+            dynamic_axes={'input_ids': {0: 'lote', 1: 'tokens'},
+                          'attention_mask': {0: 'lote', 1: 'tokens'},
+                          'logits': {0: 'lote'}},
+            opset_version=17
+        )
+    quantize_dynamic(ruta_fp32, os.path.join(destino, ARCHIVO_MODELO), weight_type=QuantType.QInt8)
+    os.remove(ruta_fp32)
+
+    tokenizer.backend_tokenizer.save(os.path.join(destino, 'tokenizer.json'))
+    with open(os.path.join(destino, ARCHIVO_CONFIG), 'w', encoding='utf-8') as f:
+        json.dump({
+            'modelo': modelo,
+            'etiquetas': [red.config.id2label[i] for i in range(red.config.num_labels)],
+            'pad_id': tokenizer.pad_token_id,
+            'max_tokens': max_tokens,
+        }, f, ensure_ascii=False, indent=2)
+    tamano_mb = os.path.getsize(os.path.join(destino, ARCHIVO_MODELO)) / 1e6
+    print(f"   └─ ✅ {modelo} → {destino} ({ARCHIVO_MODELO}, {tamano_mb:.0f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Motores de sentimiento de Steam-BI")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    exportar = subcomandos.add_parser('exportar', help="Exporta y cuantiza un modelo para el motor onnx")
+    exportar.add_argument('--modelo', default='cardiffnlp/twitter-roberta-base-sentiment-latest')
+    exportar.add_argument('--destino', default=RUTA_MODELO)
+    exportar.add_argument('--max-tokens', type=int, default=MAX_TOKENS)
+    args = parser.parse_args()
+
+    if args.comando == 'exportar':
+        exportar_onnx(args.modelo, args.destino, args.max_tokens)
@@ -0,0 +1,109 @@
+# =============================================================================
+# STEAM-BI | Simulador de escenarios de ingresos (What-If)
+# Descripción: Modelo sobre reseñas, positividad y subgénero que da tres
+#              escenarios (percentiles 15 / 50 / 85). Lo usan dashboard.py y
+#              api_steam.py para que ambos den exactamente los mismos números.
+#              Dos motores intercambiables (SIMULADOR_MOTOR o parámetro):
+#                bosque     Random Forest; los escenarios salen de la
+#                           distribución de predicciones de los árboles.
+#                cuantiles  HistGradientBoosting con pérdida cuantil, un
+#                           modelo por percentil. Entrena en una fracción
+#                           del tiempo y sus intervalos sí cubren ~70% de
+#                           los juegos no vistos (los del bosque, mucho menos).
+#              bench_simulador.py compara ambos (tiempos y precisión).
+# =============================================================================
+
+import os
+
+import numpy as np
+import pandas as pd
+
+MIN_REGISTROS = 10
+PERCENTILES = {'pesimista': 15, 'realista': 50, 'optimista': 85}
+MOTORES = ('bosque', 'cuantiles')
+MOTOR = os.getenv('SIMULADOR_MOTOR', 'bosque')
+
+
+class ModeloBosque:
+    """Random Forest: percentiles de las predicciones de sus árboles."""
+
+    motor = 'bosque'
+
+    def __init__(self, bosque):
+        self.bosque = bosque
+
+    def escenarios(self, X):
+        """Matriz (filas x 3) con los escenarios en el orden de PERCENTILES."""
+        por_arbol = np.stack([arbol.predict(X) for arbol in self.bosque.estimators_])
+        return np.percentile(por_arbol, list(PERCENTILES.values()), axis=0).T
+
+
+class ModeloCuantiles:
+    """Un HistGradientBoostingRegressor con pérdida cuantil por percentil."""
+
+    motor = 'cuantiles'
+
+    def __init__(self, modelos):
+        self.modelos = modelos
+
+    def escenarios(self, X):
+        predicciones = np.column_stack([m.predict(X) for m in self.modelos])
+        # Modelos independientes pueden cruzarse: se ordena por fila
+        return np.sort(predicciones, axis=1).clip(min=0)
+
+
+def preparar_datos(df):
+    """(X, y, columnas) con subgénero en one-hot, igual para ambos motores."""
+    df_ml = pd.get_dummies(
+        df[['conteo_resenas', 'ratio_positividad', 'monto_ventas_usd', 'subgenero']],
+        columns=['subgenero'], drop_first=False
+    )
+    columnas_genero = [col for col in df_ml.columns if col.startswith('subgenero_')]
+    columnas = ['conteo_resenas', 'ratio_positividad'] + columnas_genero
+    X = df_ml[columnas].fillna(0).to_numpy(dtype='float64')
+    y = df_ml['monto_ventas_usd'].fillna(0).to_numpy(dtype='float64')
+    return X, y, columnas
+
+
+def ajustar(X, y, motor=None):
+    """Entrena el motor pedido sobre matrices ya preparadas."""
+    motor = motor or MOTOR
+    # Import diferido: sklearn solo se carga si alguien usa el simulador
+    if motor == 'bosque':
+        from sklearn.ensemble import RandomForestRegressor
+
+        bosque = RandomForestRegressor(n_estimators=100, max_depth=12, random_state=42, n_jobs=-1)
+        return ModeloBosque(bosque.fit(X, y))
+    if motor == 'cuantiles':
+        from sklearn.ensemble import HistGradientBoostingRegressor
+
+        return ModeloCuantiles([
+            HistGradientBoostingRegressor(
+                loss='quantile', quantile=p / 100, max_iter=60, learning_rate=0.15,
+                max_leaf_nodes=15, max_bins=63, early_stopping=False, random_state=42
+            ).fit(X, y)
+            for p in PERCENTILES.values()
+        ])
+    raise ValueError(f"Motor desconocido: {motor}. Disponibles: {', '.join(MOTORES)}")
+
+
+def entrenar_simulador(df, motor=None):
+    """
+    Entrena el modelo con los hechos de ventas (columnas de QUERY_VENTAS +
+    ratio_positividad). Devuelve (modelo, columnas de entrada).
+    """
+    X, y, columnas = preparar_datos(df)
+    return ajustar(X, y, motor), columnas
+
+
+def calcular_escenarios(modelo, columnas, subgenero, resenas, positividad):
+    """{'pesimista', 'realista', 'optimista'} en USD para un lanzamiento hipotético."""
+    entrada = np.zeros((1, len(columnas)))
+    entrada[0, columnas.index('conteo_resenas')] = resenas
+    entrada[0, columnas.index('ratio_positividad')] = positividad
+    columna_activa = f'subgenero_{subgenero}'
+    if columna_activa in columnas:
+        entrada[0, columnas.index(columna_activa)] = 1
+
+    fila = modelo.escenarios(entrada)[0]
+    return {nombre: float(valor) for nombre, valor in zip(PERCENTILES, fila)}
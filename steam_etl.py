@@ -1,11 +1,13 @@
 import requests
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from datetime import datetime
 import pytz
 import os
 import random
 
+from conexion import crear_engine
+
 # 1. Configuración de conexiones (Capa de Integración)
 DB_URI_SUPABASE = os.getenv('DB_URI')
 
@@ -15,16 +17,22 @@ juegos_ids = [440, 550, 730, 218230, 252490, 578080, 1085660, 1172470, 1240440,
 tz_mexico = pytz.timezone('America/Mexico_City')
 hoy = datetime.now(tz_mexico).date()
 
+def asegurar_dim_tiempo(engine, fecha=hoy):
+    """Inserta la fecha en dim_tiempo si aún no existe (Idempotencia)"""
+    with engine.connect() as conn:
+        conn.execute(text("""
+            INSERT INTO dim_tiempo (id_tiempo, mes, trimestre, anio)
+            VALUES (:d, :m, :t, :a) ON CONFLICT (id_tiempo) DO NOTHING
+        """), {"d": fecha, "m": fecha.month, "t": (fecha.month - 1) // 3 + 1, "a": fecha.year})
+        conn.commit()
+
 def preparar_supabase(engine):
     """Maneja la limpieza y dimensiones en PostgreSQL (Idempotencia)"""
     try:
-        with engine.connect() as conn:
-            # Asegurar dimensión tiempo con la fecha correcta de México
-            conn.execute(text("""
-                INSERT INTO dim_tiempo (id_tiempo, mes, trimestre, anio)
-                VALUES (:d, :m, :t, :a) ON CONFLICT (id_tiempo) DO NOTHING
-            """), {"d": hoy, "m": hoy.month, "t": (hoy.month - 1) // 3 + 1, "a": hoy.year})
+        # Asegurar dimensión tiempo con la fecha correcta de México
+        asegurar_dim_tiempo(engine, hoy)
 
+        with engine.connect() as conn:
             # Limpieza preventiva para evitar duplicados en la carga diaria
             conn.execute(text("DELETE FROM hechos_resenas_steam WHERE fk_tiempo = :d"), {"d": hoy})
             conn.commit()
@@ -33,49 +41,48 @@ def preparar_supabase(engine):
         print(f"   - Error en preparar_supabase: {e}")
         raise
 
-def extraer_datos(appid):
+def construir_hecho(appid, fecha, votos_positivos, votos_negativos, total_reviews):
+    """Fila de hechos_resenas_steam a partir de los totales de reseñas"""
+    # Simulación de métricas de negocio (método Boxleiter)
+    ventas = total_reviews * random.randint(30, 50)
+
+    return {
+        'fk_juego': appid,
+        'fk_tipo_resena': 1,
+        'fk_tiempo': fecha,
+        'votos_positivos': votos_positivos,
+        'votos_negativos': votos_negativos,
+        'cantidad_descargas': int(ventas * 1.15),
+        'monto_ventas_usd': round(ventas * 19.99, 2),
+        'conteo_resenas': total_reviews
+    }
+
+def extraer_datos(appid, session=requests):
     """Fase de Extracción y Transformación básica (ETL)"""
     url = f"https://store.steampowered.com/appreviews/{appid}?json=1&language=all"
     try:
-        r = requests.get(url, timeout=15)
+        r = session.get(url, timeout=15)
         r.raise_for_status()
         data = r.json()
         stats = data['query_summary']
-        total_reviews = stats['total_reviews']
-
-        # Simulación de métricas de negocio (método Boxleiter)
-        ventas = total_reviews * random.randint(30, 50)
-
-        return {
-            'fk_juego': appid,
-            'fk_tipo_resena': 1,
-            'fk_tiempo': hoy,  # ← fecha México correcta
-            'votos_positivos': stats['total_positive'],
-            'votos_negativos': stats['total_negative'],
-            'cantidad_descargas': int(ventas * 1.15),
-            'monto_ventas_usd': round(ventas * 19.99, 2),
-            'conteo_resenas': total_reviews
-        }
+
+        return construir_hecho(
+            appid, hoy,  # ← fecha México correcta
+            stats['total_positive'], stats['total_negative'], stats['total_reviews']
+        )
     except Exception as e:
         print(f"   - Error extrayendo appid {appid}: {e}")
         return None
 
+def cargar_resenas(engine, df):
+    """Carga los hechos del día en hechos_resenas_steam"""
+    df.to_sql('hechos_resenas_steam', engine, if_exists='append', index=False, method='multi')
+
 if __name__ == "__main__":
     if not DB_URI_SUPABASE:
         print("❌ ERROR: Falta configurar la URI de Supabase en los Secrets.")
     else:
-        uri_final = DB_URI_SUPABASE
-        if uri_final.startswith("postgres://"):
-            uri_final = uri_final.replace("postgres://", "postgresql+psycopg2://", 1)
-
-        engine_sp = create_engine(
-            uri_final,
-            pool_pre_ping=True,
-            connect_args={
-                "options": "-c client_encoding=utf8",
-                "sslmode": "require"
-            }
-        )
+        engine_sp = crear_engine(DB_URI_SUPABASE)
 
         try:
             print("🚀 Iniciando proceso ETL de Steam-BI...")
@@ -90,7 +97,7 @@ if __name__ == "__main__":
 
             if not df.empty:
                 print(f"3. Cargando {len(df)} registros en Supabase (PostgreSQL)...")
-                df.to_sql('hechos_resenas_steam', engine_sp, if_exists='append', index=False, method='multi')
+                cargar_resenas(engine_sp, df)
                 print("✅ ¡Éxito! Sincronización completada correctamente.")
             else:
                 print("⚠️ No se obtuvieron datos válidos para cargar.")